@@ -0,0 +1,219 @@
+"""Pool of Apple IDs with per-account quota tracking.
+
+Free Apple IDs may register only a handful of new app IDs per rolling week,
+keep a few sideloaded apps active per device, and do not like parallel logins.
+The pool remembers which accounts exist (`accounts.json`; passwords live in the
+keyring under ACCOUNT_KEYRING_SERVICE) and which app IDs each one registered
+recently. The scheduler asks it whether a task's account has headroom and, for
+tasks without a pinned account, which account is least used. Apple IDs that
+are not in the pool (e.g. paid developer accounts) are never held back.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+from .app_config import accounts_path, altheapath
+from .logging_utils import log_exception
+
+
+ACCOUNT_KEYRING_SERVICE = "althea-accounts"
+WEEK_S = 7 * 24 * 3600
+
+
+class AccountPool:
+    def __init__(
+        self,
+        path: str | None = None,
+        *,
+        app_ids_per_week: int = 10,
+        active_apps_per_device: int = 3,
+        max_concurrent: int = 1,
+        active_fn=None,
+        clock=time.time,
+    ):
+        self._path = path or accounts_path()
+        self.app_ids_per_week = max(1, int(app_ids_per_week))
+        self.active_apps_per_device = max(1, int(active_apps_per_device))
+        self.max_concurrent = max(1, int(max_concurrent))
+        # active_fn(apple_id, udid) -> bundle IDs this account keeps active there.
+        # It may do I/O, so it is only called from `refresh_active`, never
+        # while the scheduler holds the queue lock.
+        self._active_fn = active_fn or (lambda _apple_id, _udid: set())
+        self._active = {}  # (apple_id, udid) -> bundle IDs, filled by refresh_active
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data = None  # {"accounts": [apple_id...], "usage": {apple_id: {bundle_id: at}}}
+        self._running = {}  # apple_id -> concurrent installs
+
+    @classmethod
+    def from_settings(cls, settings: dict, **kwargs) -> "AccountPool":
+        raw = settings.get("account_pool") if isinstance(settings, dict) else None
+        raw = raw if isinstance(raw, dict) else {}
+        try:
+            return cls(
+                app_ids_per_week=int(raw.get("app_ids_per_week", 10)),
+                active_apps_per_device=int(raw.get("active_apps_per_device", 3)),
+                max_concurrent=int(raw.get("max_concurrent_logins", 1)),
+                **kwargs,
+            )
+        except (TypeError, ValueError):
+            return cls(**kwargs)
+
+    def _load_locked(self) -> dict:
+        if self._data is not None:
+            return self._data
+        data = {"accounts": [], "usage": {}}
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            data["accounts"] = [str(a) for a in raw.get("accounts") or []]
+            data["usage"] = {
+                str(a): {str(b): float(t) for b, t in (u or {}).items()}
+                for a, u in (raw.get("usage") or {}).items()
+            }
+        except FileNotFoundError:
+            pass
+        except Exception:
+            log_exception("Account pool file unreadable; starting empty")
+        self._data = data
+        return data
+
+    def _save_locked(self) -> None:
+        os.makedirs(altheapath, exist_ok=True)
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._path)
+
+    # -- membership ---------------------------------------------------------
+
+    def accounts(self) -> list:
+        with self._lock:
+            return list(self._load_locked()["accounts"])
+
+    def add(self, apple_id: str) -> None:
+        apple_id = apple_id.strip().lower()
+        with self._lock:
+            data = self._load_locked()
+            if apple_id and apple_id not in data["accounts"]:
+                data["accounts"].append(apple_id)
+                self._save_locked()
+
+    def remove(self, apple_id: str) -> None:
+        with self._lock:
+            data = self._load_locked()
+            if apple_id in data["accounts"]:
+                data["accounts"].remove(apple_id)
+                self._save_locked()
+
+    # -- quota ----------------------------------------------------------------
+
+    def _weekly_locked(self, apple_id: str, now: float) -> dict:
+        usage = self._load_locked()["usage"].get(apple_id, {})
+        return {b: t for b, t in usage.items() if now - t < WEEK_S}
+
+    def app_ids_used(self, apple_id: str) -> int:
+        """App IDs `apple_id` registered within the last week."""
+        with self._lock:
+            return len(self._weekly_locked(apple_id, self._clock()))
+
+    def refresh_active(self, udids) -> None:
+        """Re-read the apps each pooled account keeps active on `udids`."""
+        accounts = self.accounts()
+        active = {}
+        for udid in {u for u in udids if u}:
+            for apple_id in accounts:
+                try:
+                    active[(apple_id, udid)] = set(self._active_fn(apple_id, udid))
+                except Exception:
+                    log_exception("Active app lookup failed")
+        with self._lock:
+            self._active = active
+
+    def is_pooled(self, apple_id: str) -> bool:
+        with self._lock:
+            return apple_id in self._load_locked()["accounts"]
+
+    def _blocker_locked(self, apple_id: str, bundle_id: str, udid: str | None, now: float) -> str | None:
+        if apple_id not in self._load_locked()["accounts"]:
+            return None  # quotas only apply to accounts the pool manages
+        if self._running.get(apple_id, 0) >= self.max_concurrent:
+            return f"{apple_id} is busy"
+        weekly = self._weekly_locked(apple_id, now)
+        if bundle_id not in weekly and len(weekly) >= self.app_ids_per_week:
+            return f"{apple_id} used {len(weekly)}/{self.app_ids_per_week} app IDs this week"
+        if udid:
+            active = self._active.get((apple_id, udid), set())
+            if bundle_id not in active and len(active) >= self.active_apps_per_device:
+                return f"{apple_id} has {len(active)} active apps on this device"
+        return None
+
+    def blocker(self, apple_id: str, bundle_id: str = "", udid: str | None = None) -> str | None:
+        """Why `apple_id` cannot install `bundle_id` on `udid` now (None if it can)."""
+        with self._lock:
+            return self._blocker_locked(apple_id, bundle_id, udid, self._clock())
+
+    def pick(self, bundle_id: str = "", udid: str | None = None, prefer=()) -> str | None:
+        """Least-used pooled account with headroom for this install.
+
+        Accounts in `prefer` (e.g. ones with a warm login session) are chosen
+        over any other, then those already owning the app ID, then the least
+        busy and least used.
+        """
+        now = self._clock()
+        with self._lock:
+            best = None
+            for apple_id in self._load_locked()["accounts"]:
+                if self._blocker_locked(apple_id, bundle_id, udid, now) is not None:
+                    continue
+                weekly = self._weekly_locked(apple_id, now)
+                key = (
+                    apple_id not in prefer,
+                    bundle_id not in weekly,
+                    self._running.get(apple_id, 0),
+                    len(weekly),
+                )
+                if best is None or key < best[0]:
+                    best = (key, apple_id)
+            return best[1] if best else None
+
+    def acquire(self, apple_id: str) -> None:
+        with self._lock:
+            if apple_id not in self._load_locked()["accounts"]:
+                return
+            self._running[apple_id] = self._running.get(apple_id, 0) + 1
+
+    def release(self, apple_id: str) -> None:
+        with self._lock:
+            count = self._running.get(apple_id, 0) - 1
+            if count > 0:
+                self._running[apple_id] = count
+            else:
+                self._running.pop(apple_id, None)
+
+    def record(self, apple_id: str, bundle_id: str) -> None:
+        """Note that `apple_id` (re)registered `bundle_id` now."""
+        if not apple_id or not bundle_id:
+            return
+        now = self._clock()
+        with self._lock:
+            usage = self._load_locked()["usage"].setdefault(apple_id, {})
+            if bundle_id not in usage or now - usage[bundle_id] >= WEEK_S:
+                usage[bundle_id] = now
+            # Forget registrations that no longer count against the quota.
+            for b in [b for b, t in usage.items() if now - t >= WEEK_S]:
+                del usage[b]
+            self._save_locked()
+
+    def summary(self) -> list:
+        """[(apple_id, app IDs used this week, running installs)]"""
+        now = self._clock()
+        with self._lock:
+            return [
+                (a, len(self._weekly_locked(a, now)), self._running.get(a, 0))
+                for a in self._load_locked()["accounts"]
+            ]
@@ -0,0 +1,214 @@
+"""Pool of anisette-server instances for concurrent installs.
+
+The primary instance is the one althea always runs on 127.0.0.1:6969. Extra
+instances are started on the following ports when the queue is deep enough,
+each with its own ADI directory, and retired again once idle. Install tasks
+lease an instance for the duration of their AltServer run.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import math
+import os
+import threading
+import time
+
+from .app_config import altheapath
+from .logging_utils import log_exception, log_info
+from .services import ANISETTE_HOST, ANISETTE_PORT, probe_anisette, spawn_anisette_server
+
+
+class AnisetteInstance:
+    def __init__(self, port: int, proc=None):
+        self.port = port
+        self.url = f"http://{ANISETTE_HOST}:{port}"
+        self.proc = proc  # None for the primary instance managed by services.py
+        self.healthy = False
+        self.latency_s = None  # exponentially weighted moving average
+        self.last_check = 0.0
+        self.leases = 0
+        self.last_used = time.monotonic()
+        self.restarts = 0
+
+    @property
+    def is_primary(self) -> bool:
+        return self.proc is None
+
+    def record_probe(self, latency_s: float | None) -> None:
+        self.last_check = time.monotonic()
+        self.healthy = latency_s is not None
+        if latency_s is None:
+            return
+        if self.latency_s is None:
+            self.latency_s = latency_s
+        else:
+            self.latency_s = 0.7 * self.latency_s + 0.3 * latency_s
+
+    def stats(self) -> dict:
+        return {
+            "port": self.port,
+            "url": self.url,
+            "healthy": self.healthy,
+            "latency_ms": None if self.latency_s is None else round(self.latency_s * 1000, 1),
+            "leases": self.leases,
+            "primary": self.is_primary,
+        }
+
+
+class AnisettePool:
+    def __init__(
+        self,
+        max_size: int = 3,
+        tasks_per_instance: int = 2,
+        idle_retire_s: float = 120.0,
+        check_interval_s: float = 15.0,
+    ):
+        self.max_size = max(1, int(max_size))
+        self.tasks_per_instance = max(1, int(tasks_per_instance))
+        self.idle_retire_s = idle_retire_s
+        self.check_interval_s = check_interval_s
+        self._lock = threading.Lock()
+        self._instances = [AnisetteInstance(ANISETTE_PORT)]
+        # Ports being started or stopped outside the lock; not reusable yet.
+        self._spawning = set()
+        self._stopping = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="althea-anisette-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            extras = [i for i in self._instances if not i.is_primary]
+            self._instances = [i for i in self._instances if i.is_primary]
+        for inst in extras:
+            self._terminate(inst)
+
+    def stats(self) -> list:
+        with self._lock:
+            return [i.stats() for i in self._instances]
+
+    def resize(self, queue_depth: int) -> None:
+        """Grow towards ceil(depth / tasks_per_instance) instances (bounded)."""
+        target = min(self.max_size, max(1, math.ceil(queue_depth / self.tasks_per_instance)))
+        with self._lock:
+            # Concurrent resizes (several workers finishing at once) see each
+            # other's reservations, so they neither overshoot nor share a port.
+            missing = target - len(self._instances) - len(self._spawning)
+            if missing <= 0:
+                return
+            used_ports = {i.port for i in self._instances} | self._spawning | self._stopping
+            ports = []
+            port = ANISETTE_PORT + 1
+            while len(ports) < missing:
+                if port not in used_ports:
+                    ports.append(port)
+                port += 1
+            self._spawning.update(ports)
+        for port in ports:
+            try:
+                proc = spawn_anisette_server(port, os.path.join(altheapath, "anisette", str(port)))
+            except OSError:
+                log_exception(f"Anisette pool: failed to start instance on port {port}")
+                with self._lock:
+                    self._spawning.discard(port)
+                continue
+            with self._lock:
+                self._instances.append(AnisetteInstance(port, proc))
+                self._spawning.discard(port)
+        log_info(f"Anisette pool: resized to {len(self.stats())} instance(s) for queue depth {queue_depth}")
+
+    def mark_unhealthy(self, url: str) -> bool:
+        """Stop leasing the extra instance at `url` until it passes a health
+        check; False if `url` is the primary (or unknown)."""
+        with self._lock:
+            for inst in self._instances:
+                if inst.url == url and not inst.is_primary:
+                    inst.healthy = False
+                    log_info(f"Anisette pool: instance on port {inst.port} marked unhealthy")
+                    return True
+        return False
+
+    @contextlib.contextmanager
+    def lease(self):
+        """Yield the least-loaded healthy instance (the primary if none is healthy)."""
+        with self._lock:
+            candidates = [i for i in self._instances if i.healthy] or [self._instances[0]]
+            inst = min(
+                candidates,
+                key=lambda i: (i.leases, i.latency_s if i.latency_s is not None else math.inf),
+            )
+            inst.leases += 1
+            inst.last_used = time.monotonic()
+        try:
+            yield inst
+        finally:
+            with self._lock:
+                inst.leases -= 1
+                inst.last_used = time.monotonic()
+
+    def check(self) -> None:
+        """Probe every instance, restart dead extras and retire idle ones."""
+        with self._lock:
+            instances = list(self._instances)
+        for inst in instances:
+            inst.record_probe(probe_anisette(inst.url, timeout=2.0))
+
+        now = time.monotonic()
+        retire = []
+        with self._lock:
+            for inst in list(self._instances):
+                if inst.is_primary or inst.leases:
+                    continue
+                if now - inst.last_used >= self.idle_retire_s:
+                    self._instances.remove(inst)
+                    self._stopping.add(inst.port)
+                    retire.append(inst)
+        for inst in retire:
+            log_info(f"Anisette pool: retiring idle instance on port {inst.port}")
+            self._terminate(inst)
+            with self._lock:
+                self._stopping.discard(inst.port)
+
+        for inst in instances:
+            if inst.is_primary or inst in retire or inst.proc.poll() is None:
+                continue
+            if inst.restarts >= 3:
+                # Keeps dying (port taken, unsupported flag...): don't flap.
+                log_info(f"Anisette pool: instance on port {inst.port} keeps exiting; dropping it")
+                with self._lock:
+                    if inst in self._instances:
+                        self._instances.remove(inst)
+                continue
+            # Extra instance exited: replace it on the same port.
+            log_info(f"Anisette pool: instance on port {inst.port} exited rc={inst.proc.returncode}; restarting")
+            try:
+                inst.proc = spawn_anisette_server(inst.port, os.path.join(altheapath, "anisette", str(inst.port)))
+                inst.restarts += 1
+            except OSError:
+                log_exception(f"Anisette pool: failed to restart instance on port {inst.port}")
+
+    def _terminate(self, inst: AnisetteInstance) -> None:
+        try:
+            inst.proc.terminate()
+            inst.proc.wait(timeout=3)
+        except Exception:
+            try:
+                inst.proc.kill()
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception:
+                log_exception("Anisette pool health check failed")
+            self._stop.wait(self.check_interval_s)
@@ -0,0 +1,67 @@
+"""Keep anisette-server hot between installs.
+
+The first anisette request after an idle period is slow because the server has
+to load libCoreADI.so and provision again. The warmer issues a cheap request to
+every instance that has not been probed recently, on a schedule and on demand
+right before queued work starts. Probes go through the pooled keep-alive
+connections in services.py and feed the anisette latency metrics.
+"""
+
+from __future__ import annotations
+
+import threading
+
+from .logging_utils import log_exception, log_info
+from .services import ANISETTE_URL, probe_anisette, seconds_since_anisette_probe
+
+
+class AnisetteWarmer:
+    def __init__(self, urls_fn=None, interval_s: float = 60.0, timeout_s: float = 10.0):
+        """`urls_fn()` returns the anisette URLs to keep warm (default: primary)."""
+        self._urls_fn = urls_fn or (lambda: [ANISETTE_URL])
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._force = False
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="althea-anisette-warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def warm_soon(self) -> None:
+        """Warm every instance now, without blocking the caller."""
+        self._force = True
+        self._wake.set()
+
+    def warm(self, force: bool = False) -> dict:
+        """Probe stale (or, with `force`, all) instances; returns {url: latency_s|None}."""
+        results = {}
+        # Anything probed recently (e.g. by the pool health check) is still
+        # warm; skip it to avoid redundant requests.
+        fresh_s = 5.0 if force else self.interval_s / 2
+        for url in self._urls_fn():
+            if seconds_since_anisette_probe(url) < fresh_s:
+                continue
+            results[url] = probe_anisette(url, timeout=self.timeout_s)
+            if results[url] is None:
+                log_info(f"Anisette warmer: {url} did not respond")
+        return results
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            force, self._force = self._force, False
+            try:
+                self.warm(force=force)
+            except Exception:
+                log_exception("Anisette warmer failed")
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
@@ -51,3 +51,35 @@ def settings_path() -> str:
 
 def log_path() -> str:
     return os.path.join(altheapath, "althea.log")
+
+
+def installed_apps_path() -> str:
+    return os.path.join(altheapath, "installed_apps.json")
+
+
+def ipa_cache_dir() -> str:
+    return os.path.join(altheapath, "ipa-cache")
+
+
+def accounts_path() -> str:
+    return os.path.join(altheapath, "accounts.json")
+
+
+def ipc_socket_path() -> str:
+    return os.path.join(altheapath, "althea.sock")
+
+
+def sandboxes_dir() -> str:
+    return os.path.join(altheapath, "sandboxes")
+
+
+def sandbox_template_dir() -> str:
+    return os.path.join(altheapath, "sandbox-template")
+
+
+def traces_dir() -> str:
+    return os.path.join(altheapath, "traces")
+
+
+def profiles_dir() -> str:
+    return os.path.join(altheapath, "profiles")
@@ -0,0 +1,163 @@
+"""Index of apps installed through althea, per device.
+
+Free Apple ID signatures expire 7 days after signing; the index remembers what
+was installed where, when it was signed and from which IPA so the refresh
+scheduler can re-sign ahead of expiry.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .app_config import altheapath, installed_apps_path
+
+
+FREE_ACCOUNT_VALIDITY_S = 7 * 24 * 3600
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InstalledApp:
+    def __init__(
+        self,
+        udid: str,
+        key: str,
+        ipa_path: str,
+        signed_at: float,
+        apple_id: str = "",
+        sha256: str = "",
+        bundle_id: str = "",
+    ):
+        self.udid = udid
+        self.key = key
+        self.ipa_path = ipa_path
+        self.signed_at = signed_at
+        self.apple_id = apple_id
+        self.sha256 = sha256
+        self.bundle_id = bundle_id
+
+    @property
+    def expires_at(self) -> float:
+        return self.signed_at + FREE_ACCOUNT_VALIDITY_S
+
+    def to_dict(self) -> dict:
+        return {
+            "ipa_path": self.ipa_path,
+            "signed_at": self.signed_at,
+            "apple_id": self.apple_id,
+            "sha256": self.sha256,
+            "bundle_id": self.bundle_id,
+        }
+
+    @classmethod
+    def from_dict(cls, udid: str, key: str, raw: dict) -> "InstalledApp":
+        return cls(
+            udid=udid,
+            key=key,
+            ipa_path=str(raw.get("ipa_path") or ""),
+            signed_at=float(raw.get("signed_at") or 0.0),
+            apple_id=str(raw.get("apple_id") or ""),
+            sha256=str(raw.get("sha256") or ""),
+            bundle_id=str(raw.get("bundle_id") or ""),
+        )
+
+
+class InstalledAppIndex:
+    """Thread-safe JSON-backed {udid: {key: InstalledApp}} store."""
+
+    def __init__(self, path: str | None = None):
+        self._path = path or installed_apps_path()
+        self._lock = threading.Lock()
+        self._apps = None
+
+    def _load_locked(self) -> dict:
+        if self._apps is not None:
+            return self._apps
+        apps = {}
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            for udid, entries in (raw.get("devices") or {}).items():
+                for key, entry in (entries or {}).items():
+                    apps.setdefault(udid, {})[key] = InstalledApp.from_dict(udid, key, entry)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            apps = {}
+        self._apps = apps
+        return apps
+
+    def _save_locked(self) -> None:
+        os.makedirs(altheapath, exist_ok=True)
+        payload = {
+            "devices": {
+                udid: {key: app.to_dict() for key, app in entries.items()}
+                for udid, entries in self._apps.items()
+            }
+        }
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._path)
+
+    @staticmethod
+    def key_for(ipa_path: str, bundle_id: str = "") -> str:
+        return bundle_id or os.path.abspath(ipa_path)
+
+    def record_install(
+        self,
+        udid: str,
+        ipa_path: str,
+        *,
+        apple_id: str = "",
+        signed_at: float | None = None,
+        sha256: str = "",
+        bundle_id: str = "",
+    ) -> InstalledApp:
+        key = self.key_for(ipa_path, bundle_id)
+        app = InstalledApp(
+            udid=udid,
+            key=key,
+            ipa_path=os.path.abspath(ipa_path),
+            signed_at=time.time() if signed_at is None else signed_at,
+            apple_id=apple_id,
+            sha256=sha256,
+            bundle_id=bundle_id,
+        )
+        with self._lock:
+            apps = self._load_locked()
+            apps.setdefault(udid, {})[key] = app
+            self._save_locked()
+        return app
+
+    def remove(self, udid: str, key: str) -> None:
+        with self._lock:
+            apps = self._load_locked()
+            if apps.get(udid, {}).pop(key, None) is not None:
+                if not apps[udid]:
+                    del apps[udid]
+                self._save_locked()
+
+    def get(self, udid: str, key: str) -> InstalledApp | None:
+        with self._lock:
+            return self._load_locked().get(udid, {}).get(key)
+
+    def apps(self, udid: str | None = None) -> list:
+        with self._lock:
+            apps = self._load_locked()
+            if udid is not None:
+                return list(apps.get(udid, {}).values())
+            return [app for entries in apps.values() for app in entries.values()]
@@ -0,0 +1,166 @@
+"""In-memory credential cache in front of the keyring.
+
+With the Secret Service backend every keyring call is a D-Bus round trip, and
+it blocks while the keyring is locked. The saved Login account is read once on
+a background thread at startup; UI code asks for it through `when_ready`, which
+never blocks. Other lookups (pooled accounts, manifest references) are cached
+after their first read. Writes go through the cache, and `invalidate` drops
+entries that may have changed outside althea.
+"""
+
+from __future__ import annotations
+
+import threading
+
+import keyring
+
+from .logging_utils import log_exception, log_info
+
+
+SAVED_SERVICE = "althea"
+
+_MISSING = object()
+
+
+class CredentialStore:
+    def __init__(self, backend=keyring):
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._values = {}  # (service, username) -> password or None
+        self._loaded = threading.Event()  # set once a read succeeded
+        self._attempted = threading.Event()  # set when a read finishes either way
+        self._waiters = []
+        self._loading = False
+
+    # -- saved Login account --------------------------------------------------
+
+    def load_async(self) -> None:
+        """Start reading the saved Login account (no-op if already loading)."""
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+            self._loaded.clear()
+            self._attempted.clear()
+        threading.Thread(target=self._load, name="althea-credentials", daemon=True).start()
+
+    def _load(self) -> None:
+        # Waiters are always released; on failure they get what is cached and
+        # the next when_ready/wait reads the keyring again.
+        ok = False
+        try:
+            for username in ("apple_id", "password"):
+                self._read(SAVED_SERVICE, username, strict=True)
+            ok = True
+        except keyring.errors.KeyringError as e:
+            log_info(f"Keyring read of the saved Login failed: {e!r}")
+        except Exception:
+            log_exception("Reading the saved Login failed")
+        finally:
+            with self._lock:
+                self._loading = False
+                if ok:
+                    self._loaded.set()
+                self._attempted.set()
+                waiters, self._waiters = self._waiters, []
+        apple_id, password = self.saved()
+        for callback in waiters:
+            try:
+                callback(apple_id, password)
+            except Exception:
+                log_exception("Saved Login callback failed")
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    def saved(self) -> tuple:
+        """Cached (apple_id, password) of the saved Login, or (None, None)."""
+        with self._lock:
+            apple_id = self._values.get((SAVED_SERVICE, "apple_id"))
+            password = self._values.get((SAVED_SERVICE, "password"))
+        if not apple_id or not password:
+            return None, None
+        return apple_id, password
+
+    def when_ready(self, callback) -> None:
+        """Call `callback(apple_id, password)` once the saved Login is known.
+
+        Runs immediately if it is cached, otherwise on the loader thread
+        (with whatever is cached if the keyring could not be read).
+        """
+        with self._lock:
+            if not self._loaded.is_set():
+                self._waiters.append(callback)
+                start = not self._loading
+            else:
+                start = None
+        if start is None:
+            callback(*self.saved())
+        elif start:
+            self.load_async()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until a read of the saved Login finishes (worker threads only); True if loaded."""
+        if self.loaded:
+            return True
+        self.load_async()
+        self._attempted.wait(timeout)
+        return self.loaded
+
+    # -- generic access ---------------------------------------------------------
+
+    def _read(self, service: str, username: str, strict: bool = False):
+        try:
+            value = self._backend.get_password(service, username)
+        except keyring.errors.KeyringError as e:
+            if strict:
+                raise
+            log_info(f"Keyring read of {service}/{username} failed: {e!r}")
+            return None  # not cached: the keyring may be unlocked later
+        with self._lock:
+            self._values[(service, username)] = value
+        return value
+
+    def get(self, service: str, username: str):
+        """Cached password; the first lookup of an entry hits the keyring."""
+        with self._lock:
+            value = self._values.get((service, username), _MISSING)
+        if value is not _MISSING:
+            return value
+        return self._read(service, username)
+
+    def set_async(self, service: str, username: str, password: str) -> None:
+        """Update the cache now and write the keyring in the background."""
+        with self._lock:
+            self._values[(service, username)] = password
+
+        def _write():
+            try:
+                self._backend.set_password(service, username, password)
+            except keyring.errors.KeyringError as e:
+                log_info(f"Keyring write of {service}/{username} failed: {e!r}")
+                self.invalidate(service, username)
+
+        threading.Thread(target=_write, daemon=True).start()
+
+    def delete_async(self, service: str, username: str) -> None:
+        with self._lock:
+            self._values[(service, username)] = None
+
+        def _delete():
+            try:
+                self._backend.delete_password(service, username)
+            except keyring.errors.KeyringError:
+                pass
+
+        threading.Thread(target=_delete, daemon=True).start()
+
+    def invalidate(self, service: str | None = None, username: str | None = None) -> None:
+        """Forget cached entries (all, one service, or one entry)."""
+        with self._lock:
+            for key in list(self._values):
+                if service is None or (key[0] == service and (username is None or key[1] == username)):
+                    del self._values[key]
+            if service in (None, SAVED_SERVICE):
+                self._loaded.clear()
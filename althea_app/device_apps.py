@@ -0,0 +1,99 @@
+"""Installed-app inventory of a device, queried in-process.
+
+Uses pymobiledevice3's installation proxy directly (no subprocess) and caches
+the per-UDID result, so deciding whether a queued IPA is already on the device
+costs one lockdown round trip per device rather than one per task.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from .logging_utils import log_info
+
+
+class InstallDecision:
+    INSTALL = "install"
+    # Same build is installed but its signature is getting old: re-sign it.
+    REFRESH = "refresh"
+    # Same build is installed and freshly signed: nothing to do.
+    SKIP = "skip"
+
+
+def fetch_installed_apps(udid: str, transport: str = "usb") -> dict:
+    """Return {bundle_id: {"version": ..., "build": ...}} for user apps."""
+    from pymobiledevice3.lockdown import create_using_usbmux
+    from pymobiledevice3.services.installation_proxy import InstallationProxyService
+
+    usbmux_address = "127.0.0.1:27015" if transport == "network" else None
+    lockdown = create_using_usbmux(serial=udid, autopair=False, usbmux_address=usbmux_address)
+    try:
+        apps = InstallationProxyService(lockdown=lockdown).get_apps(
+            application_type="User", calculate_sizes=False
+        )
+    finally:
+        try:
+            lockdown.close()
+        except Exception:
+            pass
+    return {
+        bundle_id: {
+            "version": str(info.get("CFBundleShortVersionString") or ""),
+            "build": str(info.get("CFBundleVersion") or ""),
+        }
+        for bundle_id, info in (apps or {}).items()
+    }
+
+
+class DeviceAppInventory:
+    def __init__(self, ttl_s: float = 600.0, fetcher=fetch_installed_apps):
+        self.ttl_s = ttl_s
+        self._fetcher = fetcher
+        self._lock = threading.Lock()
+        self._entries = {}  # udid -> (fetched_at, apps)
+        self._udid_locks = {}
+
+    def _udid_lock(self, udid: str) -> threading.Lock:
+        with self._lock:
+            return self._udid_locks.setdefault(udid, threading.Lock())
+
+    def get(self, udid: str, transport: str = "usb") -> dict | None:
+        """Cached inventory for `udid`; None if the device could not be queried."""
+        with self._udid_lock(udid):
+            with self._lock:
+                entry = self._entries.get(udid)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_s:
+                return entry[1]
+            try:
+                apps = self._fetcher(udid, transport)
+            except Exception as e:
+                log_info(f"Device inventory: {udid!r} ({transport}) query failed: {e!r}")
+                return None
+            with self._lock:
+                self._entries[udid] = (time.monotonic(), apps)
+            return apps
+
+    def invalidate(self, udid: str | None = None) -> None:
+        with self._lock:
+            if udid is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(udid, None)
+
+
+def decide_install(ipa_info, installed_apps: dict | None, signed_at: float | None, *, now: float, fresh_for_s: float):
+    """Compare an IPA with the device inventory; returns (decision, reason)."""
+    if ipa_info is None or not ipa_info.bundle_id or installed_apps is None:
+        return InstallDecision.INSTALL, ""
+    installed = installed_apps.get(ipa_info.bundle_id)
+    if installed is None:
+        return InstallDecision.INSTALL, ""
+    if installed["version"] != ipa_info.version or installed["build"] != ipa_info.build:
+        return InstallDecision.INSTALL, ""
+
+    label = ipa_info.display_version or ipa_info.bundle_id
+    if signed_at is not None and now - signed_at < fresh_for_s:
+        hours = (now - signed_at) / 3600
+        return InstallDecision.SKIP, f"{label} already installed (signed {hours:.0f}h ago)"
+    return InstallDecision.REFRESH, f"{label} already installed; re-signing"
@@ -0,0 +1,108 @@
+"""Background device presence monitor.
+
+Polls usbmuxd and netmuxd for attached devices and notifies listeners when a
+device appears or disappears. Listeners run on the monitor thread; GTK code
+must hop back to the main loop with GLib.idle_add.
+"""
+
+from __future__ import annotations
+
+import threading
+
+from . import metrics
+from .device_utils import list_devices
+from .logging_utils import log_exception, log_info
+
+
+_devices_gauge = metrics.gauge("althea_devices", "Attached devices, by transport")
+
+
+class DeviceEvent:
+    ATTACHED = "attached"
+    DETACHED = "detached"
+
+
+class DeviceMonitor:
+    def __init__(self, interval_s: float = 5.0, lister=list_devices):
+        self.interval_s = interval_s
+        self._lister = lister
+        self._lock = threading.Lock()
+        self._devices = {}  # udid -> transport
+        self._listeners = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add_listener(self, fn) -> None:
+        """Register `fn(event, device_dict)`."""
+        with self._lock:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn) -> None:
+        with self._lock:
+            try:
+                self._listeners.remove(fn)
+            except ValueError:
+                pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._devices)
+
+    def is_attached(self, udid: str) -> bool:
+        with self._lock:
+            return udid in self._devices
+
+    def transport(self, udid: str) -> str:
+        with self._lock:
+            return self._devices.get(udid, "none")
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="althea-device-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def poll_now(self) -> None:
+        """Ask the monitor thread to re-scan immediately."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        log_info(f"Device monitor started (interval={self.interval_s}s)")
+        while not self._stop.is_set():
+            try:
+                self._scan()
+            except Exception:
+                log_exception("Device monitor scan failed")
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+
+    def _scan(self) -> None:
+        current = {d["udid"]: d["transport"] for d in self._lister() if d.get("udid")}
+        with self._lock:
+            previous = self._devices
+            self._devices = current
+            listeners = list(self._listeners)
+        for transport in {"usb", "network"} | set(current.values()) | set(previous.values()):
+            _devices_gauge.set(sum(1 for t in current.values() if t == transport), transport=transport)
+
+        events = []
+        for udid, transport in current.items():
+            if previous.get(udid) != transport:
+                events.append((DeviceEvent.ATTACHED, {"udid": udid, "transport": transport}))
+        for udid, transport in previous.items():
+            if udid not in current:
+                events.append((DeviceEvent.DETACHED, {"udid": udid, "transport": transport}))
+
+        for event, device in events:
+            log_info(f"Device monitor: {event} udid={device['udid']!r} transport={device['transport']}")
+            for fn in listeners:
+                try:
+                    fn(event, device)
+                except Exception:
+                    log_exception("Device monitor listener failed")
@@ -5,9 +5,11 @@ from __future__ import annotations
 import os
 import subprocess
 
+from . import tracing
 from .logging_utils import log_info
 
 
+@tracing.traced(cat="device")
 def get_connected_device() -> dict:
     """Return {udid, transport} where transport is 'usb' | 'network' | 'none'."""
     # Prefer USB via default usbmuxd.
@@ -77,3 +79,80 @@ def get_network_udid() -> str:
         pass
 
     return ""
+
+
+def _list_udids(network: bool) -> list:
+    cmd = ["idevice_id", "-n", "-l"] if network else ["idevice_id", "-l"]
+    env = None
+    if network:
+        env = os.environ.copy()
+        env["USBMUXD_SOCKET_ADDRESS"] = "127.0.0.1:27015"
+    try:
+        out = subprocess.check_output(cmd, env=env, stderr=subprocess.DEVNULL, timeout=4)
+    except Exception:
+        return []
+    return [
+        line.strip().replace(" (Network)", "").replace(" (USB)", "")
+        for line in out.decode(errors="replace").splitlines()
+        if line.strip()
+    ]
+
+
+@tracing.traced(cat="device")
+def list_devices() -> list:
+    """Return every attached device as [{udid, transport}], USB taking precedence."""
+    devices = [{"udid": u, "transport": "usb"} for u in _list_udids(network=False)]
+    seen = {d["udid"] for d in devices}
+    for udid in _list_udids(network=True):
+        if udid not in seen:
+            seen.add(udid)
+            devices.append({"udid": udid, "transport": "network"})
+    return devices
+
+
+@tracing.traced(cat="device")
+def find_device(udid: str) -> dict:
+    """Return {udid, transport} for a specific device, transport 'none' if absent."""
+    for device in list_devices():
+        if device["udid"] == udid:
+            return device
+    return {"udid": "", "transport": "none"}
+
+
+@tracing.traced(cat="device")
+def get_product_version(udid: str, transport: str = "usb", timeout: float = 4.0) -> str:
+    """Return the iOS ProductVersion of `udid`, or "" if it cannot be read."""
+    cmd = ["ideviceinfo", "-u", udid, "-k", "ProductVersion"]
+    env = None
+    if transport == "network":
+        cmd.insert(1, "-n")
+        env = os.environ.copy()
+        env["USBMUXD_SOCKET_ADDRESS"] = "127.0.0.1:27015"
+    try:
+        proc = subprocess.run(
+            cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=timeout, check=False
+        )
+    except Exception as e:
+        log_info(f"get_product_version: {udid!r} failed: {e!r}")
+        return ""
+    out = proc.stdout.decode(errors="replace").strip()
+    if proc.returncode != 0 or not out or not out[0].isdigit():
+        return ""
+    return out.splitlines()[0].strip()
+
+
+@tracing.traced(cat="device")
+def is_paired(udid: str, timeout: float = 3.0) -> bool | None:
+    """True/False from `idevicepair validate`; None if the check itself failed."""
+    try:
+        proc = subprocess.run(
+            ["idevicepair", "-u", udid, "validate"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            timeout=timeout,
+            check=False,
+        )
+    except Exception as e:
+        log_info(f"is_paired: {udid!r} failed: {e!r}")
+        return None
+    return proc.returncode == 0
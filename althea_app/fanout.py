@@ -0,0 +1,81 @@
+"""Fan-out of one IPA to many devices.
+
+The IPA is validated and hashed once for the whole group; each device then gets
+its own queue task. The group caps how many of its tasks install at once and
+reports aggregate progress.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+
+from .install_tasks import InstallTaskStatus
+from .ipa_info import validate_ipa
+
+
+_group_ids = itertools.count(1)
+
+_FINAL = (
+    InstallTaskStatus.SUCCEEDED,
+    InstallTaskStatus.FAILED,
+    InstallTaskStatus.CANCELED,
+    InstallTaskStatus.SKIPPED,
+)
+
+
+class FanoutGroup:
+    def __init__(self, ipa_path: str, concurrency: int = 3):
+        self.id = next(_group_ids)
+        self.ipa_path = os.path.abspath(ipa_path)
+        self.concurrency = max(1, int(concurrency))
+        self.sha256 = ""
+        self.staged_path = None
+        self.tasks = []
+
+    @property
+    def label(self) -> str:
+        return os.path.basename(self.ipa_path)
+
+    def stage(self, cache) -> None:
+        """Copy the IPA into `cache` (an IpaCache) and validate it once for all subtasks.
+
+        The blob stays pinned in `cache` until the subtasks are queued.
+        """
+        self.sha256, self.staged_path = cache.stage(self.ipa_path)
+        try:
+            validate_ipa(self.staged_path)
+        except Exception:
+            cache.unpin(self.sha256)
+            raise
+
+    def counts(self) -> dict:
+        counts = {}
+        for task in self.tasks:
+            counts[task.status] = counts.get(task.status, 0) + 1
+        return counts
+
+    @property
+    def done(self) -> bool:
+        return all(t.status in _FINAL for t in self.tasks)
+
+    def progress(self) -> float:
+        """Aggregate fraction in [0, 1]; finished tasks count as complete."""
+        if not self.tasks:
+            return 0.0
+        total = 0.0
+        for task in self.tasks:
+            if task.status in _FINAL:
+                total += 1.0
+            elif task.progress is not None:
+                total += max(0.0, min(1.0, float(task.progress)))
+        return total / len(self.tasks)
+
+    def summary(self) -> str:
+        counts = self.counts()
+        finished = sum(counts.get(s, 0) for s in _FINAL)
+        text = f"{self.label}: {finished}/{len(self.tasks)} done"
+        failed = counts.get(InstallTaskStatus.FAILED, 0)
+        if failed:
+            text += f", {failed} failed"
+        return f"{text} ({self.progress() * 100:.0f}%)"
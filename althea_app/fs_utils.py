@@ -0,0 +1,60 @@
+"""Filesystem helpers."""
+
+from __future__ import annotations
+
+import errno
+import fcntl
+import os
+import shutil
+
+
+# linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+
+def reflink(src: str, dst: str) -> bool:
+    """Copy-on-write clone of `src` to `dst` (btrfs, XFS, ...); False if unsupported."""
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError as e:
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EBADF):
+            return False
+        raise
+
+
+def clone_file(src: str, dst: str, *, allow_hardlink: bool = False) -> str:
+    """Cheapest independent copy of `src` at `dst`.
+
+    Returns the method used: "hardlink" (only when `allow_hardlink`, for files
+    nobody writes to), "reflink", or "copy".
+    """
+    if allow_hardlink:
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass
+    if reflink(src, dst):
+        return "reflink"
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def clone_tree(src: str, dst: str) -> None:
+    """Recursively clone a directory with `clone_file` (never hardlinks)."""
+    os.makedirs(dst, exist_ok=True)
+    for entry in os.scandir(src):
+        target = os.path.join(dst, entry.name)
+        if entry.is_dir(follow_symlinks=False):
+            clone_tree(entry.path, target)
+        elif entry.is_symlink():
+            os.symlink(os.readlink(entry.path), target)
+        elif entry.is_file(follow_symlinks=False):
+            clone_file(entry.path, target)
@@ -18,6 +18,7 @@ except ValueError:  # Ayatana-based distros
     from gi.repository import Gtk, AyatanaAppIndicator3 as appindicator
 
 from gi.repository import GLib
+from gi.repository import Gio
 from gi.repository import GObject, Handy
 from gi.repository import GdkPixbuf
 from gi.repository import Notify
@@ -29,6 +30,7 @@ GObject.type_ensure(Handy.ActionRow)
 __all__ = [
     "Gtk",
     "GLib",
+    "Gio",
     "GObject",
     "Handy",
     "GdkPixbuf",
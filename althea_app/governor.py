@@ -0,0 +1,205 @@
+"""CPU/IO priority and load-adaptive concurrency for AltServer children.
+
+Signing is CPU and disk heavy; several AltServer runs at normal priority starve
+the desktop and with it the GTK main loop. `ResourceGovernor.adopt` lowers a
+freshly spawned AltServer to a background nice level and the idle-ish ionice
+class (helpers it spawns later inherit both). Where a systemd user manager is
+running, `command` also starts AltServer in a transient scope with a low
+`CPUWeight` (`systemd-run --user --scope`): systemd owns that cgroup and
+removes it when the install exits. `cap` shrinks the number of installs started at once while the
+host is busy, and `usage` reports CPU and RSS per running install.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import psutil
+
+from . import metrics
+from .logging_utils import log_info
+
+
+_cap_gauge = metrics.gauge("althea_install_cap", "Installs allowed to start at once after load adaptation")
+_cpu_gauge = metrics.gauge("althea_install_cpu_percent", "CPU use of a running install's process group, by task")
+_rss_gauge = metrics.gauge("althea_install_rss_bytes", "Resident memory of a running install's process group, by task")
+
+
+class ResourceGovernor:
+    def __init__(
+        self,
+        *,
+        nice: int = 10,
+        ionice_idle: bool = False,
+        cpu_weight: int = 20,
+        use_cgroup: bool = True,
+        adaptive: bool = True,
+        loadavg_fn=os.getloadavg,
+        cpu_count_fn=os.cpu_count,
+        clock=time.monotonic,
+    ):
+        self.nice = max(0, min(19, int(nice)))
+        # Idle class only gets disk time nobody else wants; best-effort 7 is
+        # the lowest level that still makes progress under a busy desktop.
+        self.ionice_idle = bool(ionice_idle)
+        self.cpu_weight = max(1, min(10000, int(cpu_weight)))
+        self.adaptive = bool(adaptive)
+        self._loadavg_fn = loadavg_fn
+        self._cpu_count_fn = cpu_count_fn
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._procs = {}  # task id -> {pid: psutil.Process} (kept for cpu_percent deltas)
+        self._cap = None  # (evaluated_at, configured, cap)
+        self._scope = None if use_cgroup else False  # None = not probed yet
+        self._last = {}  # task id -> latest (cpu, rss)
+
+    @classmethod
+    def from_settings(cls, settings: dict, **kwargs) -> "ResourceGovernor":
+        raw = settings.get("resource_governor") if isinstance(settings, dict) else None
+        raw = raw if isinstance(raw, dict) else {}
+        try:
+            return cls(
+                nice=int(raw.get("nice", 10)),
+                ionice_idle=bool(raw.get("ionice_idle", False)),
+                cpu_weight=int(raw.get("cpu_weight", 20)),
+                use_cgroup=bool(raw.get("cgroup", True)),
+                adaptive=bool(raw.get("adaptive_cap", True)),
+                **kwargs,
+            )
+        except (TypeError, ValueError):
+            return cls(**kwargs)
+
+    # -- priorities -------------------------------------------------------------
+
+    def _scope_prefix(self) -> list:
+        """systemd-run arguments for a CPUWeight scope; [] if unavailable."""
+        with self._lock:
+            if self._scope is None:
+                self._scope = False
+                prefix = [
+                    "systemd-run", "--user", "--scope", "--quiet", "--collect",
+                    "-p", f"CPUWeight={self.cpu_weight}", "--",
+                ]
+                try:
+                    if shutil.which("systemd-run") is None:
+                        raise OSError("systemd-run not found")
+                    # Fails without a user manager or a delegated cpu controller.
+                    subprocess.run(prefix + ["true"], check=True, timeout=10, capture_output=True)
+                    self._scope = prefix
+                    log_info(f"Installs run in systemd scopes (CPUWeight={self.cpu_weight})")
+                except (OSError, subprocess.SubprocessError) as e:
+                    log_info(f"systemd scopes unavailable, using nice/ionice only: {e}")
+            return list(self._scope or [])
+
+    def command(self, args: list) -> list:
+        """`args` wrapped to run in a low-CPUWeight scope, where possible.
+
+        `systemd-run --scope` execs the command, so the pid Popen returns is
+        still AltServer's.
+        """
+        return self._scope_prefix() + list(args)
+
+    def adopt(self, task_id, pid: int) -> None:
+        """Deprioritize the just-spawned `pid` and track it for `task_id`."""
+        try:
+            proc = psutil.Process(pid)
+        except psutil.Error:
+            return
+        try:
+            if self.nice:
+                proc.nice(self.nice)
+            if self.ionice_idle:
+                proc.ionice(psutil.IOPRIO_CLASS_IDLE)
+            else:
+                proc.ionice(psutil.IOPRIO_CLASS_BE, 7)
+        except (psutil.Error, OSError, ValueError) as e:
+            log_info(f"Could not lower priority of pid {pid}: {e!r}")
+        with self._lock:
+            self._procs[task_id] = {pid: proc}
+
+    def release(self, task_id) -> None:
+        with self._lock:
+            self._procs.pop(task_id, None)
+        self._last.pop(task_id, None)
+        _cpu_gauge.remove(task=task_id)
+        _rss_gauge.remove(task=task_id)
+
+    # -- concurrency ------------------------------------------------------------
+
+    def cap(self, configured: int, running: int = 0) -> int:
+        """Installs that may run at once given `configured` and the host load.
+
+        Keeps a core free for the desktop and halves (or, when badly
+        overloaded, serializes) new starts while the 1-minute load average per
+        core is above 1. Our own `running` installs count towards the load, so
+        the cap never drops below them; it only holds back new starts.
+        Re-evaluated at most every 5 seconds.
+        """
+        configured = max(1, int(configured))
+        if not self.adaptive:
+            return configured
+        now = self._clock()
+        with self._lock:
+            if self._cap is not None and self._cap[1] == configured and now - self._cap[0] < 5.0:
+                return max(self._cap[2], min(running, configured))
+            cores = max(1, int(self._cpu_count_fn() or 1))
+            cap = min(configured, max(1, cores - 1))
+            try:
+                per_core = self._loadavg_fn()[0] / cores
+            except OSError:
+                per_core = 0.0
+            if per_core > 1.5:
+                cap = 1
+            elif per_core > 1.0:
+                cap = max(1, cap // 2)
+            if self._cap is None or self._cap[2] != cap:
+                log_info(f"Install concurrency cap {cap} (configured {configured}, {cores} cores, load/core {per_core:.2f})")
+            self._cap = (now, configured, cap)
+        _cap_gauge.set(cap)
+        return max(cap, min(running, configured))
+
+    # -- usage ----------------------------------------------------------------
+
+    def usage(self) -> dict:
+        """{task id: (cpu percent, rss bytes)} summed over each install's processes.
+
+        CPU is measured since the previous call (the first call reports 0).
+        """
+        with self._lock:
+            tracked = {task_id: dict(procs) for task_id, procs in self._procs.items()}
+        out = {}
+        for task_id, procs in tracked.items():
+            leader = next(iter(procs.values()), None)
+            try:
+                for child in leader.children(recursive=True) if leader is not None else ():
+                    procs.setdefault(child.pid, child)
+            except psutil.Error:
+                pass
+            cpu = 0.0
+            rss = 0
+            for pid, proc in list(procs.items()):
+                try:
+                    with proc.oneshot():
+                        cpu += proc.cpu_percent(None)
+                        rss += proc.memory_info().rss
+                except psutil.Error:
+                    if proc is not leader:
+                        del procs[pid]
+            with self._lock:
+                if task_id in self._procs:
+                    self._procs[task_id] = procs
+                else:
+                    continue
+            out[task_id] = (cpu, rss)
+            _cpu_gauge.set(cpu, task=task_id)
+            _rss_gauge.set(rss, task=task_id)
+        self._last = out
+        return out
+
+    def last_usage(self, task_id) -> tuple | None:
+        """(cpu percent, rss bytes) from the latest `usage` call, if any."""
+        return self._last.get(task_id)
@@ -0,0 +1,124 @@
+"""GTK main-loop heartbeat.
+
+A timeout fires every `interval_s` on the main loop; how late it fires is the
+time the loop spent blocked (a synchronous subprocess, a slow keyring call...).
+Every beat's lag goes into a histogram, and lag above `stall_s` is added to a
+stall-time counter, so a scraper can tell how long the UI was frozen.
+
+`StallWatchdog` watches the heartbeat from its own thread. Once no beat has
+come for `threshold_s` it grabs the main thread's Python stack
+(sys._current_frames), and when the loop recovers it logs the stall length
+together with that stack and its origin, the innermost althea frame.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import traceback
+
+from . import metrics
+from .gi import GLib
+from .logging_utils import log_info
+
+
+_lag = metrics.histogram(
+    "althea_mainloop_lag_seconds",
+    "How late main-loop heartbeats fired",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+_stall = metrics.counter("althea_mainloop_stall_seconds_total", "Time the GTK main loop was blocked beyond the stall threshold")
+_stalls = metrics.counter("althea_mainloop_stalls_total", "Main-loop stalls caught by the watchdog, by origin")
+
+# Frames from these files are "ours" when naming where a stall came from.
+_SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class MainLoopHeartbeat:
+    def __init__(self, interval_s: float = 0.25, stall_s: float = 0.1, clock=time.monotonic):
+        self.interval_s = interval_s
+        self.stall_s = stall_s
+        self._clock = clock
+        self._source_id = None
+        self.last_beat = None  # clock() of the latest beat, read by other threads
+
+    def start(self) -> None:
+        if self._source_id is not None:
+            return
+        self.last_beat = self._clock()
+        self._source_id = GLib.timeout_add(int(self.interval_s * 1000), self._beat)
+
+    def stop(self) -> None:
+        if self._source_id is not None:
+            GLib.source_remove(self._source_id)
+            self._source_id = None
+
+    def _beat(self) -> bool:
+        now = self._clock()
+        lag = max(0.0, now - self.last_beat - self.interval_s)
+        self.last_beat = now
+        _lag.observe(lag)
+        if lag > self.stall_s:
+            _stall.inc(lag)
+        return True
+
+
+def _origin(frames: list) -> str:
+    """"file:line in function" of the innermost frame from althea's sources."""
+    for frame in reversed(frames):
+        if os.path.abspath(frame.filename).startswith(_SOURCE_ROOT) and not frame.filename.endswith(
+            ("heartbeat.py", "gi.py")
+        ):
+            return f"{os.path.relpath(frame.filename, _SOURCE_ROOT)}:{frame.lineno} in {frame.name}"
+    if frames:
+        return f"{os.path.basename(frames[-1].filename)}:{frames[-1].lineno} in {frames[-1].name}"
+    return "unknown"
+
+
+class StallWatchdog:
+    def __init__(self, heartbeat: MainLoopHeartbeat, threshold_s: float = 1.0, poll_s: float = 0.1):
+        self.heartbeat = heartbeat
+        self.threshold_s = threshold_s
+        self.poll_s = poll_s
+        self._main_ident = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="althea-stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _capture(self) -> list:
+        frame = sys._current_frames().get(self._main_ident)
+        return traceback.extract_stack(frame) if frame is not None else []
+
+    def _run(self) -> None:
+        clock = self.heartbeat._clock
+        stalled_since = None  # last_beat of the stall being tracked
+        stack = []
+        while not self._stop.wait(self.poll_s):
+            last = self.heartbeat.last_beat
+            if last is None:
+                continue
+            if stalled_since is not None and last != stalled_since:
+                self._report(last - stalled_since - self.heartbeat.interval_s, stack)
+                stalled_since = None
+            if stalled_since is None and clock() - last - self.heartbeat.interval_s > self.threshold_s:
+                stalled_since = last
+                stack = self._capture()
+
+    def _report(self, duration_s: float, stack: list) -> None:
+        origin = _origin(stack)
+        _stalls.inc(origin=origin)
+        log_info(
+            f"Main loop stalled for {duration_s:.2f}s at {origin}\n"
+            + "".join(traceback.format_list(stack[-12:])).rstrip()
+        )
@@ -0,0 +1,327 @@
+"""Install queue core: which task runs when, without GTK or AltServer.
+
+`InstallQueue` owns the task list, the running lanes, the scheduling policy
+and parking of tasks whose device is absent. Running a task is left to
+`_launch` (main.py's InstallQueueManager spawns AltServer on a worker thread;
+tests launch nothing and call `_finish` themselves), and UI updates go through
+`_notify`/`_refresh`. Time only comes from the injected `clock`, so the queue
+can be driven with simulated time.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+from . import metrics
+from .install_tasks import InstallTaskStatus
+from .logging_utils import log_exception, log_info
+from .scheduler import make_scheduler
+
+
+_install_queue_depth = metrics.gauge("althea_install_queue_depth", "Install tasks running or waiting to run")
+_install_tasks = metrics.gauge("althea_install_tasks", "Install tasks in the queue, by status")
+
+_ACTIVE = (
+    InstallTaskStatus.PENDING,
+    InstallTaskStatus.WAITING,
+    InstallTaskStatus.INSTALLING,
+)
+
+
+class InstallQueue:
+    # Re-checks of a parked task whose device the monitor still lists; after
+    # that it waits for a real attach event.
+    park_retry_s = 5.0
+    max_park_retries = 3
+
+    def __init__(self, scheduler=None, clock=time.time, max_parallel: int = 1):
+        self._lock = threading.Lock()
+        self._tasks = []
+        self._running = []
+        self._groups = []
+        # Pluggable pieces (simulated time / fake AltServer binary).
+        self._scheduler = scheduler
+        self._clock = clock
+        self.max_parallel_installs = max(1, int(max_parallel))
+        self._device_monitor = None
+        self._accounts = None
+        metrics.add_collector(self._collect_metrics)
+
+    # -- hooks ----------------------------------------------------------------
+
+    def _make_scheduler(self):
+        return make_scheduler(None)
+
+    def _launch(self, task) -> None:
+        """Run a task that was just moved to INSTALLING; must call `_finish`."""
+        raise NotImplementedError
+
+    def _terminate(self, proc) -> None:
+        """Stop the process of a task canceled while installing."""
+
+    def _notify(self, task) -> None:
+        """`task` changed (called from any thread)."""
+
+    def _refresh(self) -> None:
+        """The task list changed (called from any thread)."""
+
+    def _enqueued(self, tasks) -> None:
+        """`tasks` were just added, before anything is started."""
+
+    def _call_later(self, delay_s: float, fn) -> None:
+        timer = threading.Timer(delay_s, fn)
+        timer.daemon = True
+        timer.start()
+
+    # -- state ----------------------------------------------------------------
+
+    def _collect_metrics(self):
+        with self._lock:
+            statuses = [t.status for t in self._tasks]
+        for status in set(statuses) | {InstallTaskStatus.PENDING, InstallTaskStatus.INSTALLING}:
+            _install_tasks.set(statuses.count(status), status=status)
+        _install_queue_depth.set(
+            sum(1 for s in statuses if s in (InstallTaskStatus.PENDING, InstallTaskStatus.INSTALLING))
+        )
+
+    @property
+    def scheduler(self):
+        if self._scheduler is None:
+            self._scheduler = self._make_scheduler()
+            self._scheduler.accounts = self._accounts
+        return self._scheduler
+
+    def set_scheduler(self, scheduler):
+        with self._lock:
+            scheduler.accounts = self._accounts
+            self._scheduler = scheduler
+
+    def attach_account_pool(self, pool):
+        with self._lock:
+            self._accounts = pool
+            if self._scheduler is not None:
+                self._scheduler.accounts = pool
+
+    @property
+    def max_parallel(self) -> int:
+        """Shared install lanes (fan-out groups may add their own)."""
+        return self.max_parallel_installs
+
+    def groups(self):
+        with self._lock:
+            self._groups = [g for g in self._groups if not g.done]
+            return list(self._groups)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._tasks)
+
+    def queue_depth(self) -> int:
+        """Tasks that are running or could run soon."""
+        active = (InstallTaskStatus.PENDING, InstallTaskStatus.INSTALLING)
+        with self._lock:
+            return sum(1 for t in self._tasks if t.status in active)
+
+    def has_active_task(self, udid: str, ipa_path: str) -> bool:
+        """True if a not-yet-finished task targets `udid` with `ipa_path`."""
+        target = os.path.abspath(ipa_path)
+        with self._lock:
+            return any(
+                t.status in _ACTIVE and t.udid == udid and os.path.abspath(t.ipa_path) == target
+                for t in self._tasks
+            )
+
+    def staged_hashes(self) -> set:
+        """Cache blobs still referenced by unfinished tasks (never evicted)."""
+        with self._lock:
+            return {t.sha256 for t in self._tasks if t.status in _ACTIVE and t.staged_path}
+
+    # -- queue edits ------------------------------------------------------------
+
+    def enqueue(self, task):
+        self.enqueue_many([task])
+
+    def enqueue_many(self, tasks):
+        with self._lock:
+            self._tasks.extend(tasks)
+        self._enqueued(tasks)
+        self._maybe_start_next()
+
+    def enqueue_group(self, group):
+        with self._lock:
+            self._groups.append(group)
+            self._tasks.extend(group.tasks)
+        self._enqueued(group.tasks)
+        self._maybe_start_next()
+
+    def move_up(self, task):
+        with self._lock:
+            if task.status != InstallTaskStatus.PENDING:
+                return
+            try:
+                i = self._tasks.index(task)
+            except ValueError:
+                return
+            if i <= 0:
+                return
+            self._tasks[i - 1], self._tasks[i] = self._tasks[i], self._tasks[i - 1]
+
+    def move_down(self, task):
+        with self._lock:
+            if task.status != InstallTaskStatus.PENDING:
+                return
+            try:
+                i = self._tasks.index(task)
+            except ValueError:
+                return
+            if i >= len(self._tasks) - 1:
+                return
+            self._tasks[i + 1], self._tasks[i] = self._tasks[i], self._tasks[i + 1]
+
+    def cancel(self, task):
+        with self._lock:
+            if task.status in (InstallTaskStatus.PENDING, InstallTaskStatus.WAITING):
+                task.status = InstallTaskStatus.CANCELED
+                try:
+                    self._tasks.remove(task)
+                except ValueError:
+                    pass
+                return
+
+            if task.status == InstallTaskStatus.INSTALLING:
+                task._cancel_requested = True
+                task._cancel_event.set()
+                proc = task._proc
+            else:
+                return
+
+        if proc is not None:
+            # The worker's stdout loop ends once the whole group is gone.
+            self._terminate(proc)
+
+    # -- running ----------------------------------------------------------------
+
+    def _maybe_start_next(self) -> list:
+        """Start as many tasks as the lanes allow; returns those started."""
+        started = []
+        if self._accounts is not None:
+            # Active-app lookups read the installed-app index; do them before
+            # taking the queue lock so the scheduler only sees cached sets.
+            with self._lock:
+                udids = {t.udid for t in self._tasks if t.status == InstallTaskStatus.PENDING}
+            self._accounts.refresh_active(udids)
+        waiting = []
+        with self._lock:
+            now = self._clock()
+            lanes = self.max_parallel
+            while True:
+                # Once the shared lanes are full, a fan-out group still opens
+                # up to its own concurrency for its subtasks (the scheduler
+                # enforces the group cap and one install per device).
+                if len(self._running) < lanes:
+                    candidates = self._tasks
+                else:
+                    candidates = [t for t in self._tasks if t.group is not None]
+                next_task = self.scheduler.pick(candidates, now=now, running=self._running)
+                if next_task is None:
+                    break
+                self._running.append(next_task)
+                next_task.status = InstallTaskStatus.INSTALLING
+                next_task.detail = "Starting…"
+                self.scheduler.on_started(next_task, now)
+                started.append(next_task)
+            if self._accounts is not None:
+                for task in self._tasks:
+                    if task.status == InstallTaskStatus.PENDING and not task.blocked:
+                        reason = self.scheduler.account_blocker(task)
+                        if reason and task.detail != f"Waiting: {reason}":
+                            task.detail = f"Waiting: {reason}"
+                            waiting.append(task)
+
+        for task in waiting:
+            self._notify(task)
+        for task in started:
+            self._notify(task)
+            self._launch(task)
+        return started
+
+    def _retry_later(self, task, delay_s: float, detail: str) -> None:
+        """Requeue a failed task to run again after `delay_s` (frees its lane)."""
+        task.status = InstallTaskStatus.PENDING
+        task.progress = None
+        task.not_before = self._clock() + delay_s
+        task.detail = detail
+        self._notify(task)
+        self._call_later(delay_s, self._maybe_start_next)
+
+    def _finish(self, task) -> None:
+        """Free the task's lane; the caller then starts what comes next."""
+        with self._lock:
+            try:
+                self._running.remove(task)
+            except ValueError:
+                pass
+            # Under the queue lock: order()/pick() read the same state.
+            try:
+                self.scheduler.on_finished(task, self._clock())
+            except Exception:
+                log_exception(f"Scheduler bookkeeping for finished task {task.id} failed")
+
+    # -- devices ----------------------------------------------------------------
+
+    def attach_device_monitor(self, monitor):
+        self._device_monitor = monitor
+        monitor.add_listener(self._on_device_event)
+
+    def _on_device_event(self, event: str, device: dict):
+        pass
+
+    def parked(self, udid: str | None = None):
+        """Tasks waiting for `udid` (or for any device when `udid` is None)."""
+        with self._lock:
+            return [
+                t
+                for t in self._tasks
+                if t.status == InstallTaskStatus.WAITING and (udid is None or t.udid in (None, udid))
+            ]
+
+    def _park(self, task):
+        task.status = InstallTaskStatus.WAITING
+        task.progress = None
+        task.detail = f"Plug in {task.udid}" if task.udid else "Plug in a device"
+        log_info(f"Install task parked: waiting for device {task.udid or '(any)'}")
+        self._notify(task)
+
+        monitor = self._device_monitor
+        if monitor is None:
+            return
+        # The monitor may still list the device (e.g. idevice_id failed once);
+        # no attach event would follow, so retry on our own a few times.
+        if (task.udid and monitor.is_attached(task.udid)) or (not task.udid and monitor.snapshot()):
+            if task.park_retries >= self.max_park_retries:
+                log_info(f"Device {task.udid or '(any)'} listed but not reachable; waiting for it to reattach")
+                task.detail = "Device not reachable; reconnect it"
+                self._notify(task)
+                return
+            task.park_retries += 1
+            self._call_later(self.park_retry_s, lambda: self._unpark(task.udid, retry=True))
+
+    def _unpark(self, udid: str | None, retry: bool = False):
+        woken = []
+        with self._lock:
+            for t in self._tasks:
+                if t.status != InstallTaskStatus.WAITING:
+                    continue
+                if udid is None or t.udid in (None, udid):
+                    t.status = InstallTaskStatus.PENDING
+                    t.detail = "Device attached"
+                    t.attempt = 0
+                    if not retry:
+                        t.park_retries = 0  # a real attach event
+                    woken.append(t)
+        if woken:
+            log_info(f"Device {udid!r} attached: resuming {len(woken)} parked task(s)")
+            self._refresh()
+            self._maybe_start_next()
@@ -0,0 +1,117 @@
+"""Install queue task model.
+
+Kept free of GTK imports so schedulers and other queue policies can be driven
+without a display (e.g. with simulated time).
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+
+
+class Priority:
+    URGENT = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+    NAMES = {
+        URGENT: "Urgent",
+        HIGH: "High",
+        NORMAL: "Normal",
+        LOW: "Low",
+    }
+
+    @classmethod
+    def parse(cls, value) -> int:
+        """Accept an int class or a (case-insensitive) name; default NORMAL."""
+        if isinstance(value, str):
+            for key, name in cls.NAMES.items():
+                if name.lower() == value.strip().lower():
+                    return key
+            return cls.NORMAL
+        try:
+            return min(cls.LOW, max(cls.URGENT, int(value)))
+        except (TypeError, ValueError):
+            return cls.NORMAL
+
+    @classmethod
+    def name(cls, value: int) -> str:
+        return cls.NAMES.get(value, str(value))
+
+
+_task_ids = itertools.count(1)
+
+
+class InstallTaskStatus:
+    PENDING = "Pending"
+    # Parked until its device (or, without a UDID, any device) attaches.
+    WAITING = "Waiting for device"
+    INSTALLING = "Installing"
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+    CANCELED = "Canceled"
+    # The same build is already installed and freshly signed on the device.
+    SKIPPED = "Skipped"
+
+
+class TaskKind:
+    INSTALL = "install"
+    # Re-sign of an app already on the device, before its signature expires.
+    REFRESH = "refresh"
+
+
+class InstallTask:
+    def __init__(
+        self,
+        ipa_path: str,
+        apple_id: str,
+        password: str,
+        *,
+        udid: str | None = None,
+        priority: int = Priority.NORMAL,
+        deadline: float | None = None,
+        created_at: float | None = None,
+        kind: str = TaskKind.INSTALL,
+        force: bool = False,
+    ):
+        self.id = next(_task_ids)
+        self.ipa_path = ipa_path
+        self.apple_id = apple_id
+        self.password = password
+        # Target device; None installs to the first connected device.
+        self.udid = udid
+        self.priority = Priority.parse(priority)
+        # Epoch seconds by which the install must have happened (e.g. app expiry).
+        self.deadline = deadline
+        self.kind = kind
+        # Install even if the device already has this exact build.
+        self.force = force
+        self.decision = None  # althea_app.device_apps.InstallDecision once checked
+        self.group = None  # althea_app.fanout.FanoutGroup for fan-out subtasks
+        self.sha256 = ""  # filled in when the IPA was hashed up front
+        self.staged_path = None  # local copy in althea_app.ipa_cache, once staged
+        self.ipa_info = None  # althea_app.ipa_info.IpaInfo, loaded in the background
+        self.preflight = None  # althea_app.preflight.PreflightResult
+        self.blocked = None  # reason a pre-flight check keeps the task from starting
+        self.created_at = time.time() if created_at is None else created_at
+        self.status = InstallTaskStatus.PENDING
+        self.progress = None  # float in [0,1] or None
+        self.detail = ""
+        self.attempt = 0
+        self.park_retries = 0  # re-checks while parked with the device still listed
+        self.not_before = None  # epoch seconds; a retry waits out its backoff until then
+        self.anisette_url = None  # anisette-server the last attempt leased
+        self.failure = None  # althea_app.retry.Failure of the last attempt
+        self.retry_policy = None  # althea_app.retry.RetryPolicy overriding the settings
+        self._proc = None
+        self._run_started = 0.0  # monotonic start of the first attempt
+        self._cancel_requested = False
+        self._cancel_event = threading.Event()
+
+    @property
+    def install_path(self) -> str:
+        """The IPA AltServer reads: the cached copy if staged, else the source."""
+        return self.staged_path or self.ipa_path
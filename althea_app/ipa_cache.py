@@ -0,0 +1,219 @@
+"""Content-addressed local cache of IPAs handed to AltServer.
+
+Picked IPAs often live on slow NFS/USB shares. Each enqueued IPA is staged once
+into `ipa-cache/<sha256>.ipa` under altheapath: reflinked when the filesystem
+supports it, otherwise copied in one streamed pass that also computes the
+hash. Never hardlinked: a source rewritten in place would change the blob
+under its old hash. Sources are remembered by (path, mtime, size), so
+installing the same build again only costs a stat() of the share. Least
+recently used blobs are evicted once the cache exceeds its size cap; `stage`
+pins the blob it returns until the caller `unpin`s it, so a concurrent stage
+cannot evict it before it is attached to a task.
+"""
+
+from __future__ import annotations
+
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .app_config import ipa_cache_dir
+from .fs_utils import reflink
+from .logging_utils import log_exception, log_info
+
+
+_CHUNK = 1024 * 1024
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_hashing(src: str, dst: str) -> str:
+    """Stream `src` to `dst`, returning the SHA-256 of what was copied."""
+    digest = hashlib.sha256()
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        while True:
+            chunk = fsrc.read(_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+            fdst.write(chunk)
+    return digest.hexdigest()
+
+
+class IpaCache:
+    def __init__(self, root: str | None = None, max_bytes: int = 4 * 1024**3, in_use_fn=None):
+        self.root = root or ipa_cache_dir()
+        self.max_bytes = max_bytes
+        # Returns the SHA-256s of blobs that queued tasks still reference.
+        self._in_use_fn = in_use_fn or (lambda: set())
+        self._lock = threading.Lock()
+        self._staging = {}  # abspath -> Lock, so one source is copied once
+        self._pins = collections.Counter()  # sha256 -> stage() results not yet unpinned
+        self._index = None  # {"sources": {path: [mtime_ns, size, sha]}, "blobs": {sha: {...}}}
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.root, "index.json")
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, f"{sha256}.ipa")
+
+    def _load_locked(self) -> dict:
+        if self._index is not None:
+            return self._index
+        index = {"sources": {}, "blobs": {}}
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            index["sources"] = dict(raw.get("sources") or {})
+            index["blobs"] = dict(raw.get("blobs") or {})
+        except FileNotFoundError:
+            pass
+        except Exception:
+            log_exception("IPA cache index unreadable; starting empty")
+        # Drop entries whose blob vanished.
+        index["blobs"] = {
+            sha: meta for sha, meta in index["blobs"].items() if os.path.isfile(self.blob_path(sha))
+        }
+        index["sources"] = {
+            path: entry
+            for path, entry in index["sources"].items()
+            if isinstance(entry, list) and len(entry) == 3 and entry[2] in index["blobs"]
+        }
+        self._index = index
+        return index
+
+    def _save_locked(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._index_path)
+
+    def _source_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            return self._staging.setdefault(path, threading.Lock())
+
+    def lookup(self, path: str) -> str | None:
+        """SHA-256 of `path` if it is already staged and unchanged, else None."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            index = self._load_locked()
+            entry = index["sources"].get(path)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                if os.path.isfile(self.blob_path(entry[2])):
+                    return entry[2]
+        return None
+
+    def stage(self, path: str) -> tuple:
+        """Return (sha256, cached_path) for `path`, copying it in if needed.
+
+        The blob stays pinned (never evicted) until `unpin(sha256)`.
+        """
+        path = os.path.abspath(path)
+        with self._source_lock(path):
+            sha256 = self.lookup(path)
+            if sha256 is None:
+                sha256 = self._ingest(path)
+            with self._lock:
+                index = self._load_locked()
+                meta = index["blobs"].setdefault(sha256, {})
+                meta["last_used"] = time.time()
+                self._pins[sha256] += 1
+                self._save_locked()
+        self.evict()
+        return sha256, self.blob_path(sha256)
+
+    def unpin(self, sha256: str) -> None:
+        """Release a `stage` pin once the blob is referenced by a task."""
+        with self._lock:
+            self._pins[sha256] -= 1
+            if self._pins[sha256] <= 0:
+                del self._pins[sha256]
+
+    def _ingest(self, path: str) -> str:
+        st = os.stat(path)
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, f".incoming-{os.getpid()}-{threading.get_ident()}")
+        try:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            # Clone (copy-on-write, independent of later writes to the source)
+            # and hash locally; otherwise read the share exactly once, hashing
+            # while copying.
+            try:
+                cloned = reflink(path, tmp)
+            except OSError:
+                cloned = False
+            if cloned:
+                method = "reflink"
+                sha256 = _hash_file(tmp)
+            else:
+                method = "stream"
+                sha256 = _copy_hashing(path, tmp)
+            blob = self.blob_path(sha256)
+            if not os.path.exists(blob):
+                os.replace(tmp, blob)
+            log_info(f"IPA cache: staged {os.path.basename(path)} as {sha256[:12]} ({method})")
+        finally:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+
+        with self._lock:
+            index = self._load_locked()
+            index["blobs"].setdefault(sha256, {})["size"] = os.path.getsize(self.blob_path(sha256))
+            index["sources"][path] = [st.st_mtime_ns, st.st_size, sha256]
+            self._save_locked()
+        return sha256
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(int(m.get("size") or 0) for m in self._load_locked()["blobs"].values())
+
+    def evict(self, keep=()) -> None:
+        """Delete least recently used blobs until the cache fits `max_bytes`."""
+        try:
+            protected = set(keep) | set(self._in_use_fn())
+        except Exception:
+            protected = set(keep)
+        removed = []
+        with self._lock:
+            protected |= set(self._pins)
+            index = self._load_locked()
+            blobs = index["blobs"]
+            total = sum(int(m.get("size") or 0) for m in blobs.values())
+            for sha in sorted(blobs, key=lambda s: blobs[s].get("last_used") or 0.0):
+                if total <= self.max_bytes:
+                    break
+                if sha in protected:
+                    continue
+                total -= int(blobs[sha].get("size") or 0)
+                del blobs[sha]
+                removed.append(sha)
+            if not removed:
+                return
+            index["sources"] = {p: e for p, e in index["sources"].items() if e[2] in blobs}
+            self._save_locked()
+        for sha in removed:
+            try:
+                os.unlink(self.blob_path(sha))
+            except FileNotFoundError:
+                pass
+        log_info(f"IPA cache: evicted {len(removed)} blob(s)")
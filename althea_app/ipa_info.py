@@ -0,0 +1,264 @@
+"""IPA metadata without extracting the archive.
+
+`zipfile` only reads the central directory when opening an archive; after that
+just `Payload/*.app/Info.plist` and, optionally, one icon PNG are decompressed.
+Results are cached by (path, mtime, size), so an unchanged IPA costs a stat().
+"""
+
+from __future__ import annotations
+
+import collections
+import os
+import plistlib
+import struct
+import threading
+import zipfile
+import zlib
+
+
+MAX_ICON_BYTES = 1024 * 1024
+# Largest size an icon is shown at (the file chooser preview), in pixels.
+ICON_SIZE = 96
+
+
+class InvalidIPAError(ValueError):
+    pass
+
+
+class IpaInfo:
+    def __init__(self, path: str, app_dir: str, plist: dict, icon_png: bytes | None = None):
+        self.path = path
+        self.app_dir = app_dir
+        self.bundle_id = str(plist.get("CFBundleIdentifier") or "")
+        self.name = str(
+            plist.get("CFBundleDisplayName")
+            or plist.get("CFBundleName")
+            or os.path.splitext(os.path.basename(app_dir))[0]
+        )
+        self.version = str(plist.get("CFBundleShortVersionString") or "")
+        self.build = str(plist.get("CFBundleVersion") or "")
+        self.min_os = str(plist.get("MinimumOSVersion") or "")
+        self.icon_png = icon_png
+
+    @property
+    def display_version(self) -> str:
+        if self.version and self.build and self.build != self.version:
+            return f"{self.version} ({self.build})"
+        return self.version or self.build
+
+    def __repr__(self) -> str:
+        return f"IpaInfo(bundle_id={self.bundle_id!r}, version={self.display_version!r})"
+
+
+def _icon_names(plist: dict) -> list:
+    names = []
+    for key in ("CFBundleIcons", "CFBundleIcons~ipad"):
+        primary = (plist.get(key) or {}).get("CFBundlePrimaryIcon") or {}
+        names.extend(primary.get("CFBundleIconFiles") or [])
+    names.extend(plist.get("CFBundleIconFiles") or [])
+    if plist.get("CFBundleIconFile"):
+        names.append(plist["CFBundleIconFile"])
+    return [os.path.splitext(str(n))[0] for n in names if n]
+
+
+def _png_width(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> int | None:
+    # IHDR follows the signature, or a CgBI chunk in crushed PNGs: both fit in
+    # the first 64 bytes, so only those are decompressed.
+    try:
+        with zf.open(info) as f:
+            head = f.read(64)
+    except (zipfile.BadZipFile, zlib.error, OSError):
+        return None
+    if not head.startswith(_PNG_SIG):
+        return None
+    for ctype, body in _chunks(head):
+        if ctype == b"IHDR" and len(body) >= 4:
+            return struct.unpack(">I", body[:4])[0]
+    return None
+
+
+def _pick_icon(zf: zipfile.ZipFile, app_dir: str, plist: dict, size: int = ICON_SIZE):
+    """The smallest icon at least `size` pixels wide, else the largest one."""
+    names = _icon_names(plist) or ["AppIcon", "Icon"]
+    best = best_width = None
+    for info in zf.infolist():
+        if not info.filename.startswith(app_dir) or "/" in info.filename[len(app_dir):]:
+            continue
+        base = info.filename[len(app_dir):]
+        if not base.lower().endswith(".png") or info.file_size > MAX_ICON_BYTES:
+            continue
+        if not any(base.startswith(n) for n in names):
+            continue
+        width = _png_width(zf, info)
+        if width is None:
+            continue
+        if best is None or (
+            width < best_width if width >= size and best_width >= size else width > best_width
+        ):
+            best, best_width = info, width
+    return best
+
+
+def inspect_ipa(path: str, with_icon: bool = True) -> IpaInfo:
+    """Read IPA metadata; raises InvalidIPAError if it is not an installable IPA."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            plist_name = None
+            for name in zf.namelist():
+                parts = name.split("/")
+                if len(parts) == 3 and parts[0] == "Payload" and parts[1].endswith(".app") and parts[2] == "Info.plist":
+                    plist_name = name
+                    break
+            if plist_name is None:
+                raise InvalidIPAError("IPA has no Payload/*.app/Info.plist")
+            try:
+                plist = plistlib.loads(zf.read(plist_name))
+            except (plistlib.InvalidFileException, ValueError, zlib.error) as e:
+                raise InvalidIPAError(f"Unreadable Info.plist: {e}") from e
+            if not isinstance(plist, dict):
+                raise InvalidIPAError("Info.plist is not a dictionary")
+
+            app_dir = plist_name[: -len("Info.plist")]
+            icon = None
+            if with_icon:
+                icon_info = _pick_icon(zf, app_dir, plist)
+                if icon_info is not None:
+                    try:
+                        icon = normalize_png(zf.read(icon_info))
+                    except (zipfile.BadZipFile, zlib.error, ValueError, struct.error):
+                        icon = None
+    except FileNotFoundError as e:
+        raise InvalidIPAError(f"IPA not found: {path}") from e
+    except (zipfile.BadZipFile, OSError) as e:
+        raise InvalidIPAError(f"Not a valid IPA archive: {e}") from e
+    return IpaInfo(os.path.abspath(path), app_dir, plist, icon)
+
+
+def validate_ipa(path: str) -> IpaInfo:
+    """Raise InvalidIPAError unless `path` looks like an installable IPA."""
+    info = get_ipa_info(path)
+    if info is None:
+        # Not cached because it failed: re-run uncached for the error message.
+        return inspect_ipa(path, with_icon=False)
+    return info
+
+
+# -- Apple "CgBI" PNGs -------------------------------------------------------
+#
+# Icons inside IPAs are usually "crushed" by Xcode: an extra CgBI chunk, raw
+# deflate data and BGRA pixel order, which regular PNG decoders reject. Convert
+# them back to a standard RGBA PNG.
+
+_PNG_SIG = b"\x89PNG\r\n\x1a\n"
+
+
+def _chunks(data: bytes):
+    pos = len(_PNG_SIG)
+    while pos + 8 <= len(data):
+        length, ctype = struct.unpack(">I4s", data[pos : pos + 8])
+        yield ctype, data[pos + 8 : pos + 8 + length]
+        pos += 12 + length
+
+
+def _chunk(ctype: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + ctype + body + struct.pack(">I", zlib.crc32(ctype + body) & 0xFFFFFFFF)
+
+
+def _unfilter(raw: bytes, width: int, height: int, bpp: int) -> bytearray:
+    stride = width * bpp
+    out = bytearray(stride * height)
+    prev = bytearray(stride)
+    pos = 0
+    for y in range(height):
+        ftype = raw[pos]
+        line = bytearray(raw[pos + 1 : pos + 1 + stride])
+        pos += 1 + stride
+        for x in range(stride):
+            a = line[x - bpp] if x >= bpp else 0
+            b = prev[x]
+            if ftype == 1:
+                line[x] = (line[x] + a) & 0xFF
+            elif ftype == 2:
+                line[x] = (line[x] + b) & 0xFF
+            elif ftype == 3:
+                line[x] = (line[x] + ((a + b) >> 1)) & 0xFF
+            elif ftype == 4:
+                c = prev[x - bpp] if x >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                pred = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+                line[x] = (line[x] + pred) & 0xFF
+        out[y * stride : (y + 1) * stride] = line
+        prev = line
+    return out
+
+
+def normalize_png(data: bytes) -> bytes:
+    """Return `data` as a standard PNG (un-crushing CgBI icons)."""
+    if not data.startswith(_PNG_SIG):
+        raise ValueError("not a PNG")
+    chunks = list(_chunks(data))
+    if not any(ctype == b"CgBI" for ctype, _ in chunks):
+        return data
+
+    ihdr = next(body for ctype, body in chunks if ctype == b"IHDR")
+    width, height, depth, color_type = struct.unpack(">IIBB", ihdr[:10])
+    if depth != 8 or color_type != 6:
+        raise ValueError("unsupported CgBI PNG format")
+    idat = b"".join(body for ctype, body in chunks if ctype == b"IDAT")
+    raw = zlib.decompressobj(-15).decompress(idat)
+    pixels = _unfilter(raw, width, height, 4)
+    # BGRA -> RGBA
+    pixels[0::4], pixels[2::4] = pixels[2::4], pixels[0::4]
+
+    stride = width * 4
+    filtered = b"".join(b"\x00" + bytes(pixels[y * stride : (y + 1) * stride]) for y in range(height))
+    return (
+        _PNG_SIG
+        + _chunk(b"IHDR", ihdr)
+        + _chunk(b"IDAT", zlib.compress(filtered))
+        + _chunk(b"IEND", b"")
+    )
+
+
+# -- Cache -------------------------------------------------------------------
+
+
+class IpaInfoCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+    @staticmethod
+    def _key(path: str):
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+    def get(self, path: str) -> IpaInfo | None:
+        try:
+            key = self._key(path)
+        except OSError:
+            return None
+        with self._lock:
+            info = self._entries.get(key)
+            if info is not None:
+                self._entries.move_to_end(key)
+                return info
+        try:
+            info = inspect_ipa(path)
+        except InvalidIPAError:
+            return None
+        with self._lock:
+            self._entries[key] = info
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return info
+
+
+_cache = IpaInfoCache()
+
+
+def get_ipa_info(path: str) -> IpaInfo | None:
+    """Cached metadata for `path`, or None if it is missing or not a valid IPA."""
+    return _cache.get(path)
@@ -0,0 +1,102 @@
+"""Local control socket.
+
+A running althea listens on `althea.sock` in altheapath (mode 0600). Clients
+send one JSON object per line, `{"cmd": "...", ...}`, and get one JSON reply
+line back: `{"ok": true, ...}` or `{"ok": false, "error": "..."}`. Handlers run
+on the socket thread; anything touching GTK must go through GLib.idle_add.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+
+from .app_config import ipc_socket_path
+from .logging_utils import log_exception, log_info
+
+
+class IpcServer:
+    def __init__(self, path: str | None = None):
+        self.path = path or ipc_socket_path()
+        self._handlers = {"ping": lambda _req: {}}
+        self._sock = None
+        self._thread = None
+
+    def register(self, cmd: str, handler) -> None:
+        """`handler(request_dict)` returns a dict merged into the reply."""
+        self._handlers[cmd] = handler
+
+    def start(self) -> None:
+        if self._sock is not None:
+            return
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            sock.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        sock.listen(8)
+        self._sock = sock
+        self._thread = threading.Thread(target=self._serve, name="althea-ipc", daemon=True)
+        self._thread.start()
+        log_info(f"IPC listening on {self.path}")
+
+    def stop(self) -> None:
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def _serve(self) -> None:
+        while self._sock is not None:
+            try:
+                conn, _addr = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket) -> None:
+        with conn, conn.makefile("rwb") as stream:
+            for line in stream:
+                try:
+                    request = json.loads(line)
+                    handler = self._handlers.get(request.get("cmd"))
+                    if handler is None:
+                        reply = {"ok": False, "error": f"unknown command {request.get('cmd')!r}"}
+                    else:
+                        reply = {"ok": True, **(handler(request) or {})}
+                except (ValueError, AttributeError) as e:
+                    reply = {"ok": False, "error": f"bad request: {e}"}
+                except Exception as e:
+                    log_exception("IPC command failed")
+                    reply = {"ok": False, "error": str(e)}
+                try:
+                    stream.write(json.dumps(reply).encode("utf-8") + b"\n")
+                    stream.flush()
+                except OSError:
+                    return
+
+
+def send_command(cmd: str, path: str | None = None, timeout: float = 30.0, **args) -> dict:
+    """Send one command to the running instance; raises OSError if none listens."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path or ipc_socket_path())
+        sock.sendall(json.dumps({"cmd": cmd, **args}).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionError("althea closed the connection")
+    return json.loads(line)
@@ -0,0 +1,177 @@
+"""Declarative batch-install manifests.
+
+A manifest (JSON, or TOML with a `.toml` suffix) describes a whole install
+matrix so it can be queued in one go:
+
+    [defaults]
+    apple_id = "lab@example.com"   # password looked up in the keyring;
+                                   # "pool" lets the account pool choose
+    keyring = "althea"             # keyring service (optional)
+    priority = "normal"
+    retry = { max_attempts = 5 }
+
+    [groups]
+    bench-a = ["00008030-...", "00008101-..."]
+
+    [[install]]
+    ipa = "nightly/App.ipa"        # relative to the manifest's directory
+    devices = ["bench-a", "00008020-..."]   # UDIDs, group names, or "all"
+    priority = "high"
+    deadline = "2026-05-01T18:00:00+02:00"  # ISO 8601 or epoch seconds
+
+Each install entry may override every key of [defaults] and set
+`force = true` to skip the already-installed check.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+from .install_tasks import InstallTask, Priority
+from .retry import RetryPolicy
+
+
+class ManifestError(ValueError):
+    pass
+
+
+_ENTRY_KEYS = {"ipa", "devices", "apple_id", "keyring", "priority", "deadline", "retry", "force"}
+
+
+def _parse_deadline(value) -> float | None:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime.datetime):  # TOML datetimes arrive parsed
+        dt = value
+    elif isinstance(value, (int, float)):
+        return float(value)
+    else:
+        try:
+            dt = datetime.datetime.fromisoformat(str(value))
+        except ValueError as e:
+            raise ManifestError(f"Invalid deadline {value!r}") from e
+    if dt.tzinfo is None:
+        dt = dt.astimezone()  # naive times are local
+    return dt.timestamp()
+
+
+class ManifestEntry:
+    def __init__(self, raw: dict, defaults: dict, base_dir: str, index: int):
+        unknown = set(raw) - _ENTRY_KEYS
+        if unknown:
+            raise ManifestError(f"install #{index}: unknown key(s) {', '.join(sorted(unknown))}")
+        merged = dict(defaults)
+        merged.update(raw)
+        if not merged.get("ipa"):
+            raise ManifestError(f"install #{index}: missing 'ipa'")
+        if not merged.get("apple_id"):
+            raise ManifestError(f"install #{index}: missing 'apple_id' (use \"pool\" for any pooled account)")
+        self.ipa_path = os.path.normpath(os.path.join(base_dir, os.path.expanduser(str(merged["ipa"]))))
+        devices = merged.get("devices", "all")
+        self.devices = "all" if devices == "all" else [str(d) for d in ([devices] if isinstance(devices, str) else devices)]
+        # "" = any account from the Apple ID pool, chosen when the task starts.
+        self.apple_id = "" if merged["apple_id"] == "pool" else str(merged["apple_id"])
+        self.keyring_service = str(merged.get("keyring") or "althea")
+        self.priority = Priority.parse(merged.get("priority", Priority.NORMAL))
+        self.deadline = _parse_deadline(merged.get("deadline"))
+        retry = dict(defaults.get("retry") or {})
+        retry.update(raw.get("retry") or {})
+        self.retry = retry or None
+        self.force = bool(merged.get("force", False))
+
+
+class Manifest:
+    def __init__(self, path: str, entries: list, groups: dict):
+        self.path = path
+        self.entries = entries
+        self.groups = groups
+
+    def resolve_devices(self, entry: ManifestEntry, attached: list) -> list:
+        """UDIDs for `entry`, expanding group names and "all" (attached devices)."""
+        if entry.devices == "all":
+            return list(attached)
+        udids = []
+        for name in entry.devices:
+            if name == "all":
+                udids.extend(attached)
+            else:
+                udids.extend(self.groups.get(name, [name]))
+        return list(dict.fromkeys(u for u in udids if u))
+
+    def expand(self, attached: list, password_fn, base_retry: dict | None = None) -> list:
+        """Build one InstallTask per (IPA, device).
+
+        `password_fn(service, apple_id)` returns the password or None;
+        `base_retry` is the settings' retry dict that entry overrides apply to.
+        """
+        tasks = []
+        passwords = {}
+        for i, entry in enumerate(self.entries, 1):
+            if not os.path.isfile(entry.ipa_path):
+                raise ManifestError(f"install #{i}: IPA not found: {entry.ipa_path}")
+            key = (entry.keyring_service, entry.apple_id)
+            if key not in passwords:
+                passwords[key] = password_fn(*key) if entry.apple_id else ""
+            if entry.apple_id and not passwords[key]:
+                raise ManifestError(f"install #{i}: no keyring password for {entry.apple_id!r}")
+            udids = self.resolve_devices(entry, attached)
+            if not udids:
+                raise ManifestError(f"install #{i}: no target devices")
+            for udid in udids:
+                task = InstallTask(
+                    ipa_path=entry.ipa_path,
+                    apple_id=entry.apple_id,
+                    password=passwords[key],
+                    udid=udid,
+                    priority=entry.priority,
+                    deadline=entry.deadline,
+                    force=entry.force,
+                )
+                if entry.retry:
+                    retry = dict(base_retry or {})
+                    retry.update(entry.retry)
+                    task.retry_policy = RetryPolicy.from_dict(retry)
+                tasks.append(task)
+        return tasks
+
+
+def load_manifest(path: str) -> Manifest:
+    path = os.path.abspath(os.path.expanduser(path))
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        raise ManifestError(f"Cannot read manifest: {e}") from e
+    is_toml = path.lower().endswith(".toml")
+    if is_toml and tomllib is None:
+        raise ManifestError("TOML manifests need Python 3.11+ or the 'tomli' package; use JSON instead")
+    try:
+        if is_toml:
+            raw = tomllib.loads(data.decode("utf-8"))
+        else:
+            raw = json.loads(data)
+    except ValueError as e:  # TOMLDecodeError and JSONDecodeError are ValueErrors
+        raise ManifestError(f"Invalid manifest {os.path.basename(path)}: {e}") from e
+    if not isinstance(raw, dict):
+        raise ManifestError("Manifest must be a table/object")
+
+    defaults = raw.get("defaults") or {}
+    groups = {str(k): [str(u) for u in v] for k, v in (raw.get("groups") or {}).items()}
+    installs = raw.get("install") or []
+    if not isinstance(defaults, dict) or not isinstance(installs, list):
+        raise ManifestError("'defaults' must be a table and 'install' a list")
+    if not installs:
+        raise ManifestError("Manifest has no install entries")
+    base_dir = os.path.dirname(path)
+    entries = [ManifestEntry(item, defaults, base_dir, i) for i, item in enumerate(installs, 1)]
+    return Manifest(path, entries, groups)
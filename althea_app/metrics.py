@@ -0,0 +1,243 @@
+"""In-process metrics (counters, gauges, histograms).
+
+Hot paths (install workers, probes, the GTK loop) update metrics without taking
+a lock: every thread writes to its own shard and readers sum the shards when
+collecting. Shards of exited threads are folded into a base total, so
+short-lived workers do not pile up. Gauges are plain attribute stores. `render` produces the
+Prometheus text format served by althea_app.metrics_server.
+"""
+
+from __future__ import annotations
+
+import threading
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+class _Sharded:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []  # [(thread, shard)]
+        self._base = {}  # folded shards of exited threads
+        self._shards_lock = threading.Lock()  # taken once per thread, not per update
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            self._local.shard = shard
+            with self._shards_lock:
+                self._prune_locked()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _prune_locked(self) -> None:
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                # The thread is gone, so nothing writes to its shard anymore.
+                for key, value in shard.items():
+                    self._fold(key, value)
+        self._shards = live
+
+    def _fold(self, key, value) -> None:
+        raise NotImplementedError
+
+    def _snapshots(self) -> list:
+        with self._shards_lock:
+            self._prune_locked()
+            shards = [shard for _thread, shard in self._shards]
+            base = [(k, list(v) if isinstance(v, list) else v) for k, v in self._base.items()]
+        return [base] + [list(shard.items()) for shard in shards]
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str = ""):
+        super().__init__()
+        self.name = name
+        self.help = help_text
+
+    def _fold(self, key, value) -> None:
+        self._base[key] = self._base.get(key, 0.0) + value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        shard = self._shard()
+        key = _label_key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def values(self) -> dict:
+        totals = {}
+        for items in self._snapshots():
+            for key, value in items:
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def value(self, **labels) -> float:
+        return self.values().get(_label_key(labels), 0.0)
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str = ""):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+
+    def set(self, value: float, **labels) -> None:
+        self._values[_label_key(labels)] = float(value)
+
+    def remove(self, **labels) -> None:
+        self._values.pop(_label_key(labels), None)
+
+    def values(self) -> dict:
+        return dict(self._values)
+
+    def value(self, **labels) -> float | None:
+        return self._values.get(_label_key(labels))
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str = "", buckets=DEFAULT_BUCKETS):
+        super().__init__()
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+
+    def _fold(self, key, value) -> None:
+        acc = self._base.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+        for i, v in enumerate(value):
+            acc[i] += v
+
+    def observe(self, value: float, **labels) -> None:
+        shard = self._shard()
+        key = _label_key(labels)
+        entry = shard.get(key)
+        if entry is None:
+            # [per-bucket counts..., +Inf count, sum]
+            entry = [0] * (len(self.buckets) + 1) + [0.0]
+            shard[key] = entry
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[i] += 1
+                break
+        else:
+            entry[len(self.buckets)] += 1
+        entry[-1] += value
+
+    def values(self) -> dict:
+        """{labels: (cumulative bucket counts incl. +Inf, count, sum)}"""
+        merged = {}
+        for items in self._snapshots():
+            for key, entry in items:
+                acc = merged.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+                for i, v in enumerate(list(entry)):
+                    acc[i] += v
+        out = {}
+        for key, acc in merged.items():
+            cumulative = []
+            running = 0
+            for count in acc[:-1]:
+                running += count
+                cumulative.append(running)
+            out[key] = (cumulative, running, acc[-1])
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = []
+
+    def add_collector(self, fn) -> None:
+        """`fn()` runs before each render, to set gauges derived from state."""
+        with self._lock:
+            self._collectors.append(fn)
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def metrics(self) -> list:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def collect(self) -> list:
+        with self._lock:
+            collectors = list(self._collectors)
+        for fn in collectors:
+            try:
+                fn()
+            except Exception:
+                pass  # a broken collector must not take the whole scrape down
+        return self.metrics()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render(registry: Registry | None = None) -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in sorted((registry or REGISTRY).collect(), key=lambda m: m.name):
+        if metric.help:
+            lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for key, value in sorted(metric.values().items()):
+            if metric.kind != "histogram":
+                lines.append(f"{metric.name}{_labels(key)} {_number(value)}")
+                continue
+            cumulative, count, total = value
+            bounds = list(metric.buckets) + [float("inf")]
+            for bound, n in zip(bounds, cumulative):
+                lines.append(f"{metric.name}_bucket{_labels(key, (('le', _number(bound)),))} {n}")
+            lines.append(f"{metric.name}_count{_labels(key)} {count}")
+            lines.append(f"{metric.name}_sum{_labels(key)} {_number(total)}")
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+add_collector = REGISTRY.add_collector
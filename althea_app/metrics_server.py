@@ -0,0 +1,55 @@
+"""Prometheus `/metrics` endpoint on the loopback interface.
+
+Off by default (`metrics_port` = 0). It binds to 127.0.0.1 only and has no
+authentication; remote scrapers reach it through an SSH tunnel or a local
+agent.
+"""
+
+from __future__ import annotations
+
+import http.server
+import threading
+
+from . import metrics
+from .logging_utils import log_info
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render(self.server.registry).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the log
+
+
+class MetricsServer:
+    def __init__(self, port: int, host: str = "127.0.0.1", registry=None):
+        self.host = host
+        self.port = int(port)
+        self.registry = registry or metrics.REGISTRY
+        self._httpd = None
+
+    def start(self) -> None:
+        if self._httpd is not None:
+            return
+        httpd = http.server.ThreadingHTTPServer((self.host, self.port), _Handler)
+        httpd.daemon_threads = True
+        httpd.registry = self.registry
+        self._httpd = httpd
+        self.port = httpd.server_address[1]
+        threading.Thread(target=httpd.serve_forever, name="althea-metrics", daemon=True).start()
+        log_info(f"Metrics endpoint on http://{self.host}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        httpd, self._httpd = self._httpd, None
+        if httpd is not None:
+            httpd.shutdown()
+            httpd.server_close()
@@ -0,0 +1,123 @@
+"""Background pre-flight checks for queued install tasks.
+
+While earlier tasks install, the runner resolves the device, iOS version and
+pair state of upcoming tasks, validates their IPA and makes sure anisette is
+warm. A task whose checks pass is "ready" and can skip device discovery when
+its slot frees up; a blocking problem (unpaired device, corrupt IPA) is shown
+while the task is still queued and keeps it from starting.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from . import tracing
+from .device_utils import find_device, get_connected_device, get_product_version, is_paired
+from .ipa_info import InvalidIPAError, validate_ipa
+from .logging_utils import log_exception, log_info
+
+
+# A result older than this is re-checked before it is trusted.
+FRESH_S = 30.0
+
+
+class PreflightResult:
+    def __init__(self):
+        self.checked_at = time.monotonic()
+        self.udid = ""
+        self.transport = "none"
+        self.ios_version = ""
+        self.paired = None
+        self.blocking = None  # human-readable reason the task cannot start
+        self.warnings = []
+        self.decision = None  # althea_app.device_apps.InstallDecision
+        self.decision_reason = ""
+
+    @property
+    def ready(self) -> bool:
+        return self.blocking is None and bool(self.udid)
+
+    def age(self) -> float:
+        return time.monotonic() - self.checked_at
+
+    def is_fresh(self, max_age_s: float = FRESH_S) -> bool:
+        return self.age() < max_age_s
+
+
+@tracing.traced(cat="preflight")
+def run_preflight(task, warm_fn=None, decide_fn=None) -> PreflightResult:
+    result = PreflightResult()
+
+    try:
+        validate_ipa(task.install_path)
+    except InvalidIPAError as e:
+        result.blocking = str(e)
+        return result
+
+    device = find_device(task.udid) if task.udid else get_connected_device()
+    result.udid = device.get("udid", "")
+    result.transport = device.get("transport", "none")
+    if not result.udid:
+        # Not blocking: the task will wait for the device when its turn comes.
+        result.warnings.append("device not connected")
+    else:
+        result.ios_version = get_product_version(result.udid, result.transport)
+        if result.transport == "usb":
+            result.paired = is_paired(result.udid)
+            if result.paired is False:
+                result.blocking = "Device not paired (use Pair and tap Trust)"
+        if result.blocking is None and decide_fn is not None:
+            result.decision, result.decision_reason = decide_fn(task, result.udid, result.transport)
+
+    if warm_fn is not None:
+        try:
+            warm_fn()
+        except Exception:
+            pass
+    return result
+
+
+class PreflightRunner:
+    def __init__(self, candidates_fn, on_result, warm_fn=None, decide_fn=None):
+        """`candidates_fn()` returns upcoming tasks, best first;
+        `on_result(task, result)` is called from the runner thread."""
+        self._candidates_fn = candidates_fn
+        self._on_result = on_result
+        self._warm_fn = warm_fn
+        self._decide_fn = decide_fn
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="althea-preflight", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def kick(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(FRESH_S)
+            self._wake.clear()
+            try:
+                for task in self._candidates_fn():
+                    if self._stop.is_set():
+                        break
+                    previous = getattr(task, "preflight", None)
+                    if previous is not None and previous.is_fresh():
+                        continue
+                    result = run_preflight(task, self._warm_fn, self._decide_fn)
+                    if result.blocking:
+                        log_info(f"Pre-flight: task {task.id} blocked: {result.blocking}")
+                    self._on_result(task, result)
+            except Exception:
+                log_exception("Pre-flight pass failed")
@@ -0,0 +1,208 @@
+"""Low-overhead resource sampling of supervised helper processes.
+
+Every `interval_s` the sampler reads `/proc/<pid>/stat`, `statm` and the fd
+directory of each helper althea spawned (see services.supervised): three small
+reads per process, no psutil. Samples go into a fixed-size ring buffer per
+helper and into gauges. A helper whose RSS keeps growing over the whole buffer
+window raises one alert (log line, counter and `on_alert`) until it shrinks or
+is restarted; that is how a slow leak shows up days before the box runs out of
+memory.
+"""
+
+from __future__ import annotations
+
+import collections
+import os
+import threading
+import time
+
+from . import metrics
+from .logging_utils import log_exception, log_info
+
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_cpu_gauge = metrics.gauge("althea_process_cpu_percent", "CPU use of a supervised helper, by process")
+_rss_gauge = metrics.gauge("althea_process_rss_bytes", "Resident memory of a supervised helper, by process")
+_fds_gauge = metrics.gauge("althea_process_open_fds", "Open file descriptors of a supervised helper, by process")
+_threads_gauge = metrics.gauge("althea_process_threads", "Threads of a supervised helper, by process")
+_rss_alerts = metrics.counter(
+    "althea_process_rss_growth_alerts_total", "Supervised helpers whose RSS grew steadily, by process"
+)
+
+
+class ProcSample:
+    __slots__ = ("at", "cpu_s", "rss", "threads", "fds")
+
+    def __init__(self, at: float, cpu_s: float, rss: int, threads: int, fds: int | None):
+        self.at = at
+        self.cpu_s = cpu_s  # user + system CPU seconds since the process started
+        self.rss = rss
+        self.threads = threads
+        self.fds = fds  # None if /proc/<pid>/fd is not readable
+
+
+def read_sample(pid: int, at: float) -> ProcSample | None:
+    """One sample of `pid`, or None if it is gone (or a zombie)."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # "pid (comm) state ppid ..."; comm may contain spaces and ")".
+            fields = f.read().rsplit(b")", 1)[1].split()
+        with open(f"/proc/{pid}/statm", "rb") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    if fields[0] == b"Z":
+        return None
+    try:
+        fds = len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        fds = None
+    # Fields after ")" start at index 0 with state (field 3 of proc(5)).
+    cpu_s = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+    return ProcSample(at, cpu_s, resident_pages * _PAGE_SIZE, int(fields[17]), fds)
+
+
+class _Series:
+    def __init__(self, pid: int, size: int):
+        self.pid = pid
+        self.samples = collections.deque(maxlen=size)
+        self.cpu_percent = 0.0
+        self.alerted = False
+
+
+class ProcessSampler:
+    def __init__(
+        self,
+        pids_fn,
+        *,
+        interval_s: float = 10.0,
+        history: int = 360,
+        rss_growth_alert_bytes: int = 64 * 1024 * 1024,
+        on_alert=None,
+        clock=time.monotonic,
+    ):
+        # pids_fn() -> {name: pid} of the processes to watch.
+        self._pids_fn = pids_fn
+        self.interval_s = max(1.0, float(interval_s))
+        self.history = max(8, int(history))
+        self.rss_growth_alert_bytes = max(1, int(rss_growth_alert_bytes))
+        self._on_alert = on_alert or (lambda _name, _pid, _growth, _window_s: None)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._series = {}  # name -> _Series
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="althea-proc-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample_once()
+            except Exception:
+                log_exception("Process sampler failed")
+            self._stop.wait(self.interval_s)
+
+    def sample_once(self) -> None:
+        now = self._clock()
+        pids = self._pids_fn()
+        alerts = []
+        with self._lock:
+            for name in [n for n, s in self._series.items() if pids.get(n) != s.pid]:
+                del self._series[name]
+                self._clear_gauges(name)
+            for name, pid in pids.items():
+                sample = read_sample(pid, now)
+                if sample is None:
+                    continue
+                series = self._series.get(name)
+                if series is None:
+                    series = self._series[name] = _Series(pid, self.history)
+                if series.samples:
+                    prev = series.samples[-1]
+                    elapsed = sample.at - prev.at
+                    if elapsed > 0:
+                        series.cpu_percent = max(0.0, (sample.cpu_s - prev.cpu_s) / elapsed * 100.0)
+                series.samples.append(sample)
+                _cpu_gauge.set(series.cpu_percent, process=name)
+                _rss_gauge.set(sample.rss, process=name)
+                _threads_gauge.set(sample.threads, process=name)
+                if sample.fds is not None:
+                    _fds_gauge.set(sample.fds, process=name)
+                alert = self._check_growth_locked(series)
+                if alert is not None:
+                    alerts.append((name, pid) + alert)
+        for name, pid, growth, window_s in alerts:
+            _rss_alerts.inc(process=name)
+            log_info(
+                f"{name} (pid {pid}) RSS grew steadily by {growth / (1024 * 1024):.0f} MB "
+                f"over {window_s / 60:.0f} min; possible leak"
+            )
+            try:
+                self._on_alert(name, pid, growth, window_s)
+            except Exception:
+                log_exception("Process sampler alert handler failed")
+
+    def _check_growth_locked(self, series: _Series):
+        """(growth bytes, window s) when RSS rose steadily over a full buffer."""
+        samples = series.samples
+        if len(samples) < samples.maxlen:
+            return None
+        first, last = samples[0].rss, samples[-1].rss
+        if last < first:
+            series.alerted = False  # shrank: a later rise is a new episode
+            return None
+        if series.alerted or last - first < self.rss_growth_alert_bytes:
+            return None
+        # "Steadily": nearly every step up or flat, and still rising in the
+        # newest quarter of the window (not a one-off jump that plateaued).
+        rss = [s.rss for s in samples]
+        rising = sum(1 for a, b in zip(rss, rss[1:]) if b >= a)
+        quarter = rss[-(len(rss) // 4):]
+        if rising < 0.9 * (len(rss) - 1) or quarter[-1] <= quarter[0]:
+            return None
+        series.alerted = True
+        return last - first, samples[-1].at - samples[0].at
+
+    @staticmethod
+    def _clear_gauges(name: str) -> None:
+        for gauge in (_cpu_gauge, _rss_gauge, _fds_gauge, _threads_gauge):
+            gauge.remove(process=name)
+
+    def snapshot(self) -> list:
+        """[{name, pid, cpu_percent, rss, threads, fds, rss_growth, leaking}] by name."""
+        with self._lock:
+            out = []
+            for name, series in sorted(self._series.items()):
+                if not series.samples:
+                    continue
+                last = series.samples[-1]
+                out.append(
+                    {
+                        "name": name,
+                        "pid": series.pid,
+                        "cpu_percent": series.cpu_percent,
+                        "rss": last.rss,
+                        "threads": last.threads,
+                        "fds": last.fds,
+                        "rss_growth": last.rss - series.samples[0].rss,
+                        "leaking": series.alerted,
+                    }
+                )
+            return out
+
+    def history_of(self, name: str) -> list:
+        """Buffered samples of `name`, oldest first."""
+        with self._lock:
+            series = self._series.get(name)
+            return list(series.samples) if series is not None else []
@@ -2,6 +2,11 @@
 
 from __future__ import annotations
 
+import os
+import signal
+import threading
+import time
+
 import psutil
 
 
@@ -40,3 +45,73 @@ def kill_process_by_name(process_name: str) -> None:
                 proc.kill()
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
             continue
+
+
+def _group_alive(pgid: int) -> bool:
+    """True if a non-zombie process is still in group `pgid`."""
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        pids = [name for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return True
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                # "pid (comm) state ppid pgrp ..."; comm may contain spaces.
+                fields = f.read().rsplit(b")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        # Orphaned zombies wait for init to reap them; they hold nothing.
+        if int(fields[2]) == pgid and fields[0] != b"Z":
+            return True
+    return False
+
+
+def terminate_process_group(proc, grace_s: float = 3.0, kill_wait_s: float = 2.0) -> bool:
+    """Stop `proc` and everything it spawned; True once the group is gone.
+
+    `proc` must have been started with `start_new_session=True`, so its PID is
+    also its process group ID. The group gets SIGTERM, then SIGKILL if anything
+    in it is still alive after `grace_s`. Returns within about
+    grace_s + kill_wait_s.
+    """
+    pgid = proc.pid
+    try:
+        os.killpg(pgid, signal.SIGTERM)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        proc.terminate()
+
+    deadline = time.monotonic() + grace_s
+    while time.monotonic() < deadline:
+        proc.poll()  # reap the leader so it does not count as alive
+        if not _group_alive(pgid):
+            return True
+        time.sleep(0.05)
+
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        proc.kill()
+    deadline = time.monotonic() + kill_wait_s
+    while time.monotonic() < deadline:
+        proc.poll()
+        if not _group_alive(pgid):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def terminate_process_group_async(proc, grace_s: float = 3.0) -> threading.Thread:
+    """`terminate_process_group` on a helper thread (for the GTK thread)."""
+    thread = threading.Thread(target=terminate_process_group, args=(proc, grace_s), daemon=True)
+    thread.start()
+    return thread
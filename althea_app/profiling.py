@@ -0,0 +1,201 @@
+"""On-demand cProfile and tracemalloc for a running instance.
+
+Both are off until asked for (Settings > Developer, or the `profile` IPC
+command), so a tray instance that misbehaves after days can be inspected
+without a restart.
+
+- CPU: cProfile for a time window. Before Python 3.12 it hooks only the
+  thread that enables it, so it is started on the GTK main thread, where a
+  sluggish UI spends its time (worker threads show up under tracing/metrics
+  instead); from 3.12 it runs on sys.monitoring and covers every thread.
+  Writes `cpu-<time>.prof` (pstats/snakeviz) and a `.txt` summary of the top
+  functions.
+- Memory: the first snapshot starts tracemalloc and records a baseline; each
+  later one writes `memory-<time>.txt` with the top allocation sites that grew
+  since the previous snapshot and the largest ones overall.
+
+Output goes to `profiles` in altheapath.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+from .app_config import profiles_dir
+from .logging_utils import log_exception, log_info
+
+
+TOP_N = 40
+# cProfile hooks every thread from 3.12 (sys.monitoring), one thread before.
+_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+def _stamp() -> str:
+    return time.strftime("%Y%m%d-%H%M%S")
+
+
+class Profiler:
+    def __init__(self, run_on_main=None, out_dir: str | None = None):
+        # run_on_main(fn) runs fn on the thread to profile and returns its result.
+        self._run_on_main = run_on_main or (lambda fn: fn())
+        self._out_dir = out_dir or profiles_dir()
+        self._lock = threading.Lock()
+        self._cpu = None  # cProfile.Profile while running
+        self._cpu_until = None
+        self._timer = None
+        self._memory_baseline = None
+        self.last_output = None  # path of the most recent file written
+
+    # -- CPU ------------------------------------------------------------------
+
+    @property
+    def cpu_running(self) -> bool:
+        return self._cpu is not None
+
+    def _on_profiled_thread(self, fn):
+        return fn() if _ALL_THREADS else self._run_on_main(fn)
+
+    def _arm_timer(self, delay_s: float) -> None:
+        self._timer = threading.Timer(delay_s, self._stop_from_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def start_cpu(self, duration_s: float = 30.0) -> float:
+        """Profile for `duration_s`; returns when it stops (epoch)."""
+        duration_s = max(1.0, min(3600.0, float(duration_s)))
+        with self._lock:
+            if self._cpu is not None:
+                return self._cpu_until
+            profile = cProfile.Profile()
+            self._cpu = profile
+            self._cpu_until = time.time() + duration_s
+            self._arm_timer(duration_s)
+        self._on_profiled_thread(profile.enable)
+        log_info(f"CPU profile started for {duration_s:.0f}s")
+        return self._cpu_until
+
+    def stop_cpu(self) -> str | None:
+        """Stop the CPU profile and write it; returns the summary path.
+
+        If the main loop does not answer (the stall being profiled, say), the
+        stats collected so far are still written, and the profile stays
+        running so a later call can stop it.
+        """
+        with self._lock:
+            profile, self._cpu = self._cpu, None
+            timer, self._timer = self._timer, None
+        if profile is None:
+            return None
+        if timer is not None:
+            timer.cancel()
+        try:
+            self._on_profiled_thread(profile.disable)
+            stopped = True
+        except Exception as e:
+            log_info(f"Could not stop the CPU profile on the main thread ({e}); writing stats so far")
+            stopped = False
+            with self._lock:
+                if self._cpu is None:
+                    self._cpu = profile
+        # snapshot_stats only reads the collected data; create_stats (behind
+        # dump_stats and pstats.Stats) would disable the profile from here.
+        profile.snapshot_stats()
+        os.makedirs(self._out_dir, exist_ok=True)
+        base = os.path.join(self._out_dir, f"cpu-{_stamp()}")
+        with open(f"{base}.prof", "wb") as f:
+            marshal.dump(profile.stats, f)
+        out = io.StringIO()
+        stats = pstats.Stats(f"{base}.prof", stream=out).strip_dirs()
+        scope = "all threads" if _ALL_THREADS else "main thread"
+        if not stopped:
+            scope += ", still running"
+        out.write(f"Top {TOP_N} functions by cumulative time ({scope})\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_N)
+        out.write(f"\nTop {TOP_N} functions by own time\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(TOP_N)
+        with open(f"{base}.txt", "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+        self.last_output = f"{base}.txt"
+        log_info(f"CPU profile written to {base}.prof")
+        return self.last_output
+
+    def _stop_from_timer(self) -> None:
+        try:
+            self.stop_cpu()
+        except Exception:
+            log_exception("Stopping the CPU profile failed")
+        with self._lock:
+            # Still running: the main loop did not answer; try again later.
+            if self._cpu is not None and self._timer is None:
+                self._arm_timer(30.0)
+
+    # -- memory ---------------------------------------------------------------
+
+    @property
+    def memory_tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def snapshot_memory(self, frames: int = 10) -> str | None:
+        """Take a snapshot; the first call only starts tracing (returns None)."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self._memory_baseline = self._take_snapshot()
+                log_info("tracemalloc started; next snapshot reports growth since now")
+                return None
+            previous = self._memory_baseline
+            snapshot = self._take_snapshot()
+            self._memory_baseline = snapshot
+
+        lines = []
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(f"Traced memory: {current / 1024:.0f} KiB (peak {peak / 1024:.0f} KiB)\n")
+        if previous is not None:
+            lines.append(f"\nTop {TOP_N} allocation sites by growth since the previous snapshot")
+            for diff in snapshot.compare_to(previous, "lineno")[:TOP_N]:
+                lines.append(str(diff))
+        lines.append(f"\nTop {TOP_N} allocation sites by size")
+        for stat in snapshot.statistics("lineno")[:TOP_N]:
+            lines.append(str(stat))
+        lines.append("\nLargest allocation site, full traceback")
+        top = snapshot.statistics("traceback")[:1]
+        if top:
+            lines.extend(top[0].traceback.format())
+
+        os.makedirs(self._out_dir, exist_ok=True)
+        path = os.path.join(self._out_dir, f"memory-{_stamp()}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        self.last_output = path
+        log_info(f"Memory snapshot written to {path}")
+        return path
+
+    @staticmethod
+    def _take_snapshot():
+        # tracemalloc's own bookkeeping would otherwise show up in every diff.
+        return tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    def stop_memory(self) -> None:
+        with self._lock:
+            self._memory_baseline = None
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+                log_info("tracemalloc stopped")
+
+    def status(self) -> dict:
+        return {
+            "cpu_running": self.cpu_running,
+            "cpu_until": self._cpu_until if self.cpu_running else None,
+            "cpu_scope": "all threads" if _ALL_THREADS else "the main thread",
+            "memory_tracing": self.memory_tracing,
+            "last_output": self.last_output,
+            "dir": self._out_dir,
+        }
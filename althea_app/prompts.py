@@ -0,0 +1,131 @@
+"""Serialized, non-blocking user prompts for install workers.
+
+AltServer asks for confirmation or a 2FA code on stdin; the worker that reads
+the question must wait for the answer, but nothing else should. Workers call
+`PromptBroker.ask`, which queues the prompt and shows one at a time through
+`present_fn` (non-modal in the UI). A prompt with the same kind and Apple ID as
+one already queued is joined instead of repeated, so a single answer (e.g. one
+verification code) goes to every task waiting on that account.
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+
+from . import metrics
+
+
+class PromptKind:
+    CONFIRM = "confirm"
+    TWO_FACTOR = "two_factor"
+
+
+_prompt_ids = itertools.count(1)
+
+_prompts_shown = metrics.counter("althea_prompts_total", "Prompts shown to the user, by kind")
+_prompts_joined = metrics.counter(
+    "althea_prompts_joined_total", "Prompt requests answered by an already queued prompt, by kind"
+)
+
+
+class Prompt:
+    def __init__(self, kind: str, apple_id: str, text: str):
+        self.id = next(_prompt_ids)
+        self.kind = kind
+        self.apple_id = apple_id
+        self.text = text
+        self.tasks = []  # tasks waiting for the answer
+        self.answer = None
+        self.answered = threading.Event()
+        self.ui = None  # set by the presenter (e.g. the dialog showing it)
+
+    @property
+    def key(self) -> tuple:
+        return (self.kind, self.apple_id, self.text)
+
+
+class PromptBroker:
+    def __init__(self, present_fn, dismiss_fn=None, reuse_code_s: float = 0.0, clock=time.monotonic):
+        # present_fn(prompt) / dismiss_fn(prompt) may be called from any thread.
+        self._present_fn = present_fn
+        self._dismiss_fn = dismiss_fn or (lambda _prompt: None)
+        # A 2FA code answered this recently is handed to later askers for the
+        # same Apple ID without prompting again (0 disables reuse).
+        self.reuse_code_s = reuse_code_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._queue = []  # waiting prompts; the first one is on screen
+        self._codes = {}  # apple_id -> (code, answered_at)
+
+    def pending(self) -> list:
+        with self._lock:
+            return list(self._queue)
+
+    def ask(self, kind: str, apple_id: str, text: str, *, task=None, cancel_event=None):
+        """Block the calling worker until answered; None if canceled/dismissed."""
+        with self._lock:
+            if kind == PromptKind.TWO_FACTOR and self.reuse_code_s > 0:
+                code, at = self._codes.get(apple_id, (None, 0.0))
+                if code and self._clock() - at <= self.reuse_code_s:
+                    _prompts_joined.inc(kind=kind)
+                    return code
+            prompt = next((p for p in self._queue if p.key == (kind, apple_id, text)), None)
+            show = None
+            if prompt is None:
+                prompt = Prompt(kind, apple_id, text)
+                self._queue.append(prompt)
+                _prompts_shown.inc(kind=kind)
+                if len(self._queue) == 1:
+                    show = prompt
+            else:
+                _prompts_joined.inc(kind=kind)
+            if task is not None:
+                prompt.tasks.append(task)
+        if show is not None:
+            self._present_fn(show)
+
+        while not prompt.answered.wait(0.25):
+            if cancel_event is not None and cancel_event.is_set():
+                self._leave(prompt, task)
+                return None
+        return prompt.answer
+
+    def answer(self, prompt: Prompt, value) -> None:
+        """Deliver `value` (None = dismissed) to every task waiting on `prompt`."""
+        with self._lock:
+            if prompt.answered.is_set():
+                return
+            prompt.answer = value
+            if prompt.kind == PromptKind.TWO_FACTOR and value:
+                self._codes[prompt.apple_id] = (value, self._clock())
+            nxt = self._remove_locked(prompt)
+        prompt.answered.set()
+        if nxt is not None:
+            self._present_fn(nxt)
+
+    def _leave(self, prompt: Prompt, task) -> None:
+        """`task` stopped waiting; drop the prompt once nobody waits for it."""
+        with self._lock:
+            if task in prompt.tasks:
+                prompt.tasks.remove(task)
+            if prompt.tasks or prompt.answered.is_set():
+                return
+            was_visible = bool(self._queue) and self._queue[0] is prompt
+            nxt = self._remove_locked(prompt)
+        prompt.answered.set()
+        if was_visible:
+            self._dismiss_fn(prompt)
+        if nxt is not None:
+            self._present_fn(nxt)
+
+    def _remove_locked(self, prompt: Prompt):
+        """Remove `prompt`; returns the prompt to show next, if that changed."""
+        if prompt not in self._queue:
+            return None
+        was_first = self._queue[0] is prompt
+        self._queue.remove(prompt)
+        if was_first and self._queue:
+            return self._queue[0]
+        return None
@@ -0,0 +1,150 @@
+"""Automatic re-sign of apps before their 7-day signature expires.
+
+Every `check_interval_s` (and whenever a device attaches) the scheduler walks
+the installed-app index and enqueues a refresh for each app whose refresh time
+has come and whose device is reachable. Refresh times are staggered per device
+by a stable offset so a bench of phones does not all refresh in the same minute.
+
+A refresh that fails (revoked certificate, wrong password...) is retried with
+exponential backoff, and after `max_failures` in a row it is left alone until
+an install of that app on that device succeeds again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+
+from .device_monitor import DeviceEvent
+from .logging_utils import log_exception, log_info
+
+
+def device_offset_s(udid: str, spread_s: float) -> float:
+    """Stable per-device offset in [0, spread_s)."""
+    if spread_s <= 0:
+        return 0.0
+    digest = hashlib.sha256(udid.encode("utf-8", errors="replace")).digest()
+    return (int.from_bytes(digest[:8], "big") / 2**64) * spread_s
+
+
+class RefreshScheduler:
+    def __init__(
+        self,
+        index,
+        monitor,
+        enqueue_fn,
+        is_queued_fn,
+        *,
+        lead_s: float = 48 * 3600,
+        spread_s: float = 12 * 3600,
+        check_interval_s: float = 300.0,
+        failure_backoff_s: float = 1800.0,
+        max_backoff_s: float = 24 * 3600,
+        max_failures: int = 5,
+        clock=time.time,
+    ):
+        """`enqueue_fn(app)` queues a refresh and returns truthy on success;
+        `is_queued_fn(udid, ipa_path)` reports an already queued/running task."""
+        self.index = index
+        self.monitor = monitor
+        self._enqueue_fn = enqueue_fn
+        self._is_queued_fn = is_queued_fn
+        self.lead_s = lead_s
+        # Keep the whole spread inside the lead window so nothing is pushed past expiry.
+        self.spread_s = min(spread_s, lead_s / 2)
+        self.check_interval_s = check_interval_s
+        self.failure_backoff_s = failure_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.max_failures = max(1, int(max_failures))
+        self._failures = {}  # (udid, ipa_path) -> (consecutive failures, last failure time)
+        self._failures_lock = threading.Lock()
+        self._clock = clock
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def refresh_at(self, app) -> float:
+        return app.expires_at - self.lead_s + device_offset_s(app.udid, self.spread_s)
+
+    def note_result(self, udid: str, ipa_path: str, succeeded: bool) -> None:
+        """Record how an install/refresh of `ipa_path` on `udid` ended."""
+        key = (udid, ipa_path)
+        with self._failures_lock:
+            if succeeded:
+                self._failures.pop(key, None)
+                return
+            count, _at = self._failures.get(key, (0, 0.0))
+            self._failures[key] = (count + 1, self._clock())
+        if count + 1 >= self.max_failures:
+            log_info(
+                f"Refresh scheduler: {ipa_path!r} on {udid!r} failed {count + 1} times; "
+                "not retrying until it is installed successfully"
+            )
+
+    def backed_off(self, app, now: float) -> bool:
+        """True while a failed refresh of `app` should not be retried."""
+        with self._failures_lock:
+            count, at = self._failures.get((app.udid, app.ipa_path), (0, 0.0))
+        if count == 0:
+            return False
+        if count >= self.max_failures:
+            return True
+        delay = min(self.max_backoff_s, self.failure_backoff_s * 2 ** (count - 1))
+        return now - at < delay
+
+    def due(self, now: float | None = None) -> list:
+        now = self._clock() if now is None else now
+        due = [app for app in self.index.apps() if now >= self.refresh_at(app)]
+        due.sort(key=lambda app: app.expires_at)
+        return due
+
+    def check(self, now: float | None = None) -> int:
+        """Enqueue refreshes for due apps on reachable devices; returns the count."""
+        now = self._clock() if now is None else now
+        enqueued = 0
+        for app in self.due(now):
+            if not self.monitor.is_attached(app.udid):
+                continue
+            if self.backed_off(app, now):
+                continue
+            if self._is_queued_fn(app.udid, app.ipa_path):
+                continue
+            try:
+                if self._enqueue_fn(app):
+                    enqueued += 1
+                    log_info(
+                        f"Refresh scheduler: queued {app.key!r} on {app.udid!r} (expires {time.ctime(app.expires_at)})"
+                    )
+            except Exception:
+                log_exception(f"Refresh scheduler: failed to queue {app.key!r} on {app.udid!r}")
+        return enqueued
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.monitor.add_listener(self._on_device_event)
+        self._thread = threading.Thread(target=self._run, name="althea-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.monitor.remove_listener(self._on_device_event)
+        self._stop.set()
+        self._wake.set()
+
+    def _on_device_event(self, event: str, device: dict) -> None:
+        if event == DeviceEvent.ATTACHED:
+            self._wake.set()
+
+    def _run(self) -> None:
+        log_info(
+            f"Refresh scheduler started (lead={self.lead_s / 3600:.0f}h spread={self.spread_s / 3600:.1f}h)"
+        )
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception:
+                log_exception("Refresh scheduler check failed")
+            self._wake.wait(self.check_interval_s)
+            self._wake.clear()
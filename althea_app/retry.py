@@ -0,0 +1,157 @@
+"""Install failure classification and retry backoff.
+
+AltServer reports every failure as a "Could not ..." line, whether the cause is
+a transient hiccup (anisette not provisioned yet, lockdownd dropping the
+connection, netmuxd losing a Wi-Fi device) or something retrying cannot fix
+(wrong password, app ID limit reached, broken IPA). The classifier below looks
+at the output stream to tell the two apart.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+
+
+class FailureKind:
+    TRANSIENT = "transient"
+    PERMANENT = "permanent"
+
+
+class Failure:
+    def __init__(self, kind: str, reason: str, line: str = "", service: str | None = None):
+        self.kind = kind
+        self.reason = reason
+        self.line = line
+        # Host service worth restarting before the next attempt:
+        # "anisette" | "lockdownd" | "netmuxd" | None
+        self.service = service
+
+    @property
+    def is_transient(self) -> bool:
+        return self.kind == FailureKind.TRANSIENT
+
+    def __repr__(self) -> str:
+        return f"Failure(kind={self.kind!r}, reason={self.reason!r}, service={self.service!r})"
+
+
+# Ordered: the first matching rule wins, so permanent causes are checked first
+# (e.g. "Could not log in: incorrect password" must not match a network rule).
+_RULES = [
+    (re.compile(r"incorrect|invalid (apple id|username|password)|authentication failed", re.I),
+     FailureKind.PERMANENT, "Apple ID credentials rejected", None),
+    (re.compile(r"account (is |has been )?locked|disabled for security", re.I),
+     FailureKind.PERMANENT, "Apple ID is locked", None),
+    (re.compile(r"maximum number of|limit of \d+|too many (apps|app ids)", re.I),
+     FailureKind.PERMANENT, "Apple ID limit reached", None),
+    (re.compile(r"requires a newer version|minimum ?os|developer mode", re.I),
+     FailureKind.PERMANENT, "Device cannot run this app", None),
+    (re.compile(r"invalid application|info\.plist|not a valid|corrupt|unzip|no such file", re.I),
+     FailureKind.PERMANENT, "IPA could not be read", None),
+    (re.compile(r"anisette|provision|\badi\b|CoreADI", re.I),
+     FailureKind.TRANSIENT, "anisette not ready", "anisette"),
+    (re.compile(r"lockdown|pair(ing)? record|SSL", re.I),
+     FailureKind.TRANSIENT, "lockdownd connection failed", "lockdownd"),
+    (re.compile(r"usbmux|netmux|find device|connect to (the )?device|device (was )?(not found|disconnected)", re.I),
+     FailureKind.TRANSIENT, "device connection dropped", "netmuxd"),
+    (re.compile(r"timed? ?out|connection (was )?(lost|reset|refused)|network|NSURLErrorDomain|temporar", re.I),
+     FailureKind.TRANSIENT, "network error", None),
+]
+
+# Unknown failures are treated as permanent: re-running a multi-minute install
+# that failed for an unrecognised reason rarely helps and just delays the batch.
+_DEFAULT = (FailureKind.PERMANENT, "AltServer failed")
+
+# Lines that report a failure; progress and informational output that happens
+# to mention e.g. "network" or "provisioning" must not decide the verdict.
+_ERROR_LINE = re.compile(r"\berror\b|\bfail(ed|ure)?\b|could not|couldn't|unable to|exception|fatal", re.I)
+
+
+def classify_failure_line(line: str) -> Failure:
+    text = (line or "").strip()
+    for pattern, kind, reason, service in _RULES:
+        if pattern.search(text):
+            return Failure(kind, reason, text, service)
+    kind, reason = _DEFAULT
+    return Failure(kind, reason, text)
+
+
+class FailureClassifier:
+    """Incrementally classify an AltServer run from its output lines."""
+
+    def __init__(self, tail_size: int = 12):
+        self._tail_size = tail_size
+        self.tail = []
+        self.failure = None
+
+    def feed(self, line: str) -> Failure | None:
+        """Record `line`; return a Failure if it marks the run as failed."""
+        text = (line or "").rstrip("\n")
+        self.tail.append(text)
+        if len(self.tail) > self._tail_size:
+            del self.tail[0]
+
+        if "Could not" not in text:
+            return None
+        self.failure = classify_failure_line(text)
+        return self.failure
+
+    def verdict(self, default_reason: str = "AltServer failed") -> Failure:
+        """Best classification for a failed run, from the tail's last error line."""
+        if self.failure is not None:
+            return self.failure
+        errors = [text for text in reversed(self.tail) if _ERROR_LINE.search(text)]
+        for text in errors:
+            failure = classify_failure_line(text)
+            if failure.reason != _DEFAULT[1]:
+                return failure
+        line = errors[0] if errors else (self.tail[-1] if self.tail else "")
+        return Failure(FailureKind.PERMANENT, default_reason, line)
+
+
+class RetryPolicy:
+    """Jittered exponential backoff for transient install failures."""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay_s: float = 5.0,
+        max_delay_s: float = 120.0,
+        restart_services: bool = True,
+        rng: random.Random | None = None,
+    ):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay_s = float(base_delay_s)
+        self.max_delay_s = float(max_delay_s)
+        self.restart_services = restart_services
+        self._rng = rng or random.Random()
+
+    def should_retry(self, failure: Failure | None, attempt: int) -> bool:
+        """`attempt` is the 1-based number of the attempt that just failed."""
+        if failure is None or not failure.is_transient:
+            return False
+        return attempt < self.max_attempts
+
+    def delay_for(self, attempt: int) -> float:
+        """Delay before the attempt following `attempt` (equal jitter)."""
+        ceiling = min(self.max_delay_s, self.base_delay_s * (2 ** max(0, attempt - 1)))
+        return ceiling / 2 + self._rng.uniform(0, ceiling / 2)
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "RetryPolicy":
+        raw = settings.get("retry") if isinstance(settings, dict) else None
+        return cls.from_dict(raw)
+
+    @classmethod
+    def from_dict(cls, raw) -> "RetryPolicy":
+        if not isinstance(raw, dict):
+            return cls()
+        try:
+            return cls(
+                max_attempts=int(raw.get("max_attempts", 3)),
+                base_delay_s=float(raw.get("base_delay_s", 5.0)),
+                max_delay_s=float(raw.get("max_delay_s", 120.0)),
+                restart_services=bool(raw.get("restart_services", True)),
+            )
+        except (TypeError, ValueError):
+            return cls()
@@ -0,0 +1,79 @@
+"""Per-task working directories for AltServer.
+
+Each install runs with its own HOME (holding `.adi` provisioning state) and
+TMPDIR so several AltServer processes can run side by side. HOME is seeded from
+a warmed template; files are reflinked where the filesystem supports it and
+copied otherwise. Hardlinks are not used because AltServer rewrites the ADI
+files in place, which would leak one task's state into the template.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+
+from .app_config import sandbox_template_dir, sandboxes_dir
+from .fs_utils import clone_tree
+from .logging_utils import log_exception, log_info
+
+
+_ADI_DIR = ".adi"
+
+
+def purge_stale_sandboxes() -> None:
+    """Remove sandboxes left behind by a previous (crashed) run."""
+    root = sandboxes_dir()
+    if not os.path.isdir(root):
+        return
+    for entry in os.scandir(root):
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def template_is_warm() -> bool:
+    adi = os.path.join(sandbox_template_dir(), _ADI_DIR)
+    return os.path.isdir(adi) and any(os.scandir(adi))
+
+
+class TaskSandbox:
+    def __init__(self, task_id, root: str | None = None, template: str | None = None):
+        self.path = os.path.join(root or sandboxes_dir(), f"task-{task_id}")
+        self.template = template or sandbox_template_dir()
+        self.home = os.path.join(self.path, "home")
+        self.tmp = os.path.join(self.path, "tmp")
+
+    def create(self) -> "TaskSandbox":
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.tmp, mode=0o700)
+        if os.path.isdir(self.template):
+            clone_tree(self.template, self.home)
+        else:
+            os.makedirs(self.home, mode=0o700)
+        return self
+
+    def env(self, base: dict) -> dict:
+        env = dict(base)
+        env["HOME"] = self.home
+        env["TMPDIR"] = self.tmp
+        env["XDG_CACHE_HOME"] = os.path.join(self.home, ".cache")
+        env["XDG_CONFIG_HOME"] = os.path.join(self.home, ".config")
+        env["XDG_DATA_HOME"] = os.path.join(self.home, ".local", "share")
+        return env
+
+    def promote(self) -> None:
+        """Warm the template from this sandbox's ADI state if it is still cold."""
+        adi = os.path.join(self.home, _ADI_DIR)
+        if template_is_warm() or not os.path.isdir(adi):
+            return
+        staging = f"{self.template}.tmp-{os.getpid()}"
+        try:
+            shutil.rmtree(staging, ignore_errors=True)
+            clone_tree(adi, os.path.join(staging, _ADI_DIR))
+            shutil.rmtree(self.template, ignore_errors=True)
+            os.replace(staging, self.template)
+            log_info(f"Sandbox template warmed from {self.path}")
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            log_exception("Failed to warm sandbox template")
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
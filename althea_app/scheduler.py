@@ -0,0 +1,283 @@
+"""Install queue scheduling policies.
+
+A scheduler decides which pending task runs next. Policies only look at task
+attributes (`status`, `priority`, `deadline`, `not_before`, `udid`,
+`apple_id`) and at the `now` they are given, so they can be exercised with simulated time.
+"""
+
+from __future__ import annotations
+
+import math
+
+from . import metrics
+from .install_tasks import InstallTaskStatus, Priority
+
+
+_account_switches = metrics.counter(
+    "althea_scheduler_account_switches_total", "Task starts that needed a login to a different Apple ID"
+)
+_logins_avoided = metrics.counter(
+    "althea_scheduler_logins_avoided_total",
+    "Task starts that reused a warm Apple ID session where queue order would have switched accounts",
+)
+
+
+def _bundle_id(task) -> str:
+    info = getattr(task, "ipa_info", None)
+    return getattr(info, "bundle_id", "") or ""
+
+
+class InstallScheduler:
+    """Base policy: subclasses override `rank_key`."""
+
+    name = "base"
+    # althea_app.accounts.AccountPool; None disables Apple ID quota checks.
+    accounts = None
+
+    def account_blocker(self, task) -> str | None:
+        """Why the task's Apple ID (or every pooled one) cannot take it now."""
+        if self.accounts is None:
+            return None
+        if not task.apple_id:
+            if self.accounts.pick(_bundle_id(task), task.udid) is None:
+                return "no Apple ID in the pool has quota left"
+            return None
+        return self.accounts.blocker(task.apple_id, _bundle_id(task), task.udid)
+
+    def eligible(self, task, *, running, now: float | None = None) -> bool:
+        if task.status != InstallTaskStatus.PENDING or getattr(task, "blocked", None):
+            return False
+        not_before = getattr(task, "not_before", None)
+        if not_before is not None and now is not None and now < not_before:
+            return False  # backing off before a retry
+        # One install per device at a time. A task without a UDID goes to the
+        # first connected device, so it cannot overlap with anything.
+        if running and not task.udid:
+            return False
+        for other in running:
+            if not other.udid or other.udid == task.udid:
+                return False
+        group = getattr(task, "group", None)
+        if group is not None:
+            active = sum(1 for t in running if getattr(t, "group", None) is group)
+            if active >= group.concurrency:
+                return False
+        if self.account_blocker(task) is not None:
+            return False
+        return True
+
+    def rank_key(self, task, index: int, now: float):
+        return (index,)
+
+    def order(self, tasks, *, now: float, running=()):
+        """Eligible pending tasks, best first."""
+        candidates = [
+            (self.rank_key(t, i, now), i, t)
+            for i, t in enumerate(tasks)
+            if self.eligible(t, running=running, now=now)
+        ]
+        candidates.sort(key=lambda c: (c[0], c[1]))
+        return [t for _key, _i, t in candidates]
+
+    def pick(self, tasks, *, now: float, running=()):
+        ordered = self.order(tasks, now=now, running=running)
+        return ordered[0] if ordered else None
+
+    def on_started(self, task, now: float) -> None:
+        if self.accounts is None:
+            return
+        if not task.apple_id:
+            # Pooled task: bind it to the least-used account with headroom.
+            task.apple_id = self.accounts.pick(_bundle_id(task), task.udid, self.preferred_accounts()) or ""
+            task.password = ""
+        if task.apple_id:
+            self.accounts.acquire(task.apple_id)
+
+    def on_finished(self, task, now: float) -> None:
+        if self.accounts is not None and task.apple_id:
+            self.accounts.release(task.apple_id)
+
+    def preferred_accounts(self) -> tuple:
+        """Apple IDs a pooled task should be bound to if they have headroom."""
+        return ()
+
+
+class FifoScheduler(InstallScheduler):
+    """Queue order only (the original behaviour; ↑/↓ fully control order)."""
+
+    name = "fifo"
+
+
+class PriorityScheduler(InstallScheduler):
+    """Priority classes, deadline urgency and fairness across devices/Apple IDs.
+
+    Ranking, most significant first:
+      1. effective priority class; a task whose deadline is within
+         `urgent_window_s` (or already passed) is promoted to URGENT,
+      2. earliest deadline (tasks without one sort last),
+      3. fairness: how much the task's device and Apple ID have been served
+         recently (decays with `fairness_half_life_s`),
+      4. queue position, so ↑/↓ still orders tasks within a class.
+    """
+
+    name = "priority"
+
+    def __init__(self, urgent_window_s: float = 12 * 3600, fairness_half_life_s: float = 1800):
+        self.urgent_window_s = urgent_window_s
+        self.fairness_half_life_s = fairness_half_life_s
+        self._served = {}  # (kind, key) -> (score, updated_at)
+
+    def effective_priority(self, task, now: float) -> int:
+        priority = Priority.parse(getattr(task, "priority", Priority.NORMAL))
+        deadline = getattr(task, "deadline", None)
+        if deadline is not None and deadline - now <= self.urgent_window_s:
+            return Priority.URGENT
+        return priority
+
+    def _decayed(self, key, now: float) -> float:
+        score, updated_at = self._served.get(key, (0.0, now))
+        if self.fairness_half_life_s <= 0:
+            return score
+        return score * 0.5 ** (max(0.0, now - updated_at) / self.fairness_half_life_s)
+
+    def fairness_score(self, task, now: float) -> float:
+        total = 0.0
+        for key in self._fairness_keys(task):
+            total += self._decayed(key, now)
+        return total
+
+    def _fairness_keys(self, task):
+        keys = []
+        if getattr(task, "udid", None):
+            keys.append(("udid", task.udid))
+        if getattr(task, "apple_id", None):
+            keys.append(("apple_id", task.apple_id))
+        return keys
+
+    def rank_key(self, task, index: int, now: float):
+        deadline = getattr(task, "deadline", None)
+        return (
+            self.effective_priority(task, now),
+            deadline if deadline is not None else math.inf,
+            round(self.fairness_score(task, now), 3),
+            index,
+        )
+
+    def on_started(self, task, now: float) -> None:
+        super().on_started(task, now)
+        for key in self._fairness_keys(task):
+            self._served[key] = (self._decayed(key, now) + 1.0, now)
+
+
+class AccountAffinityScheduler(PriorityScheduler):
+    """Run tasks of the same Apple ID back to back while its session is warm.
+
+    Every AltServer run logs in, and a login to an account that has not been
+    used for a while is likely to trigger a 2FA prompt. Ranking, most
+    significant first:
+      1. effective priority class, as in the priority policy, so a warm
+         cluster never holds back a more important task,
+      2. within a class, tasks for an account with a warm session: currently
+         installing, or used within `session_warm_s`,
+      3. the rest of the priority policy's ranking, which picks the next
+         cluster.
+    Pooled tasks are bound to a warm account when one has headroom.
+
+    `logins_avoided` counts starts where queue order would have switched to
+    a cold account but a warm one was used instead.
+    """
+
+    name = "account"
+
+    def __init__(self, session_warm_s: float = 900, **kwargs):
+        super().__init__(**kwargs)
+        self.session_warm_s = session_warm_s
+        self._last_used = {}  # apple_id -> time of last start/finish
+        self._active = {}  # apple_id -> running tasks
+        self._now = 0.0
+        # Per order()/pick() call: warm accounts and pooled tasks' warmth by
+        # (bundle id, udid), so the pool is asked once per distinct task.
+        self._warm = set()
+        self._pooled_warm = {}
+        self.account_switches = 0
+        self.logins_avoided = 0
+
+    def warm_accounts(self, now: float) -> set:
+        warm = {a for a, n in self._active.items() if n > 0}
+        warm.update(a for a, t in self._last_used.items() if now - t <= self.session_warm_s)
+        return warm
+
+    def preferred_accounts(self) -> tuple:
+        return tuple(self.warm_accounts(self._now))
+
+    def _is_warm(self, task) -> bool:
+        warm = self._warm
+        if task.apple_id:
+            return task.apple_id in warm
+        # Pooled: warm if the pool would hand it a warm account.
+        if self.accounts is None or not warm:
+            return False
+        key = (_bundle_id(task), task.udid)
+        if key not in self._pooled_warm:
+            self._pooled_warm[key] = self.accounts.pick(key[0], key[1], tuple(warm)) in warm
+        return self._pooled_warm[key]
+
+    def rank_key(self, task, index: int, now: float):
+        key = super().rank_key(task, index, now)
+        return key[:1] + (0 if self._is_warm(task) else 1,) + key[1:]
+
+    def order(self, tasks, *, now: float, running=()):
+        self._now = now
+        self._warm = self.warm_accounts(now)
+        self._pooled_warm = {}
+        return super().order(tasks, now=now, running=running)
+
+    def pick(self, tasks, *, now: float, running=()):
+        ordered = self.order(tasks, now=now, running=running)
+        if not ordered:
+            return None
+        chosen = ordered[0]
+        eligible = {id(t) for t in ordered}
+        queue_first = next(t for t in tasks if id(t) in eligible)
+        if queue_first is not chosen and self._is_warm(chosen) and not self._is_warm(queue_first):
+            self.logins_avoided += 1
+            _logins_avoided.inc()
+        return chosen
+
+    def on_started(self, task, now: float) -> None:
+        self._now = now
+        super().on_started(task, now)
+        if not task.apple_id:
+            return
+        if task.apple_id not in self.warm_accounts(now):
+            self.account_switches += 1
+            _account_switches.inc()
+        self._active[task.apple_id] = self._active.get(task.apple_id, 0) + 1
+        self._last_used[task.apple_id] = now
+
+    def on_finished(self, task, now: float) -> None:
+        super().on_finished(task, now)
+        if not task.apple_id:
+            return
+        count = self._active.get(task.apple_id, 0) - 1
+        if count > 0:
+            self._active[task.apple_id] = count
+        else:
+            self._active.pop(task.apple_id, None)
+        self._last_used[task.apple_id] = now
+
+
+SCHEDULERS = {
+    FifoScheduler.name: FifoScheduler,
+    PriorityScheduler.name: PriorityScheduler,
+    AccountAffinityScheduler.name: AccountAffinityScheduler,
+}
+
+
+def register_scheduler(cls) -> None:
+    SCHEDULERS[cls.name] = cls
+
+
+def make_scheduler(name: str | None) -> InstallScheduler:
+    cls = SCHEDULERS.get(name or "", PriorityScheduler)
+    return cls()
@@ -2,15 +2,44 @@
 
 from __future__ import annotations
 
+import http.client
 import os
 import subprocess
-import urllib.request
+import threading
+import time
+import urllib.parse
 
+from . import metrics, tracing
 from .app_config import AltServer, AnisetteServer, Netmuxd, altheapath
 from .logging_utils import log_info
 from .process_utils import is_process_running, kill_process_by_name
 
 
+# Helper processes althea spawned, by name ("anisette-server:6969", "netmuxd",
+# ...), for the resource sampler. Entries whose process has exited are pruned
+# by `supervised`.
+_supervised_lock = threading.Lock()
+_supervised = {}  # name -> subprocess.Popen
+
+
+def supervise(name: str, proc) -> None:
+    with _supervised_lock:
+        _supervised[name] = proc
+
+
+def unsupervise(name: str) -> None:
+    with _supervised_lock:
+        _supervised.pop(name, None)
+
+
+def supervised() -> dict:
+    """{name: pid} of supervised helpers that are still running."""
+    with _supervised_lock:
+        for name in [n for n, p in _supervised.items() if p.poll() is not None]:
+            del _supervised[name]
+        return {name: proc.pid for name, proc in _supervised.items()}
+
+
 def stop_services() -> None:
     for needle in (AltServer, AnisetteServer, Netmuxd):
         try:
@@ -19,16 +48,94 @@ def stop_services() -> None:
             pass
 
 
-def is_anisette_accessible(timeout: float = 0.75) -> bool:
+ANISETTE_HOST = "127.0.0.1"
+ANISETTE_PORT = 6969
+ANISETTE_URL = f"http://{ANISETTE_HOST}:{ANISETTE_PORT}"
+
+
+_anisette_latency = metrics.histogram(
+    "althea_anisette_probe_seconds", "anisette-server response time per probe"
+)
+_anisette_failures = metrics.counter(
+    "althea_anisette_probe_failures_total", "anisette-server probes that failed"
+)
+_netmuxd_latency = metrics.histogram("althea_netmuxd_probe_seconds", "netmuxd response time per probe")
+_netmuxd_failures = metrics.counter("althea_netmuxd_probe_failures_total", "netmuxd probes that failed")
+_usbmuxd_latency = metrics.histogram("althea_usbmuxd_probe_seconds", "usbmuxd response time per probe")
+_usbmuxd_failures = metrics.counter("althea_usbmuxd_probe_failures_total", "usbmuxd probes that failed")
+_restarts = metrics.counter("althea_service_restarts_total", "Service restarts requested, by service")
+
+# Idle keep-alive connections per (host, port), reused across probes.
+_http_pool_lock = threading.Lock()
+_http_pool = {}
+_last_probe = {}  # url -> monotonic time of the last successful probe
+
+
+def _http_get(url: str, timeout: float) -> bytes:
+    parts = urllib.parse.urlsplit(url)
+    key = (parts.hostname or "127.0.0.1", parts.port or 80)
+    path = parts.path or "/"
+
+    for attempt in range(2):
+        with _http_pool_lock:
+            idle = _http_pool.get(key)
+            conn = idle.pop() if idle else None
+        reused = conn is not None
+        if conn is None:
+            conn = http.client.HTTPConnection(key[0], key[1], timeout=timeout)
+        else:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+        try:
+            conn.request("GET", path, headers={"Connection": "keep-alive"})
+            resp = conn.getresponse()
+            data = resp.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if reused and attempt == 0:
+                # The server may have dropped an idle keep-alive connection.
+                continue
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            with _http_pool_lock:
+                _http_pool.setdefault(key, []).append(conn)
+        return data
+    raise OSError(f"GET {url} failed")
+
+
+@tracing.traced(cat="probe")
+def probe_anisette(url: str = ANISETTE_URL, timeout: float = 0.75) -> float | None:
+    """Return the anisette response time in seconds, or None if unreachable."""
+    started = time.monotonic()
     try:
-        with urllib.request.urlopen("http://127.0.0.1:6969", timeout=timeout) as resp:
-            data = resp.read(2048)
-        return b"{" in data
+        data = _http_get(url, timeout)
     except Exception:
-        return False
+        _anisette_failures.inc(url=url)
+        return None
+    if b"{" not in data:
+        _anisette_failures.inc(url=url)
+        return None
+    elapsed = time.monotonic() - started
+    _anisette_latency.observe(elapsed, url=url)
+    _last_probe[url] = time.monotonic()
+    return elapsed
+
+
+def seconds_since_anisette_probe(url: str = ANISETTE_URL) -> float:
+    last = _last_probe.get(url)
+    return float("inf") if last is None else time.monotonic() - last
+
+
+def is_anisette_accessible(timeout: float = 0.75, url: str = ANISETTE_URL) -> bool:
+    return probe_anisette(url, timeout=timeout) is not None
 
 
+@tracing.traced(cat="probe")
 def is_netmuxd_ready(timeout: float = 0.5) -> bool:
+    started = time.monotonic()
     try:
         env = os.environ.copy()
         env["USBMUXD_SOCKET_ADDRESS"] = "127.0.0.1:27015"
@@ -40,9 +147,14 @@ def is_netmuxd_ready(timeout: float = 0.5) -> bool:
             timeout=timeout,
             check=False,
         )
-        return proc.returncode == 0
+        ok = proc.returncode == 0
     except Exception:
-        return False
+        ok = False
+    if ok:
+        _netmuxd_latency.observe(time.monotonic() - started)
+    else:
+        _netmuxd_failures.inc()
+    return ok
 
 
 def is_altserver_running() -> bool:
@@ -50,21 +162,53 @@ def is_altserver_running() -> bool:
     return is_process_running(AltServer)
 
 
-def start_anisette_server() -> None:
-    if is_anisette_accessible(timeout=0.5):
+def stop_primary_anisette() -> None:
+    """Stop the anisette-server on ANISETTE_PORT; anisette pool instances keep running."""
+    with _supervised_lock:
+        proc = _supervised.pop(f"anisette-server:{ANISETTE_PORT}", None)
+    if proc is not None:
+        try:
+            proc.kill()
+            proc.wait(timeout=3)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
         return
+    # Not started by this instance (e.g. left over from an earlier run): match
+    # the primary's exact command line, which pool instances do not share.
     try:
-        kill_process_by_name(AnisetteServer)
+        kill_process_by_name(f"{AnisetteServer} -n {ANISETTE_HOST} -p {ANISETTE_PORT}")
     except Exception:
         pass
+
+
+@tracing.traced(cat="service")
+def start_anisette_server() -> None:
+    if is_anisette_accessible(timeout=0.5):
+        return
+    stop_primary_anisette()
     log_info("Starting anisette-server")
-    subprocess.Popen(
-        [AnisetteServer, "-n", "127.0.0.1", "-p", "6969"],
+    proc = subprocess.Popen(
+        [AnisetteServer, "-n", ANISETTE_HOST, "-p", str(ANISETTE_PORT)],
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL,
     )
+    supervise(f"anisette-server:{ANISETTE_PORT}", proc)
 
 
+@tracing.traced(cat="service")
+def spawn_anisette_server(port: int, adi_path: str | None = None) -> subprocess.Popen:
+    """Start an additional anisette-server instance (used by the anisette pool)."""
+    args = [AnisetteServer, "-n", ANISETTE_HOST, "-p", str(port)]
+    if adi_path:
+        os.makedirs(adi_path, exist_ok=True)
+        args += ["--adi-path", adi_path]
+    log_info(f"Starting anisette-server on port {port}")
+    proc = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    supervise(f"anisette-server:{port}", proc)
+    return proc
+
+
+@tracing.traced(cat="service")
 def start_netmuxd() -> None:
     if is_netmuxd_ready(timeout=0.25):
         return
@@ -73,13 +217,15 @@ def start_netmuxd() -> None:
     except Exception:
         pass
     log_info("Starting netmuxd")
-    subprocess.Popen(
+    proc = subprocess.Popen(
         [Netmuxd, "--disable-unix", "--host", "127.0.0.1"],
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL,
     )
+    supervise("netmuxd", proc)
 
 
+@tracing.traced(cat="service")
 def start_altserver() -> None:
     if is_altserver_running():
         return
@@ -103,26 +249,30 @@ def start_altserver() -> None:
         env["USBMUXD_SOCKET_ADDRESS"] = "127.0.0.1:27015"
         log_info("AltServer env: using netmuxd socket (no USB devices)")
 
-    subprocess.Popen(
+    proc = subprocess.Popen(
         [os.path.join(altheapath, "AltServer")],
         env=env,
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL,
     )
+    supervise("AltServer", proc)
 
 
 def restart_anisette_server() -> None:
     log_info("Restart anisette-server requested")
+    _restarts.inc(service="anisette")
     start_anisette_server()
 
 
 def restart_netmuxd() -> None:
     log_info("Restart netmuxd requested")
+    _restarts.inc(service="netmuxd")
     start_netmuxd()
 
 
 def restart_altserver_process() -> None:
     log_info("Restart AltServer requested")
+    _restarts.inc(service="altserver")
     try:
         kill_process_by_name(AltServer)
     except Exception:
@@ -130,8 +280,10 @@ def restart_altserver_process() -> None:
     start_altserver()
 
 
+@tracing.traced(cat="probe")
 def _is_usbmuxd_responsive(timeout_s: float = 2.0) -> bool:
     """Best-effort probe that usbmuxd is responding."""
+    started = time.monotonic()
     try:
         proc = subprocess.run(
             ["idevice_id", "-l"],
@@ -140,14 +292,21 @@ def _is_usbmuxd_responsive(timeout_s: float = 2.0) -> bool:
             timeout=timeout_s,
             check=False,
         )
-        return proc.returncode == 0
+        ok = proc.returncode == 0
     except Exception:
-        return False
+        ok = False
+    if ok:
+        _usbmuxd_latency.observe(time.monotonic() - started)
+    else:
+        _usbmuxd_failures.inc()
+    return ok
 
 
+@tracing.traced(cat="service")
 def restart_lockdownd_service() -> None:
     """Restart host-side services involved in lockdownd communication."""
     log_info("Restart lockdownd requested")
+    _restarts.inc(service="lockdownd")
 
     units = ["lockdownd", "usbmuxd"]
     last_out = ""
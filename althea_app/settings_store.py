@@ -12,6 +12,64 @@ DEFAULT_SETTINGS = {
     # "window_and_tray" (default): open main window + tray indicator
     # "tray_only": start in tray (no main window)
     "startup_mode": "window_and_tray",
+    # Install queue policy: "priority" (priority/deadline/fairness), "account"
+    # (priority, but Apple ID clusters run back to back) or "fifo".
+    "scheduler": "priority",
+    # Installs running at once (one per device at most); raise it to install
+    # on several attached devices in parallel.
+    "max_parallel_installs": 1,
+    # Devices a fan-out ("Install on all devices") installs to at once; its
+    # subtasks may use this many lanes on top of max_parallel_installs.
+    "fanout_concurrency": 3,
+    # Background priority for AltServer runs (see althea_app.governor); the
+    # install cap above shrinks while the host load average is high.
+    "resource_governor": {
+        "nice": 10,
+        "ionice_idle": False,
+        "cpu_weight": 20,
+        "cgroup": True,
+        "adaptive_cap": True,
+    },
+    # anisette-server instances on consecutive ports from 6969.
+    "anisette_pool_max": 3,
+    "anisette_tasks_per_instance": 2,
+    # Re-sign apps installed through althea before the 7-day expiry.
+    "auto_refresh": True,
+    "refresh_lead_hours": 48,
+    "refresh_spread_hours": 12,
+    # Free Apple ID limits enforced for pooled accounts (see althea_app.accounts).
+    "account_pool": {
+        "app_ids_per_week": 10,
+        "active_apps_per_device": 3,
+        "max_concurrent_logins": 1,
+    },
+    # Seconds a verification code is reused for further logins of the same
+    # Apple ID without asking again (0 = always ask).
+    "reuse_2fa_code_s": 0,
+    # Directories whose new IPAs are installed automatically, e.g.
+    # [{"path": "/mnt/ci/nightly", "udids": "all"}] (uses the saved Apple ID).
+    "watch_folders": [],
+    # Helper process sampling (CPU, RSS, fds; see althea_app.proc_sampler) and
+    # the steady RSS growth over the sample window that triggers a leak alert.
+    "process_sample_interval_s": 10,
+    "rss_growth_alert_mb": 64,
+    # Serve Prometheus metrics on http://127.0.0.1:<port>/metrics (0 = off).
+    "metrics_port": 0,
+    # Log the main thread's stack when the GTK loop is blocked this long (0 = off).
+    "stall_warn_s": 1.0,
+    # Length of a CPU profile started from Settings > Developer or over IPC.
+    "profile_seconds": 30,
+    # Size cap of the local IPA staging cache (least recently used evicted first).
+    "ipa_cache_max_mb": 4096,
+    # Skip (or downgrade to a refresh) installs of a build the device already has.
+    "skip_installed": True,
+    # Automatic retry of transient install failures (see althea_app.retry).
+    "retry": {
+        "max_attempts": 3,
+        "base_delay_s": 5.0,
+        "max_delay_s": 120.0,
+        "restart_services": True,
+    },
 }
 
 
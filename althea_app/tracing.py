@@ -0,0 +1,167 @@
+"""Span recorder writing Chrome Trace Event JSON (open it in Perfetto).
+
+Tracing is off unless ALTHEA_TRACE is set: "1" writes
+traces/althea-<pid>-<timestamp>.json in altheapath at exit, any other value is
+taken as the output path. When it is off, `span` returns one shared no-op
+object and `traced` returns the function unchanged, so instrumented code pays
+an attribute lookup and a call at most.
+
+    with tracing.span("download", cat="startup", name=name):
+        ...
+
+    @tracing.traced(cat="probe")
+    def probe(): ...
+"""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+from .app_config import traces_dir
+from .logging_utils import log_info
+
+
+_setting = os.environ.get("ALTHEA_TRACE", "").strip()
+ENABLED = _setting not in ("", "0")
+
+_events = []  # list.append is atomic; no lock on the recording path
+_thread_names = {}
+_pid = os.getpid()
+_origin_ns = time.perf_counter_ns()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+    def set(self, **_args) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "_start")
+
+    def __init__(self, name: str, cat: str, args: dict):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, _exc, _tb):
+        end = time.perf_counter_ns()
+        thread = threading.current_thread()
+        _thread_names.setdefault(thread.ident, thread.name)
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        event = {
+            "name": self.name,
+            "cat": self.cat,
+            "ph": "X",
+            "ts": (self._start - _origin_ns) / 1000,
+            "dur": (end - self._start) / 1000,
+            "pid": _pid,
+            "tid": thread.ident,
+        }
+        if self.args:
+            event["args"] = {k: str(v) for k, v in self.args.items()}
+        _events.append(event)
+        return False
+
+    def set(self, **args) -> None:
+        """Attach results known only inside the span (e.g. a status code)."""
+        self.args.update(args)
+
+
+def span(name: str, cat: str = "althea", **args):
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, cat, args)
+
+
+def traced(name: str | None = None, cat: str = "althea"):
+    """Decorator recording each call as a span (named after the function by default)."""
+
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(label, cat, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def instant(name: str, cat: str = "althea", **args) -> None:
+    """A point-in-time marker (e.g. "main window shown")."""
+    if not ENABLED:
+        return
+    thread = threading.current_thread()
+    _thread_names.setdefault(thread.ident, thread.name)
+    _events.append(
+        {
+            "name": name,
+            "cat": cat,
+            "ph": "i",
+            "s": "t",
+            "ts": (time.perf_counter_ns() - _origin_ns) / 1000,
+            "pid": _pid,
+            "tid": thread.ident,
+            "args": {k: str(v) for k, v in args.items()},
+        }
+    )
+
+
+def trace_path() -> str:
+    if _setting not in ("1", "true", "yes"):
+        return os.path.abspath(os.path.expanduser(_setting))
+    return os.path.join(traces_dir(), f"althea-{_pid}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+
+def flush(path: str | None = None) -> str | None:
+    """Write everything recorded so far; returns the file written."""
+    if not ENABLED:
+        return None
+    path = path or trace_path()
+    meta = [
+        {"name": "thread_name", "ph": "M", "pid": _pid, "tid": tid, "args": {"name": tname}}
+        for tid, tname in list(_thread_names.items())
+    ]
+    meta.append({"name": "process_name", "ph": "M", "pid": _pid, "tid": 0, "args": {"name": "althea"}})
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": meta + list(_events), "displayTimeUnit": "ms"}, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _flush_at_exit() -> None:
+    try:
+        path = flush()
+    except OSError:
+        return
+    if path:
+        log_info(f"Trace written to {path}")
+
+
+if ENABLED:
+    atexit.register(_flush_at_exit)
@@ -0,0 +1,177 @@
+"""Watch folders: auto-enqueue IPAs that land in configured directories.
+
+Each folder is monitored with Gio.FileMonitor (inotify on local filesystems),
+so nothing is polled while the folder is idle. A new or changed `*.ipa` is
+debounced until its size and mtime stop changing and the archive opens as an
+IPA, then handed to `on_ready(path, folder)` once per build. `on_ready`
+returns None when it could not queue the build (e.g. no saved Apple ID yet);
+the build is then offered again after `retry_s`.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+
+from .gi import Gio, GLib
+from .ipa_info import get_ipa_info
+from .logging_utils import log_exception, log_info
+
+
+class WatchFolder:
+    def __init__(self, path: str, udids="all"):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        # "all" (every attached device) or a list of UDIDs.
+        self.udids = udids if udids == "all" else [str(u) for u in (udids or []) if u]
+
+    @classmethod
+    def from_setting(cls, raw) -> "WatchFolder | None":
+        if isinstance(raw, str):
+            return cls(raw)
+        if isinstance(raw, dict) and raw.get("path"):
+            return cls(str(raw["path"]), raw.get("udids", "all"))
+        return None
+
+    def to_setting(self) -> dict:
+        return {"path": self.path, "udids": self.udids}
+
+
+_EVENTS = (
+    Gio.FileMonitorEvent.CREATED,
+    Gio.FileMonitorEvent.CHANGED,
+    Gio.FileMonitorEvent.CHANGES_DONE_HINT,
+    Gio.FileMonitorEvent.MOVED_IN,
+    Gio.FileMonitorEvent.RENAMED,
+)
+
+
+class WatchFolderManager:
+    """Owns the Gio monitors; must be used from the GLib main loop."""
+
+    def __init__(self, on_ready, settle_s: float = 2.0, retry_s: float = 60.0):
+        self._on_ready = on_ready
+        self.settle_s = settle_s
+        self.retry_s = retry_s
+        self._folders = {}  # path -> (WatchFolder, Gio.FileMonitor)
+        self._pending = {}  # ipa path -> [folder, timeout source id, last (mtime_ns, size)]
+        self._seen = set()  # (path, mtime_ns, size) already handed to on_ready
+
+    def folders(self) -> list:
+        return [folder for folder, _monitor in self._folders.values()]
+
+    def configure(self, folders) -> None:
+        """Replace the watched set with `folders` (WatchFolder instances)."""
+        wanted = {f.path: f for f in folders}
+        for path in list(self._folders):
+            if path not in wanted:
+                self._unwatch(path)
+        for path, folder in wanted.items():
+            if path in self._folders:
+                self._folders[path] = (folder, self._folders[path][1])
+            else:
+                self._watch(folder)
+
+    def stop(self) -> None:
+        for path in list(self._folders):
+            self._unwatch(path)
+        for entry in self._pending.values():
+            GLib.source_remove(entry[1])
+        self._pending.clear()
+
+    def _watch(self, folder: WatchFolder) -> None:
+        if not os.path.isdir(folder.path):
+            log_info(f"Watch folder {folder.path!r} does not exist; not watching")
+            return
+        try:
+            monitor = Gio.File.new_for_path(folder.path).monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None
+            )
+        except GLib.Error:
+            log_exception(f"Watch folder {folder.path!r}: cannot monitor")
+            return
+        monitor.connect("changed", self._on_changed, folder.path)
+        self._folders[folder.path] = (folder, monitor)
+        log_info(f"Watching {folder.path!r} for IPAs (devices: {folder.udids})")
+
+    def _unwatch(self, path: str) -> None:
+        _folder, monitor = self._folders.pop(path)
+        monitor.cancel()
+
+    def _on_changed(self, _monitor, file, other_file, event, folder_path):
+        if event not in _EVENTS:
+            return
+        if event == Gio.FileMonitorEvent.RENAMED and other_file is not None:
+            file = other_file  # e.g. "build.ipa.part" -> "build.ipa"
+        path = file.get_path()
+        if not path or not path.lower().endswith(".ipa") or folder_path not in self._folders:
+            return
+        self._schedule(path, folder_path, self.settle_s)
+
+    def _schedule(self, path: str, folder_path: str, delay_s: float) -> None:
+        entry = self._pending.get(path)
+        if entry is not None:
+            GLib.source_remove(entry[1])
+        else:
+            entry = [self._folders[folder_path][0], 0, None]
+            self._pending[path] = entry
+        # Any write restarts the quiet period.
+        entry[2] = None
+        entry[1] = GLib.timeout_add(int(delay_s * 1000), self._settle, path)
+
+    def _settle(self, path: str) -> bool:
+        entry = self._pending.get(path)
+        if entry is None:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._pending.pop(path, None)
+            return False
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp != entry[2]:
+            # Still growing (or first look): check again after another quiet period.
+            entry[2] = stamp
+            return True
+        self._pending.pop(path, None)
+        key = (path, *stamp)
+        self._prune_seen()
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        threading.Thread(target=self._validate, args=(path, entry[0], key), daemon=True).start()
+        return False
+
+    def _prune_seen(self) -> None:
+        """Forget builds that were deleted or overwritten since delivery."""
+        for key in list(self._seen):
+            try:
+                st = os.stat(key[0])
+            except OSError:
+                self._seen.discard(key)
+                continue
+            if (st.st_mtime_ns, st.st_size) != key[1:]:
+                self._seen.discard(key)
+
+    def _validate(self, path: str, folder: WatchFolder, key) -> None:
+        if get_ipa_info(path) is None:
+            # Not a complete IPA yet (or not an IPA at all); a later write retries.
+            log_info(f"Watch folder: {path!r} is not a valid IPA; ignoring for now")
+            GLib.idle_add(self._seen.discard, key)
+            return
+        log_info(f"Watch folder: new IPA {path!r}")
+        GLib.idle_add(self._deliver, path, folder, key)
+
+    def _deliver(self, path: str, folder: WatchFolder, key) -> bool:
+        queued = None
+        try:
+            queued = self._on_ready(path, folder)
+        except Exception:
+            log_exception(f"Watch folder: enqueueing {path!r} failed")
+        if queued is None:
+            # Nothing was queued: forget the build and offer it again later.
+            self._seen.discard(key)
+            if folder.path in self._folders:
+                log_info(f"Watch folder: {path!r} not queued; retrying in {self.retry_s:.0f}s")
+                self._schedule(path, folder.path, self.retry_s)
+                self._pending[path][2] = key[1:]  # unchanged by then: deliver at once
+        return False
@@ -1,6 +1,7 @@
 #!/usr/bin/python
 import sys
 import os
+import argparse
 import errno
 from shutil import rmtree
 import urllib.request
@@ -8,6 +9,7 @@ from urllib.request import urlopen
 import requests
 import subprocess
 import threading
+import contextlib
 import keyring
 import re
 import time
@@ -33,22 +35,34 @@ from althea_app.app_config import (
     is_installed,
     altheapath,
     AltServer,
-    AnisetteServer,
     Netmuxd,
     AltStore,
     AutoStart,
     log_path as _log_path,
 )
+from althea_app import metrics, tracing
 from althea_app.settings_store import load_settings, save_settings
 from althea_app.logging_utils import setup_logging, log_info, log_exception
-from althea_app.device_utils import get_connected_device, get_connected_udid, get_network_udid
-from althea_app.process_utils import is_process_running, kill_process_by_name
+from althea_app.device_utils import (
+    get_connected_device,
+    get_connected_udid,
+    get_network_udid,
+    find_device,
+)
+from althea_app.process_utils import (
+    is_process_running,
+    kill_process_by_name,
+    terminate_process_group,
+    terminate_process_group_async,
+)
 from althea_app.services import (
     stop_services,
+    ANISETTE_URL,
     is_anisette_accessible,
     is_netmuxd_ready,
     is_altserver_running,
     start_anisette_server,
+    stop_primary_anisette,
     start_netmuxd,
     start_altserver,
     restart_anisette_server,
@@ -56,7 +70,37 @@ from althea_app.services import (
     restart_altserver_process,
     _is_usbmuxd_responsive,
     restart_lockdownd_service,
+    supervise,
+    supervised,
+    unsupervise,
 )
+from althea_app.retry import FailureClassifier, RetryPolicy
+from althea_app.install_tasks import InstallTask, InstallTaskStatus, Priority, TaskKind
+from althea_app.scheduler import make_scheduler
+from althea_app.install_queue import InstallQueue
+from althea_app.device_monitor import DeviceEvent, DeviceMonitor
+from althea_app.app_index import FREE_ACCOUNT_VALIDITY_S, InstalledAppIndex, file_sha256
+from althea_app.ipa_cache import IpaCache
+from althea_app.governor import ResourceGovernor
+from althea_app.proc_sampler import ProcessSampler
+from althea_app.metrics_server import MetricsServer
+from althea_app.heartbeat import MainLoopHeartbeat, StallWatchdog
+from althea_app.profiling import Profiler
+from althea_app.device_apps import DeviceAppInventory, InstallDecision, decide_install
+from althea_app.refresh_scheduler import RefreshScheduler
+from althea_app.fanout import FanoutGroup
+from althea_app.ipa_info import ICON_SIZE, InvalidIPAError, get_ipa_info
+from althea_app.sandbox import TaskSandbox, purge_stale_sandboxes
+from althea_app.anisette_pool import AnisettePool
+from althea_app.anisette_warmer import AnisetteWarmer
+from althea_app.preflight import PreflightRunner
+from althea_app.credentials import SAVED_SERVICE, CredentialStore
+from althea_app.accounts import ACCOUNT_KEYRING_SERVICE, AccountPool
+from althea_app.manifest import ManifestError, load_manifest
+from althea_app.ipc import IpcServer, send_command
+from althea_app.prompts import PromptBroker, PromptKind
+from althea_app.watch_folders import WatchFolder, WatchFolderManager
+from althea_app.device_utils import list_devices
 
 
 # Global variables
@@ -114,6 +158,8 @@ def menu():
         ("View Logs", lambda x: openwindow(LogWindow)),
         ("Install AltStore", altstoreinstall),
         ("Install an IPA file", altserverfile),
+        ("Install an IPA on all devices", altserverfile_all),
+        ("Load install manifest…", load_manifest_dialog),
         ("Pair", lambda x: openwindow(PairWindow)),
         ("Main Window", lambda x: openwindow(MainWindow)),
         ("Restart AltServer", restart_altserver),
@@ -276,6 +322,16 @@ def altserverfile(_):
             ipa_path_exists = False
 
 
+def altserverfile_all(_):
+    win2 = FileChooserWindow()
+    global ipa_path_exists
+    if ipa_path_exists == True:
+        global PATH
+        PATH = win2.PATHFILE
+        win1(targets="all")
+        ipa_path_exists = False
+
+
 def notify():
     if (connectioncheck()) == True:
         LatestVersion = (
@@ -302,6 +358,20 @@ def notify():
         return False
 
 
+def _notify_rss_growth(name, growth):
+    try:
+        Notify.init("althea")
+        n = Notify.Notification.new(
+            f"{name} keeps growing",
+            f"Its memory grew by {growth / (1024 * 1024):.0f} MB and is still rising. Restarting it from Settings frees it.",
+            resource_path("resources/3.png"),
+        )
+        n.show()
+    except Exception as e:
+        log_info(f"Leak notification failed: {e!r}")
+    return False
+
+
 def showurl(_):
     Gtk.show_uri_on_window(
         None, "https://github.com/vyvir/althea/releases", Gdk.CURRENT_TIME
@@ -316,6 +386,12 @@ def openwindow(window):
 
 def quitit():
     log_info("Quit requested")
+    if ipc_server is not None:
+        ipc_server.stop()
+    if process_sampler is not None:
+        process_sampler.stop()
+    if metrics_server is not None:
+        metrics_server.stop()
     stop_services()
     Gtk.main_quit()
 
@@ -340,25 +416,46 @@ def restart_altserver(_):
     )
 
 
-class InstallTaskStatus:
-    PENDING = "Pending"
-    INSTALLING = "Installing"
-    SUCCEEDED = "Succeeded"
-    FAILED = "Failed"
-    CANCELED = "Canceled"
+def _task_title(task) -> str:
+    info = task.ipa_info
+    if info is None:
+        return os.path.basename(str(task.ipa_path))
+    title = f"{info.name} {info.display_version}".strip()
+    return f"{title} — {info.bundle_id}" if info.bundle_id else title
 
 
-class InstallTask:
-    def __init__(self, ipa_path: str, apple_id: str, password: str):
-        self.ipa_path = ipa_path
-        self.apple_id = apple_id
-        self.password = password
-        self.created_at = time.time()
-        self.status = InstallTaskStatus.PENDING
-        self.progress = None  # float in [0,1] or None
-        self.detail = ""
-        self._proc = None
-        self._cancel_requested = False
+def _pixbuf_from_png(data: bytes, size: int):
+    try:
+        loader = GdkPixbuf.PixbufLoader.new_with_type("png")
+        loader.set_size(size, size)
+        loader.write(data)
+        loader.close()
+        return loader.get_pixbuf()
+    except Exception:
+        return None
+
+
+def _task_meta(task) -> str:
+    parts = []
+    if task.kind == TaskKind.REFRESH:
+        parts.append("Refresh")
+    if task.priority != Priority.NORMAL:
+        parts.append(Priority.name(task.priority))
+    if task.udid:
+        parts.append(task.udid[:8])
+    if task.deadline is not None and task.status == InstallTaskStatus.PENDING:
+        remaining = task.deadline - time.time()
+        if remaining <= 0:
+            parts.append("overdue")
+        elif remaining < 3600:
+            parts.append(f"due in {int(remaining // 60)}m")
+        else:
+            parts.append(f"due in {remaining / 3600:.1f}h")
+    if task.status == InstallTaskStatus.INSTALLING:
+        usage = resource_governor.last_usage(task.id)
+        if usage is not None:
+            parts.append(f"CPU {usage[0]:.0f}% · {usage[1] / (1024 * 1024):.0f} MB")
+    return " · ".join(parts)
 
 
 class InstallQueueWindow(Handy.Window):
@@ -387,12 +484,52 @@ class InstallQueueWindow(Handy.Window):
         self.scrolled.set_vexpand(True)
         self.vbox.pack_start(self.scrolled, True, True, 0)
 
+        self.groups_lbl = Gtk.Label(label="")
+        self.groups_lbl.set_xalign(0)
+        self.groups_lbl.set_line_wrap(True)
+        self.vbox.pack_start(self.groups_lbl, False, False, 0)
+        self.vbox.reorder_child(self.groups_lbl, 1)
+
         self.listbox = Gtk.ListBox()
         self.listbox.set_selection_mode(Gtk.SelectionMode.NONE)
         self.scrolled.add(self.listbox)
 
         self._rows_by_task = {}
         self.refresh()
+        self._usage_source_id = GLib.timeout_add_seconds(2, self._update_usage)
+        self.connect("destroy", self._on_destroy)
+
+    def _on_destroy(self, *_args):
+        if self._usage_source_id:
+            GLib.source_remove(self._usage_source_id)
+            self._usage_source_id = None
+
+    def _update_usage(self):
+        # Sampling is a few /proc reads per running install; do it off the GTK thread.
+        def _sample():
+            try:
+                resource_governor.usage()
+            except Exception:
+                log_exception("Install resource usage unavailable")
+                return
+            GLib.idle_add(self._redraw_running)
+
+        if any(t.status == InstallTaskStatus.INSTALLING for t in self.manager.snapshot()):
+            threading.Thread(target=_sample, daemon=True).start()
+        return True
+
+    def _redraw_running(self):
+        for task in self.manager.snapshot():
+            if task.status == InstallTaskStatus.INSTALLING:
+                row = self._rows_by_task.get(id(task))
+                if row is not None:
+                    row._althea_update_from_task(task)
+        return False
+
+    def _update_groups(self):
+        lines = [f"Fan-out {g.summary()}" for g in self.manager.groups()]
+        self.groups_lbl.set_text("\n".join(lines))
+        self.groups_lbl.set_visible(bool(lines))
 
     def refresh(self):
         # Full redraw is simplest and reliable.
@@ -406,6 +543,7 @@ class InstallQueueWindow(Handy.Window):
             self._rows_by_task[id(task)] = row
             self.listbox.add(row)
         self.show_all()
+        self._update_groups()
 
     def update_task(self, task):
         # Called from GTK main loop.
@@ -415,6 +553,8 @@ class InstallQueueWindow(Handy.Window):
             self.refresh()
             return
         row._althea_update_from_task(task)
+        if task.group is not None:
+            self._update_groups()
 
     def _make_row(self, task, idx: int):
         row = Gtk.ListBoxRow()
@@ -424,10 +564,14 @@ class InstallQueueWindow(Handy.Window):
         top = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
         outer.pack_start(top, False, False, 0)
 
+        icon_img = Gtk.Image.new_from_icon_name("application-x-executable", Gtk.IconSize.DND)
+        top.pack_start(icon_img, False, False, 0)
+        icon_state = {"path": None}
+
         title_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
         top.pack_start(title_box, True, True, 0)
 
-        name = os.path.basename(str(task.ipa_path))
+        name = _task_title(task)
         title_lbl = Gtk.Label(label=name)
         title_lbl.set_xalign(0)
         title_lbl.set_ellipsize(Pango.EllipsizeMode.MIDDLE)
@@ -474,9 +618,17 @@ class InstallQueueWindow(Handy.Window):
         cancel_btn.connect("clicked", _on_cancel)
 
         def _update(task_obj):
-            title = os.path.basename(str(task_obj.ipa_path))
-            title_lbl.set_text(title)
+            title_lbl.set_text(_task_title(task_obj))
+            info = task_obj.ipa_info
+            if info is not None and info.icon_png and icon_state["path"] != info.path:
+                pixbuf = _pixbuf_from_png(info.icon_png, 32)
+                if pixbuf is not None:
+                    icon_img.set_from_pixbuf(pixbuf)
+                    icon_state["path"] = info.path
             subtitle = task_obj.status
+            meta = _task_meta(task_obj)
+            if meta:
+                subtitle = f"{subtitle} · {meta}"
             if task_obj.detail:
                 subtitle = f"{subtitle} — {task_obj.detail}"
             subtitle_lbl.set_text(subtitle)
@@ -497,19 +649,73 @@ class InstallQueueWindow(Handy.Window):
                 current_idx = idx
             up_btn.set_sensitive(is_pending and current_idx > 0)
             down_btn.set_sensitive(is_pending)
-            cancel_btn.set_sensitive(is_pending or is_installing)
+            is_waiting = task_obj.status == InstallTaskStatus.WAITING
+            cancel_btn.set_sensitive(is_pending or is_waiting or is_installing)
 
         row._althea_update_from_task = _update
         row._althea_update_from_task(task)
         return row
 
 
-class InstallQueueManager:
-    def __init__(self):
-        self._lock = threading.Lock()
-        self._tasks = []
-        self._current = None
+_install_phase_seconds = metrics.histogram(
+    "althea_install_phase_seconds",
+    "Time install tasks spend per phase (queued, stage, device, anisette, altserver, total)",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0),
+)
+_install_tasks_finished = metrics.counter("althea_install_tasks_finished_total", "Install tasks that ended, by status")
+
+
+class InstallQueueManager(InstallQueue):
+    def __init__(self, scheduler=None, clock=time.time, altserver_path=None):
+        super().__init__(scheduler=scheduler, clock=clock)
         self._window = None
+        self.altserver_path = altserver_path or AltServer
+        self._preflight = None
+
+    # -- InstallQueue hooks -------------------------------------------------------
+
+    def _make_scheduler(self):
+        return make_scheduler(SETTINGS.get("scheduler"))
+
+    @property
+    def max_parallel(self) -> int:
+        try:
+            configured = max(1, int(SETTINGS.get("max_parallel_installs", 1)))
+        except (TypeError, ValueError):
+            return 1
+        return resource_governor.cap(configured, running=len(self._running))
+
+    def _launch(self, task: InstallTask):
+        threading.Thread(target=self._run_task, args=(task,), daemon=True).start()
+
+    def _terminate(self, proc):
+        terminate_process_group_async(proc)
+
+    def _notify(self, task: InstallTask):
+        GLib.idle_add(lambda: self._notify_update(task))
+
+    def _refresh(self):
+        GLib.idle_add(lambda: self.ensure_window().refresh())
+
+    def _enqueued(self, tasks):
+        self._load_ipa_info(tasks)
+        self._refresh()
+        self._warm_anisette()
+        self._kick_preflight()
+
+    def _maybe_start_next(self):
+        started = super()._maybe_start_next()
+        if started and anisette_pool is not None:
+            try:
+                anisette_pool.resize(self.queue_depth())
+            except Exception:
+                log_exception("Anisette pool resize failed")
+        if started and self.queue_depth() > len(started):
+            # More work is queued behind these: make sure anisette stays hot for it.
+            self._warm_anisette()
+        return started
+
+    # -- GTK and AltServer --------------------------------------------------------
 
     def ensure_window(self):
         if self._window is None:
@@ -525,83 +731,118 @@ class InstallQueueManager:
                 pass
         return self._window
 
-    def snapshot(self):
-        with self._lock:
-            return list(self._tasks)
+    def _stage(self, task: InstallTask):
+        """Copy the task's IPA into the local cache (no-op once staged)."""
+        if task.staged_path and os.path.isfile(task.staged_path):
+            return
+        try:
+            ipa_cache.max_bytes = int(SETTINGS.get("ipa_cache_max_mb", 4096)) * 1024 * 1024
+            task.sha256, task.staged_path = ipa_cache.stage(task.ipa_path)
+            ipa_cache.unpin(task.sha256)  # staged_hashes() protects it from here on
+        except (OSError, TypeError, ValueError) as e:
+            # Fall back to reading the source directly.
+            log_info(f"Install task {task.id}: staging {task.ipa_path!r} failed: {e!r}")
+            task.staged_path = None
 
-    def enqueue(self, task: InstallTask):
-        with self._lock:
-            self._tasks.append(task)
+    def _load_ipa_info(self, tasks):
+        """Stage IPAs and fill in task.ipa_info off the GTK thread (the IPA may be on a slow share)."""
 
-        GLib.idle_add(lambda: self.ensure_window().refresh())
-        self._maybe_start_next()
+        def _worker():
+            for task in tasks:
+                self._stage(task)
+                info = get_ipa_info(task.install_path)
+                if info is not None:
+                    task.ipa_info = info
+                    GLib.idle_add(lambda t=task: self._notify_update(t))
 
-    def move_up(self, task: InstallTask):
-        with self._lock:
-            if task.status != InstallTaskStatus.PENDING:
-                return
-            try:
-                i = self._tasks.index(task)
-            except ValueError:
-                return
-            if i <= 0:
-                return
-            self._tasks[i - 1], self._tasks[i] = self._tasks[i], self._tasks[i - 1]
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _kick_preflight(self):
+        if self._preflight is not None:
+            self._preflight.kick()
 
-    def move_down(self, task: InstallTask):
+    def attach_preflight(self, warm_fn=None):
+        self._preflight = PreflightRunner(
+            self._preflight_candidates, self._on_preflight, warm_fn, self._decide_install
+        )
+        self._preflight.start()
+
+    def _preflight_candidates(self):
+        """The tasks that will start next, plus blocked ones to re-check."""
         with self._lock:
-            if task.status != InstallTaskStatus.PENDING:
-                return
-            try:
-                i = self._tasks.index(task)
-            except ValueError:
-                return
-            if i >= len(self._tasks) - 1:
-                return
-            self._tasks[i + 1], self._tasks[i] = self._tasks[i], self._tasks[i + 1]
+            upcoming = self.scheduler.order(self._tasks, now=self._clock(), running=())
+            blocked = [
+                t for t in self._tasks if t.status == InstallTaskStatus.PENDING and t.blocked
+            ]
+        return upcoming[: self.max_parallel + 1] + blocked
 
-    def cancel(self, task: InstallTask):
+    def _on_preflight(self, task: InstallTask, result):
         with self._lock:
-            if task.status == InstallTaskStatus.PENDING:
-                task.status = InstallTaskStatus.CANCELED
-                try:
-                    self._tasks.remove(task)
-                except ValueError:
-                    pass
+            if task.status != InstallTaskStatus.PENDING:
                 return
-
-            if task.status == InstallTaskStatus.INSTALLING:
-                task._cancel_requested = True
-                proc = task._proc
+            was_blocked = task.blocked
+            task.preflight = result
+            task.blocked = result.blocking
+            if result.decision is not None:
+                self._apply_decision(task, result.decision, result.decision_reason)
+            if task.decision in (InstallDecision.SKIP, InstallDecision.REFRESH):
+                pass  # detail already explains the decision
+            elif result.blocking:
+                task.detail = f"Blocked: {result.blocking}"
+            elif result.ready:
+                version = f" (iOS {result.ios_version})" if result.ios_version else ""
+                task.detail = f"Ready{version}"
             else:
-                return
+                task.detail = "; ".join(result.warnings)
+        GLib.idle_add(lambda: self._notify_update(task))
+        if was_blocked and not result.blocking:
+            self._maybe_start_next()
 
-        try:
-            if proc is not None:
-                proc.terminate()
-        except Exception:
-            pass
+    def _warm_anisette(self):
+        if anisette_warmer is not None:
+            anisette_warmer.warm_soon()
 
-    def _maybe_start_next(self):
+    def _on_device_event(self, event: str, device: dict):
+        if event == DeviceEvent.ATTACHED:
+            self._unpark(device.get("udid") or None)
+        # Device set changed: cached pre-flight results may be stale.
         with self._lock:
-            if self._current is not None and self._current.status == InstallTaskStatus.INSTALLING:
-                return
-
-            # Pick first pending task
-            next_task = None
             for t in self._tasks:
                 if t.status == InstallTaskStatus.PENDING:
-                    next_task = t
-                    break
-            if next_task is None:
-                self._current = None
-                return
-            self._current = next_task
-            next_task.status = InstallTaskStatus.INSTALLING
-            next_task.detail = "Starting…"
+                    t.preflight = None
+        self._kick_preflight()
+
+    def _decide_install(self, task: InstallTask, udid: str, transport: str):
+        """Compare the task's IPA with what the device already has."""
+        if task.force or not SETTINGS.get("skip_installed", True):
+            return InstallDecision.INSTALL, ""
+        info = task.ipa_info or get_ipa_info(task.install_path)
+        task.ipa_info = info
+        if info is None or not info.bundle_id:
+            return InstallDecision.INSTALL, ""
+        apps = device_inventory.get(udid, transport)
+        entry = installed_app_index.get(udid, info.bundle_id)
+        lead_s = float(SETTINGS.get("refresh_lead_hours", 48)) * 3600
+        return decide_install(
+            info,
+            apps,
+            entry.signed_at if entry is not None else None,
+            now=time.time(),
+            fresh_for_s=FREE_ACCOUNT_VALIDITY_S - lead_s,
+        )
 
-        GLib.idle_add(lambda: self._notify_update(next_task))
-        threading.Thread(target=self._run_task, args=(next_task,), daemon=True).start()
+    def _apply_decision(self, task: InstallTask, decision: str, reason: str):
+        task.decision = decision
+        if decision == InstallDecision.SKIP:
+            task.status = InstallTaskStatus.SKIPPED
+            task.progress = 1.0
+            task.detail = reason
+            log_info(f"Install task {task.id} skipped: {reason}")
+        elif decision == InstallDecision.REFRESH and task.kind != TaskKind.REFRESH:
+            task.kind = TaskKind.REFRESH
+            task.priority = max(task.priority, Priority.LOW)
+            task.detail = reason
+            log_info(f"Install task {task.id} downgraded to refresh: {reason}")
 
     def _notify_update(self, task: InstallTask):
         try:
@@ -612,41 +853,186 @@ class InstallQueueManager:
         return False
 
     def _run_task(self, task: InstallTask):
+        if task.attempt == 0:
+            # Retries run again later; "total" spans every attempt and backoff.
+            task._run_started = time.monotonic()
+            _install_phase_seconds.observe(max(0.0, time.time() - task.created_at), phase="queued")
         try:
+            task.attempt += 1
+            task.failure = None
             self._run_altserver_install(task)
+            if self._schedule_retry(task):
+                return  # back in the queue; the lane goes to other tasks meanwhile
+            if refresh_scheduler is not None and task.udid:
+                if task.status in (InstallTaskStatus.SUCCEEDED, InstallTaskStatus.SKIPPED):
+                    refresh_scheduler.note_result(task.udid, task.ipa_path, True)
+                elif task.kind == TaskKind.REFRESH and task.status in (
+                    InstallTaskStatus.FAILED,
+                    InstallTaskStatus.CANCELED,
+                ):
+                    refresh_scheduler.note_result(task.udid, task.ipa_path, False)
+            if task.status == InstallTaskStatus.SUCCEEDED:
+                self._record_installed(task)
+                device_inventory.invalidate(task.udid)
+            elif task.failure is not None and task.failure.reason == "Apple ID credentials rejected":
+                # The password may have been changed in the keyring meanwhile.
+                credential_store.invalidate(ACCOUNT_KEYRING_SERVICE, task.apple_id)
+                credential_store.invalidate(SAVED_SERVICE)
+                credential_store.load_async()
         except Exception as e:
             log_exception(f"Install task crashed: {e}")
             task.status = InstallTaskStatus.FAILED
             task.detail = "Internal error"
             GLib.idle_add(lambda: self._notify_update(task))
         finally:
+            if task.status not in (InstallTaskStatus.PENDING, InstallTaskStatus.WAITING):  # parked: runs again
+                _install_phase_seconds.observe(time.monotonic() - task._run_started, phase="total")
+                _install_tasks_finished.inc(status=task.status)
+            self._finish(task)
             # Start next regardless of outcome.
-            GLib.idle_add(lambda: self.ensure_window().refresh())
+            self._refresh()
             self._maybe_start_next()
+            self._kick_preflight()
+
+    def _schedule_retry(self, task: InstallTask) -> bool:
+        """Requeue the task after a transient failure; False if the task is final."""
+        if task.status != InstallTaskStatus.FAILED or task._cancel_requested:
+            return False
+        policy = task.retry_policy or RetryPolicy.from_settings(SETTINGS)
+        failure = task.failure
+        if not policy.should_retry(failure, task.attempt):
+            if failure is not None:
+                log_info(
+                    f"Install task failed ({failure.kind}: {failure.reason}) after attempt {task.attempt}: {failure.line!r}"
+                )
+            return False
+
+        next_attempt = task.attempt + 1
+        delay = policy.delay_for(task.attempt)
+        log_info(
+            f"Install task: transient failure ({failure.reason}); attempt {next_attempt}/{policy.max_attempts} in {delay:.1f}s"
+        )
+        task.progress = None
+
+        if policy.restart_services and failure.service:
+            task.detail = f"{failure.reason}; restarting {failure.service}…"
+            GLib.idle_add(lambda: self._notify_update(task))
+            self._restart_service(failure.service, task)
+
+        self._retry_later(
+            task, delay, f"{failure.reason}; retrying in {delay:.0f}s ({next_attempt}/{policy.max_attempts})"
+        )
+        return True
+
+    def _record_installed(self, task: InstallTask):
+        if not task.udid:
+            return
+        sha256 = task.sha256
+        if not sha256:
+            try:
+                sha256 = file_sha256(task.ipa_path)
+            except OSError:
+                sha256 = ""
+        bundle_id = task.ipa_info.bundle_id if task.ipa_info is not None else ""
+        try:
+            installed_app_index.record_install(
+                task.udid, task.ipa_path, apple_id=task.apple_id, sha256=sha256, bundle_id=bundle_id
+            )
+        except Exception:
+            log_exception("Failed to record installed app")
+        if self._accounts is not None:
+            try:
+                self._accounts.record(task.apple_id, bundle_id)
+            except Exception:
+                log_exception("Failed to record Apple ID usage")
+
+    def _restart_service(self, service: str, task: InstallTask):
+        if service == "anisette" and anisette_pool is not None and task.anisette_url:
+            # A pool instance failed: take it out of rotation until its health
+            # check passes again; the primary is restarted below as before.
+            if anisette_pool.mark_unhealthy(task.anisette_url):
+                return
+        restarters = {
+            "anisette": restart_anisette_server,
+            "netmuxd": restart_netmuxd,
+            "lockdownd": restart_lockdownd_service,
+        }
+        fn = restarters.get(service)
+        if fn is None:
+            return
+        try:
+            fn()
+        except Exception as e:
+            log_info(f"Retry: restarting {service} failed: {e!r}")
 
     def _run_altserver_install(self, task: InstallTask):
-        # Resolve device + transport
-        device = get_connected_device()
-        udid = device.get("udid", "")
-        transport = device.get("transport", "none")
+        with _install_phase(task, "stage"):
+            self._stage(task)
+        with _install_phase(task, "device"):
+            udid, transport = self._resolve_device(task)
+            if udid and task.decision is None:
+                decision, reason = self._decide_install(task, udid, transport)
+                self._apply_decision(task, decision, reason)
 
         if not udid:
-            task.status = InstallTaskStatus.FAILED
-            task.detail = "No device detected"
+            self._park(task)
+            return
+        if task.status == InstallTaskStatus.SKIPPED:
             GLib.idle_add(lambda: self._notify_update(task))
             return
 
         # Prepare env
         env = os.environ.copy()
-        env["ALTSERVER_ANISETTE_SERVER"] = "http://127.0.0.1:6969"
+        env["ALTSERVER_ANISETTE_SERVER"] = ANISETTE_URL
         env["AVAHI_COMPAT_NOWARN"] = "1"
         if transport == "network":
             env["USBMUXD_SOCKET_ADDRESS"] = "127.0.0.1:27015"
         else:
             env.pop("USBMUXD_SOCKET_ADDRESS", None)
 
+        # Isolated HOME/ADI/TMPDIR so parallel AltServer runs don't share state.
+        sandbox = TaskSandbox(task.id)
+        try:
+            sandbox.create()
+        except OSError as e:
+            task.status = InstallTaskStatus.FAILED
+            task.detail = f"Failed to prepare working directory: {e}"
+            GLib.idle_add(lambda: self._notify_update(task))
+            return
+        try:
+            with contextlib.ExitStack() as lease:
+                with _install_phase(task, "anisette"):
+                    task.anisette_url = lease.enter_context(_anisette_lease())
+                    env["ALTSERVER_ANISETTE_SERVER"] = task.anisette_url
+                with _install_phase(task, "altserver"):
+                    self._run_altserver_process(task, udid, sandbox.env(env))
+            if task.status == InstallTaskStatus.SUCCEEDED:
+                sandbox.promote()
+        finally:
+            sandbox.cleanup()
+
+    def _resolve_device(self, task: InstallTask) -> tuple:
+        """(udid, transport) to install to; udid is "" if the device is absent."""
+        if task.apple_id and not task.password:
+            # Pooled account: the password is only read when the task runs.
+            task.password = _account_password(task.apple_id) or ""
+        # Resolve device + transport (already done if pre-flight ran recently).
+        pre = task.preflight
+        if pre is not None and pre.ready and pre.is_fresh() and task.attempt == 1:
+            device = {"udid": pre.udid, "transport": pre.transport}
+        elif task.udid:
+            device = find_device(task.udid)
+        else:
+            device = get_connected_device()
+        udid = device.get("udid", "")
+        if udid:
+            # Retries and the installed-app index refer to this exact device.
+            task.udid = udid
+        return udid, device.get("transport", "none")
+
+    def _run_altserver_process(self, task: InstallTask, udid: str, env: dict):
         # Spawn AltServer
-        args = [AltServer, "-u", udid, "-a", task.apple_id, "-p", task.password, task.ipa_path]
+        args = [self.altserver_path, "-u", udid, "-a", task.apple_id, "-p", task.password, task.install_path]
         if any(a is None or a == "" for a in args):
             task.status = InstallTaskStatus.FAILED
         log_fp = None
@@ -658,15 +1044,19 @@ class InstallQueueManager:
             GLib.idle_add(lambda: self._notify_update(task))
 
             proc = subprocess.Popen(
-                args,
+                resource_governor.command(args),
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 env=env,
                 bufsize=1,
                 universal_newlines=True,
+                # Own process group: cancel/failure stops AltServer's helpers too.
+                start_new_session=True,
             )
             task._proc = proc
+            resource_governor.adopt(task.id, proc.pid)
+            supervise(f"AltServer install #{task.id}", proc)
         except Exception as e:
             try:
                 if log_fp is not None:
@@ -680,47 +1070,7 @@ class InstallQueueManager:
 
         warn_prompt_seen = False
         two_factor_seen = False
-
-        def _ask_yes_no(prompt_text: str) -> bool:
-            result = {"ok": False}
-            ev = threading.Event()
-
-            def _show():
-                dialog = Gtk.MessageDialog(
-                    transient_for=self.ensure_window(),
-                    flags=0,
-                    message_type=Gtk.MessageType.QUESTION,
-                    buttons=Gtk.ButtonsType.OK_CANCEL,
-                    text=prompt_text,
-                )
-                resp = dialog.run()
-                dialog.destroy()
-                result["ok"] = resp == Gtk.ResponseType.OK
-                ev.set()
-                return False
-
-            GLib.idle_add(_show)
-            ev.wait()
-            return result["ok"]
-
-        def _ask_2fa_code() -> str:
-            result = {"code": ""}
-            ev = threading.Event()
-
-            def _show():
-                dialog = VerificationDialog(self.ensure_window())
-                resp = dialog.run()
-                if resp == Gtk.ResponseType.OK:
-                    result["code"] = dialog.entry2.get_text().strip()
-                else:
-                    result["code"] = ""
-                dialog.destroy()
-                ev.set()
-                return False
-
-            GLib.idle_add(_show)
-            ev.wait()
-            return result["code"]
+        classifier = FailureClassifier()
 
         # Progress parsing helpers
         re_progress = re.compile(r"(?:Signing\s+Progress|Progress)\s*:\s*([0-9eE+\-\.]+)")
@@ -731,15 +1081,15 @@ class InstallQueueManager:
                 if line is None:
                     continue
                 try:
-                    log_fp.write(line.encode("utf-8", errors="replace"))
+                    # Parallel runs share the log file: one tagged write per line.
+                    log_fp.write(f"[task {task.id}] {line}".encode("utf-8", errors="replace"))
                 except Exception:
                     pass
+                failure = classifier.feed(line)
 
                 if task._cancel_requested:
-                    try:
-                        proc.terminate()
-                    except Exception:
-                        pass
+                    terminate_process_group(proc)
+                    break
 
                 # Update progress
                 m_pct = re_progress_pct.search(line)
@@ -765,15 +1115,18 @@ class InstallQueueManager:
                 # Prompts
                 if (not warn_prompt_seen) and "Are you sure you want to continue?" in line:
                     warn_prompt_seen = True
-                    ok = _ask_yes_no("Continue installation?")
+                    ok = prompt_broker.ask(
+                        PromptKind.CONFIRM,
+                        task.apple_id,
+                        "Continue installation?",
+                        task=task,
+                        cancel_event=task._cancel_event,
+                    )
                     if not ok:
                         task.status = InstallTaskStatus.CANCELED
                         task.detail = "Canceled by user"
                         GLib.idle_add(lambda: self._notify_update(task))
-                        try:
-                            proc.terminate()
-                        except Exception:
-                            pass
+                        terminate_process_group(proc)
                         break
                     try:
                         if proc.stdin:
@@ -784,15 +1137,20 @@ class InstallQueueManager:
 
                 if (not two_factor_seen) and "Enter two factor code" in line:
                     two_factor_seen = True
-                    code = _ask_2fa_code()
+                    task.detail = "Waiting for verification code"
+                    GLib.idle_add(lambda: self._notify_update(task))
+                    code = prompt_broker.ask(
+                        PromptKind.TWO_FACTOR,
+                        task.apple_id,
+                        f"Verification code for {task.apple_id}",
+                        task=task,
+                        cancel_event=task._cancel_event,
+                    )
                     if not code:
                         task.status = InstallTaskStatus.CANCELED
                         task.detail = "2FA canceled"
                         GLib.idle_add(lambda: self._notify_update(task))
-                        try:
-                            proc.terminate()
-                        except Exception:
-                            pass
+                        terminate_process_group(proc)
                         break
                     try:
                         if proc.stdin:
@@ -808,24 +1166,28 @@ class InstallQueueManager:
                     GLib.idle_add(lambda: self._notify_update(task))
                     break
 
-                if "Could not" in line:
+                if failure is not None:
+                    task.failure = failure
                     task.status = InstallTaskStatus.FAILED
-                    task.detail = "Failed"
+                    task.detail = failure.reason
                     GLib.idle_add(lambda: self._notify_update(task))
-                    try:
-                        proc.terminate()
-                    except Exception:
-                        pass
+                    terminate_process_group(proc)
                     break
 
-            rc = proc.wait(timeout=10)
-        except Exception:
             try:
-                proc.terminate()
-            except Exception:
-                pass
+                rc = proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                terminate_process_group(proc)
+                rc = proc.wait()
+            # Helpers AltServer left behind must not hold the device or the
+            # anisette connection into the next task on this lane.
+            terminate_process_group(proc, grace_s=1.0)
+        except Exception:
+            terminate_process_group(proc)
             raise
         finally:
+            resource_governor.release(task.id)
+            unsupervise(f"AltServer install #{task.id}")
             try:
                 log_fp.close()
             except Exception:
@@ -840,24 +1202,482 @@ class InstallQueueManager:
                 task.detail = "Done"
                 task.progress = 1.0
             else:
+                task.failure = classifier.verdict(f"Exit {rc}")
                 task.status = InstallTaskStatus.FAILED
-                task.detail = f"Exit {rc}"
+                task.detail = task.failure.reason
         GLib.idle_add(lambda: self._notify_update(task))
 
 
+@contextlib.contextmanager
+def _install_phase(task: InstallTask, phase: str):
+    """Time one install phase into the phase histogram and the trace."""
+    started = time.monotonic()
+    try:
+        with tracing.span(phase, cat="install", task=task.id):
+            yield
+    finally:
+        _install_phase_seconds.observe(time.monotonic() - started, phase=phase)
+
+
+@contextlib.contextmanager
+def _anisette_lease():
+    """Yield the anisette URL a task should use for its AltServer run."""
+    if anisette_pool is None:
+        yield ANISETTE_URL
+        return
+    with anisette_pool.lease() as inst:
+        yield inst.url
+
+
 install_queue_manager = InstallQueueManager()
+anisette_pool = None
+anisette_warmer = None
+installed_app_index = InstalledAppIndex()
+ipa_cache = IpaCache(in_use_fn=install_queue_manager.staged_hashes)
+resource_governor = ResourceGovernor()
+device_inventory = DeviceAppInventory()
+device_monitor = DeviceMonitor()
+refresh_scheduler = None
+watch_folder_manager = None
+credential_store = CredentialStore()
+prompt_broker = PromptBroker(
+    lambda prompt: GLib.idle_add(_present_prompt, prompt),
+    lambda prompt: GLib.idle_add(_dismiss_prompt, prompt),
+)
+account_pool = None
+ipc_server = None
+process_sampler = None
+metrics_server = None
+mainloop_heartbeat = MainLoopHeartbeat()
+profiler = Profiler(run_on_main=lambda fn: _call_on_main(fn))
+stall_watchdog = None
+
+
+def enqueue_install(
+    ipa_path: str,
+    apple_id_value: str,
+    password_value: str,
+    *,
+    udid=None,
+    priority=Priority.NORMAL,
+    deadline=None,
+    force=False,
+):
+    try:
+        install_queue_manager.ensure_window()
+    except Exception:
+        pass
+    task = InstallTask(
+        ipa_path=ipa_path,
+        apple_id=apple_id_value,
+        password=password_value,
+        udid=udid,
+        priority=priority,
+        deadline=deadline,
+        force=force,
+    )
+    install_queue_manager.enqueue(task)
+    return task
+
+
+def enqueue_fanout(
+    ipa_path: str,
+    apple_id_value: str,
+    password_value: str,
+    udids="all",
+    *,
+    priority=Priority.NORMAL,
+    deadline=None,
+    concurrency=None,
+):
+    """Install one IPA on several devices; `udids` is a list or "all" (attached).
+
+    Validation and hashing happen once, on a worker thread; per-device subtasks
+    are then queued together and run with the group's bounded concurrency.
+    """
+    if concurrency is None:
+        concurrency = SETTINGS.get("fanout_concurrency", 3)
+    group = FanoutGroup(ipa_path, concurrency=concurrency)
+
+    def _worker():
+        targets = udids
+        if targets == "all":
+            targets = [d["udid"] for d in list_devices()]
+        targets = list(dict.fromkeys(u for u in targets if u))
+        if not targets:
+            _show_fail_async("No devices attached for the fan-out install.")
+            return
+        try:
+            ipa_cache.max_bytes = int(SETTINGS.get("ipa_cache_max_mb", 4096)) * 1024 * 1024
+            group.stage(ipa_cache)
+        except (InvalidIPAError, OSError) as e:
+            log_info(f"Fan-out of {ipa_path!r} rejected: {e}")
+            _show_fail_async(str(e))
+            return
 
+        for udid in targets:
+            task = InstallTask(
+                ipa_path=group.ipa_path,
+                apple_id=apple_id_value,
+                password=password_value,
+                udid=udid,
+                priority=priority,
+                deadline=deadline,
+            )
+            task.group = group
+            task.sha256 = group.sha256
+            task.staged_path = group.staged_path
+            group.tasks.append(task)
+        log_info(f"Fan-out {group.label!r} to {len(targets)} device(s), concurrency={group.concurrency}")
+        try:
+            install_queue_manager.enqueue_group(group)
+        finally:
+            ipa_cache.unpin(group.sha256)
 
-def enqueue_install(ipa_path: str, apple_id_value: str, password_value: str):
     try:
         install_queue_manager.ensure_window()
     except Exception:
         pass
-    task = InstallTask(ipa_path=ipa_path, apple_id=apple_id_value, password=password_value)
+    threading.Thread(target=_worker, daemon=True).start()
+    return group
+
+
+def _present_prompt(prompt):
+    """Show a broker prompt without blocking the main loop or other dialogs."""
+    parent = install_queue_manager.ensure_window()
+    if prompt.kind == PromptKind.TWO_FACTOR:
+        dialog = VerificationDialog(parent)
+        waiting = len(prompt.tasks)
+        if waiting > 1:
+            dialog.set_title(f"Verification code ({prompt.apple_id}, {waiting} installs)")
+        else:
+            dialog.set_title(f"Verification code ({prompt.apple_id})")
+
+        def _on_response(d, resp):
+            code = d.entry2.get_text().strip() if resp == Gtk.ResponseType.OK else ""
+            d.destroy()
+            prompt_broker.answer(prompt, code or None)
+
+        dialog.entry2.connect("activate", lambda _e: dialog.response(Gtk.ResponseType.OK))
+    else:
+        dialog = Gtk.MessageDialog(
+            transient_for=parent,
+            flags=0,
+            message_type=Gtk.MessageType.QUESTION,
+            buttons=Gtk.ButtonsType.OK_CANCEL,
+            text=prompt.text,
+        )
+        if prompt.apple_id:
+            dialog.format_secondary_text(prompt.apple_id)
+
+        def _on_response(d, resp):
+            d.destroy()
+            prompt_broker.answer(prompt, resp == Gtk.ResponseType.OK)
+
+    dialog.set_modal(False)
+    dialog.connect("response", _on_response)
+    prompt.ui = dialog
+    dialog.show_all()
+    return False
+
+
+def _dismiss_prompt(prompt):
+    if prompt.ui is not None:
+        try:
+            prompt.ui.destroy()
+        except Exception:
+            pass
+    return False
+
+
+def _show_fail_async(message: str):
+    def _show():
+        global Failmsg
+        Failmsg = message
+        dialog = FailDialog(None)
+        dialog.run()
+        dialog.destroy()
+        return False
+
+    GLib.idle_add(_show)
+
+
+def _enqueue_selected(ipa_path: str, apple_id_value: str, password_value: str, targets=None):
+    """Queue the chosen IPA; `targets` ("all" or UDIDs) fans it out."""
+    if targets:
+        return enqueue_fanout(ipa_path, apple_id_value, password_value, targets)
+    return enqueue_install(ipa_path, apple_id_value, password_value)
+
+
+def _saved_credentials():
+    """(apple_id, password) of the saved Login, or (None, None)."""
+    if threading.current_thread() is not threading.main_thread():
+        # Background callers may wait for the initial keyring read.
+        credential_store.wait(timeout=10)
+    return credential_store.saved()
+
+
+def _enqueue_refresh(app):
+    # Refreshes run unattended, so only keyring accounts can be used: the one
+    # that signed the app if it is pooled, else the saved Login account.
+    saved_id, saved_password = _saved_credentials()
+    if app.apple_id and account_pool is not None and app.apple_id in account_pool.accounts():
+        saved_id, saved_password = app.apple_id, ""  # password read at start
+    if not saved_id:
+        return None
+    if app.apple_id and app.apple_id != saved_id:
+        log_info(f"Refresh of {app.key!r} skipped: signed by {app.apple_id!r}, no saved password")
+        return None
+    if not os.path.isfile(app.ipa_path):
+        log_info(f"Refresh of {app.key!r} skipped: IPA missing at {app.ipa_path!r}")
+        return None
+    task = InstallTask(
+        ipa_path=app.ipa_path,
+        apple_id=saved_id,
+        password=saved_password,
+        udid=app.udid,
+        priority=Priority.LOW,
+        deadline=app.expires_at,
+        kind=TaskKind.REFRESH,
+    )
     install_queue_manager.enqueue(task)
+    return task
+
+
+def _enqueue_watched(ipa_path: str, folder):
+    # Watch-folder installs run unattended, like refreshes.
+    saved_id, saved_password = _saved_credentials()
+    if not saved_id and account_pool is not None and account_pool.accounts():
+        saved_id, saved_password = "", ""  # any pooled account
+    elif not saved_id:
+        log_info(f"Watch folder: {ipa_path!r} not installed, no saved Apple ID")
+        return None
+    return enqueue_fanout(ipa_path, saved_id, saved_password, folder.udids)
+
+
+def _account_password(apple_id: str):
+    """Password of a pooled account (falls back to the saved Login pair)."""
+    return _keyring_password(ACCOUNT_KEYRING_SERVICE, apple_id)
+
+
+def _active_bundle_ids(apple_id: str, udid: str) -> set:
+    """Bundle IDs `apple_id` currently keeps signed on `udid`."""
+    now = time.time()
+    return {
+        app.bundle_id or app.key
+        for app in installed_app_index.apps(udid)
+        if app.apple_id == apple_id and app.expires_at > now
+    }
+
+
+def add_pooled_account(apple_id: str, password: str) -> None:
+    apple_id = apple_id.strip().lower()
+    credential_store.set_async(ACCOUNT_KEYRING_SERVICE, apple_id, password)
+    account_pool.add(apple_id)
+    install_queue_manager._maybe_start_next()
+
+
+def remove_pooled_account(apple_id: str) -> None:
+    account_pool.remove(apple_id)
+    credential_store.delete_async(ACCOUNT_KEYRING_SERVICE, apple_id)
+
+
+def _keyring_password(service: str, apple_id: str):
+    """Password for `apple_id` stored under `service`, else althea's saved pair."""
+    password = credential_store.get(service, apple_id)
+    if password:
+        return password
+    saved_id, saved_password = _saved_credentials()
+    return saved_password if saved_id == apple_id else None
+
+
+def load_manifest_file(path: str) -> list:
+    """Expand a batch manifest into queue tasks; raises ManifestError."""
+    manifest = load_manifest(path)
+    attached = [d["udid"] for d in list_devices()]
+    tasks = manifest.expand(attached, _keyring_password, SETTINGS.get("retry"))
+    try:
+        GLib.idle_add(install_queue_manager.ensure_window)
+    except Exception:
+        pass
+    install_queue_manager.enqueue_many(tasks)
+    log_info(f"Manifest {manifest.path!r}: queued {len(tasks)} task(s)")
+    return tasks
+
+
+def _ipc_load_manifest(request: dict) -> dict:
+    try:
+        tasks = load_manifest_file(str(request.get("path") or ""))
+    except ManifestError as e:
+        return {"ok": False, "error": str(e)}
+    return {"queued": len(tasks)}
+
+
+def _call_on_main(fn):
+    """Run `fn` on the GTK thread and return its result (waits up to 10 s)."""
+    if threading.current_thread() is threading.main_thread():
+        return fn()
+    done = threading.Event()
+    result = {}
+
+    def _run():
+        try:
+            result["value"] = fn()
+        finally:
+            done.set()
+        return False
+
+    GLib.idle_add(_run)
+    if not done.wait(10):
+        raise TimeoutError("GTK main loop did not respond")
+    return result.get("value")
+
+
+def _ipc_profile(request: dict) -> dict:
+    """{"cmd": "profile", "action": "cpu_start" (+ "seconds") | "cpu_stop" |
+    "memory_snapshot" | "memory_stop" | "status"}"""
+    action = request.get("action", "status")
+    if action == "cpu_start":
+        until = profiler.start_cpu(float(request.get("seconds") or SETTINGS.get("profile_seconds", 30)))
+        return {"until": until}
+    if action == "cpu_stop":
+        return {"path": profiler.stop_cpu()}
+    if action == "memory_snapshot":
+        return {"path": profiler.snapshot_memory()}
+    if action == "memory_stop":
+        profiler.stop_memory()
+        return {}
+    if action == "status":
+        return profiler.status()
+    return {"ok": False, "error": f"unknown profile action {action!r}"}
+
+
+def load_manifest_dialog(_):
+    dialog = Gtk.FileChooserDialog(title="Choose an install manifest", action=Gtk.FileChooserAction.OPEN)
+    dialog.add_buttons(
+        Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_OPEN, Gtk.ResponseType.OK
+    )
+    manifest_filter = Gtk.FileFilter()
+    manifest_filter.set_name("Install manifests")
+    manifest_filter.add_pattern("*.json")
+    manifest_filter.add_pattern("*.toml")
+    dialog.add_filter(manifest_filter)
+    response = dialog.run()
+    path = dialog.get_filename() if response == Gtk.ResponseType.OK else None
+    dialog.destroy()
+    if path:
+        _load_manifest_async(path)
+
+
+def _load_manifest_async(path: str):
+    def _worker():
+        try:
+            load_manifest_file(path)
+        except ManifestError as e:
+            log_info(f"Manifest {path!r} rejected: {e}")
+            _show_fail_async(str(e))
+
+    threading.Thread(target=_worker, daemon=True).start()
+
+
+def apply_watch_folders():
+    """(Re)configure watch folders from SETTINGS; call on the GTK thread."""
+    global watch_folder_manager
+    if watch_folder_manager is None:
+        watch_folder_manager = WatchFolderManager(_enqueue_watched)
+    folders = [WatchFolder.from_setting(raw) for raw in SETTINGS.get("watch_folders") or []]
+    watch_folder_manager.configure([f for f in folders if f is not None])
 
 
-def use_saved_credentials():
+@tracing.traced(cat="startup")
+def start_background_services():
+    credential_store.load_async()
+    try:
+        prompt_broker.reuse_code_s = float(SETTINGS.get("reuse_2fa_code_s", 0))
+    except (TypeError, ValueError):
+        pass
+    global resource_governor
+    resource_governor = ResourceGovernor.from_settings(SETTINGS)
+    global refresh_scheduler
+    global account_pool
+    if account_pool is None:
+        account_pool = AccountPool.from_settings(SETTINGS, active_fn=_active_bundle_ids)
+        install_queue_manager.attach_account_pool(account_pool)
+    global anisette_pool
+    if anisette_pool is None:
+        anisette_pool = AnisettePool(
+            max_size=SETTINGS.get("anisette_pool_max", 3),
+            tasks_per_instance=SETTINGS.get("anisette_tasks_per_instance", 2),
+        )
+        anisette_pool.start()
+    global anisette_warmer
+    if anisette_warmer is None:
+        anisette_warmer = AnisetteWarmer(lambda: [i["url"] for i in anisette_pool.stats()])
+        anisette_warmer.start()
+    install_queue_manager.attach_preflight(anisette_warmer.warm_soon)
+    try:
+        purge_stale_sandboxes()
+    except OSError:
+        pass
+    install_queue_manager.attach_device_monitor(device_monitor)
+    device_monitor.start()
+    if SETTINGS.get("auto_refresh", True) and refresh_scheduler is None:
+        refresh_scheduler = RefreshScheduler(
+            installed_app_index,
+            device_monitor,
+            _enqueue_refresh,
+            install_queue_manager.has_active_task,
+            lead_s=float(SETTINGS.get("refresh_lead_hours", 48)) * 3600,
+            spread_s=float(SETTINGS.get("refresh_spread_hours", 12)) * 3600,
+        )
+        refresh_scheduler.start()
+    apply_watch_folders()
+    global process_sampler
+    if process_sampler is None:
+        try:
+            process_sampler = ProcessSampler(
+                supervised,
+                interval_s=float(SETTINGS.get("process_sample_interval_s", 10)),
+                rss_growth_alert_bytes=int(float(SETTINGS.get("rss_growth_alert_mb", 64)) * 1024 * 1024),
+                on_alert=lambda name, pid, growth, window_s: GLib.idle_add(_notify_rss_growth, name, growth),
+            )
+        except (TypeError, ValueError):
+            process_sampler = ProcessSampler(supervised)
+        process_sampler.start()
+    mainloop_heartbeat.start()
+    global stall_watchdog
+    try:
+        stall_warn_s = float(SETTINGS.get("stall_warn_s", 1.0) or 0)
+    except (TypeError, ValueError):
+        stall_warn_s = 1.0
+    if stall_warn_s > 0 and stall_watchdog is None:
+        stall_watchdog = StallWatchdog(mainloop_heartbeat, threshold_s=stall_warn_s)
+        stall_watchdog.start()
+    global metrics_server
+    try:
+        metrics_port = int(SETTINGS.get("metrics_port", 0) or 0)
+    except (TypeError, ValueError):
+        metrics_port = 0
+    if metrics_port and metrics_server is None:
+        metrics_server = MetricsServer(metrics_port)
+        try:
+            metrics_server.start()
+        except OSError as e:
+            log_info(f"Metrics endpoint unavailable on port {metrics_port}: {e!r}")
+            metrics_server = None
+    global ipc_server
+    if ipc_server is None:
+        ipc_server = IpcServer()
+        ipc_server.register("load_manifest", _ipc_load_manifest)
+        ipc_server.register("profile", _ipc_profile)
+        try:
+            ipc_server.start()
+        except OSError:
+            log_exception("IPC socket unavailable")
+            ipc_server = None
+
+
+def use_saved_credentials(targets=None):
     # Do not remove the shared application log file.
     dialog = Gtk.MessageDialog(
         flags=0,
@@ -870,44 +1690,44 @@ def use_saved_credentials():
     if response == Gtk.ResponseType.YES:
         global apple_id
         global password
-        apple_id = keyring.get_password("althea", "apple_id")
-        password = keyring.get_password("althea", "password")
+        apple_id, password = credential_store.saved()
         global savedcheck
         savedcheck = True
         # Enqueue install without creating a blank Login window.
         ipa = globals().get("PATH")
         if not ipa:
             ipa = f"{altheapath}/AltStore.ipa"
-        enqueue_install(str(ipa), str(apple_id or ""), str(password or ""))
+        _enqueue_selected(str(ipa), str(apple_id or ""), str(password or ""), targets)
     else:
-        try:
-            apple_id = keyring.delete_password("althea", "apple_id")
-            password = keyring.delete_password("althea", "password")
-        except keyring.errors.KeyringError:
-            pass
-        win3 = Login()
+        apple_id = password = None
+        credential_store.delete_async(SAVED_SERVICE, "apple_id")
+        credential_store.delete_async(SAVED_SERVICE, "password")
+        win3 = Login(targets)
         win3.show_all()
     dialog.destroy()
 
 
-def win1():
-    try:
-        if keyring.get_password("althea", "apple_id"):
-            use_saved_credentials()
-        else:
-            openwindow(Login)
-    except keyring.errors.KeyringError:
-        openwindow(Login)
+def _choose_login(saved_id, _saved_password, targets=None):
+    if saved_id:
+        use_saved_credentials(targets)
+    elif account_pool is not None and account_pool.accounts():
+        # No personal login saved: let the Apple ID pool pick an account.
+        ipa = globals().get("PATH") or f"{altheapath}/AltStore.ipa"
+        _enqueue_selected(str(ipa), "", "", targets)
+    else:
+        Login(targets).show_all()
+    return False
+
+
+def win1(targets=None):
+    # Normally answered from the cache; if the keyring is still being read,
+    # the choice is made on the GTK thread once it is. `targets` travels with
+    # this one login, so cancelling it leaves nothing behind for the next.
+    credential_store.when_ready(lambda *saved: GLib.idle_add(_choose_login, *saved, targets))
 
 
 def win2(_):
-    try:
-        if keyring.get_password("althea", "apple_id"):
-            use_saved_credentials()
-        else:
-            openwindow(Login)
-    except keyring.errors.KeyringError:
-        openwindow(Login)
+    win1()
 
 
 def actionCallback(notification, action, user_data=None):
@@ -936,6 +1756,7 @@ def silent_remove(filename):
             raise
 
 
+@tracing.traced(cat="download")
 def altstore_download(value):
     baseUrl = "https://cdn.altstore.io/file/altstore/apps.json"
     json_data = requests.get(baseUrl)
@@ -1181,11 +2002,14 @@ class SplashScreen(Handy.Window):
                         )
                         url = f"{link}-x86_64"
 
-        r = requests.get(url, allow_redirects=True)
+        with tracing.span(f"download {name}", cat="download", url=url) as sp:
+            r = requests.get(url, allow_redirects=True)
+            sp.set(status=r.status_code, bytes=len(r.content))
         open(f"{(altheapath)}/{name}", "wb").write(r.content)
         subprocess.run(f"chmod +x {(altheapath)}/{name}", shell=True)
         subprocess.run(f"chmod 755 {(altheapath)}/{name}", shell=True)
 
+    @tracing.traced(cat="startup")
     def startup_process(self):
         self._ui_set_text("Checking if anisette-server is already running...")
         self._ui_set_fraction(0.1)
@@ -1198,22 +2022,24 @@ class SplashScreen(Handy.Window):
             )
             self._ui_set_fraction(0.2)
             self._ui_set_text("Downloading Apple Music APK...")
-            r = requests.get(
-                "https://apps.mzstatic.com/content/android-apple-music-apk/applemusic.apk",
-                allow_redirects=True,
-            )
+            with tracing.span("download Apple Music APK", cat="download"):
+                r = requests.get(
+                    "https://apps.mzstatic.com/content/android-apple-music-apk/applemusic.apk",
+                    allow_redirects=True,
+                )
             open(f"{(altheapath)}/am.apk", "wb").write(r.content)
             os.makedirs(f"{(altheapath)}/lib/x86_64", exist_ok=True)
             self._ui_set_fraction(0.3)
             self._ui_set_text("Extracting necessary libraries...")
-            CheckRunB = subprocess.run(
-                f'unzip -j "{(altheapath)}/am.apk" "lib/x86_64/libstoreservicescore.so" -d "{(altheapath)}/lib/x86_64"',
-                shell=True,
-            )
-            CheckRunC = subprocess.run(
-                f'unzip -j "{(altheapath)}/am.apk" "lib/x86_64/libCoreADI.so" -d "{(altheapath)}/lib/x86_64"',
-                shell=True,
-            )
+            with tracing.span("extract anisette libraries", cat="startup"):
+                CheckRunB = subprocess.run(
+                    f'unzip -j "{(altheapath)}/am.apk" "lib/x86_64/libstoreservicescore.so" -d "{(altheapath)}/lib/x86_64"',
+                    shell=True,
+                )
+                CheckRunC = subprocess.run(
+                    f'unzip -j "{(altheapath)}/am.apk" "lib/x86_64/libCoreADI.so" -d "{(altheapath)}/lib/x86_64"',
+                    shell=True,
+                )
             silent_remove(f"{(altheapath)}/am.apk")
             self._ui_set_fraction(0.4)
 
@@ -1246,10 +2072,11 @@ class SplashScreen(Handy.Window):
             start_netmuxd()
 
             # Poll quickly instead of sleeping a fixed amount.
-            for _ in range(10):
-                if self._is_netmuxd_ready(timeout=0.2):
-                    break
-                sleep(0.2)
+            with tracing.span("wait for netmuxd", cat="startup"):
+                for _ in range(10):
+                    if self._is_netmuxd_ready(timeout=0.2):
+                        break
+                    sleep(0.2)
 
         if not os.path.isfile(f"{(altheapath)}/AltServer"):
             self.download_bin(
@@ -1276,6 +2103,7 @@ class SplashScreen(Handy.Window):
             start_altserver()
 
         # Final check: anisette must be reachable before we consider startup complete.
+        tracing.instant("startup services launched", cat="startup")
         while not self._is_anisette_accessible(timeout=1.0):
             self._ui_set_text("anisette-server is not reachable")
 
@@ -1289,10 +2117,7 @@ class SplashScreen(Handy.Window):
                 )
 
             if response == Gtk.ResponseType.OK:
-                try:
-                    kill_process_by_name(AnisetteServer)
-                except Exception:
-                    pass
+                stop_primary_anisette()
                 self._ui_set_text("Restarting anisette-server...")
                 self._start_anisette_server()
                 sleep(0.5)
@@ -1309,8 +2134,9 @@ class SplashScreen(Handy.Window):
 
 
 class Login(Gtk.Window):
-    def __init__(self):
+    def __init__(self, targets=None):
         super().__init__(title="Login")
+        self._targets = targets
         self.present()
         self.set_position(Gtk.WindowPosition.CENTER_ALWAYS)
         self.set_resizable(False)
@@ -1362,7 +2188,7 @@ class Login(Gtk.Window):
         self._install_log_path = _log_path()
         self._install_log_offset = os.path.getsize(self._install_log_path) if os.path.exists(self._install_log_path) else 0
         try:
-            if not keyring.get_password("althea", "apple_id"):
+            if credential_store.saved()[0] is None:
                 self.set_position(Gtk.WindowPosition.CENTER_ALWAYS)
                 dialog = Gtk.MessageDialog(
                     transient_for=self,
@@ -1378,8 +2204,8 @@ class Login(Gtk.Window):
                 if response == Gtk.ResponseType.YES:
                     apple_id = self.entry1.get_text().lower()
                     password = self.entry.get_text()
-                    keyring.set_password("althea", "apple_id", apple_id)
-                    keyring.set_password("althea", "password", password)
+                    credential_store.set_async(SAVED_SERVICE, "apple_id", apple_id)
+                    credential_store.set_async(SAVED_SERVICE, "password", password)
                 dialog.destroy()
         except keyring.errors.KeyringError:
             pass
@@ -1388,7 +2214,7 @@ class Login(Gtk.Window):
         ipa = globals().get("PATH")
         if not ipa:
             ipa = f"{altheapath}/AltStore.ipa"
-        enqueue_install(str(ipa), apple_id_value, password_value)
+        _enqueue_selected(str(ipa), apple_id_value, password_value, self._targets)
         try:
             self.destroy()
         except Exception:
@@ -1492,7 +2318,8 @@ class Login(Gtk.Window):
                 stdin=subprocess.PIPE,
                 stdout=self._install_log_fp,
                 stderr=self._install_log_fp,
-                env=env
+                env=env,
+                start_new_session=True,
             )
         else:
             global Failmsg
@@ -1580,10 +2407,7 @@ class Login(Gtk.Window):
             return True
 
         if "Could not" in log_text:
-            try:
-                InsAltStore.terminate()
-            except Exception:
-                pass
+            terminate_process_group_async(InsAltStore)
             self._installing = False
             global Failmsg
             Failmsg = self._tail_lines(self._install_log_path, 6)
@@ -1606,10 +2430,7 @@ class Login(Gtk.Window):
                 return True
             if response1 == Gtk.ResponseType.CANCEL:
                 dialog1.destroy()
-                try:
-                    os.system(f"pkill -TERM -P {InsAltStore.pid}")
-                except Exception:
-                    pass
+                terminate_process_group_async(InsAltStore)
                 self._warn_time = 1
                 self.cancel()
                 self._installing = False
@@ -1631,10 +2452,7 @@ class Login(Gtk.Window):
 
             if response == Gtk.ResponseType.CANCEL:
                 self._two_factor_time = 1
-                try:
-                    os.system(f"pkill -TERM -P {InsAltStore.pid}")
-                except Exception:
-                    pass
+                terminate_process_group_async(InsAltStore)
                 self.cancel()
                 dialog.destroy()
                 self.destroy()
@@ -2130,8 +2948,10 @@ class FileChooserWindow(Gtk.Window):
         )
 
         self.add_filters(dialog)
+        self.add_preview(dialog)
 
         response = dialog.run()
+        self._preview_path = None  # drop previews still being read
         if response == Gtk.ResponseType.OK:
             self.PATHFILE = dialog.get_filename()
             global ipa_path_exists
@@ -2141,6 +2961,56 @@ class FileChooserWindow(Gtk.Window):
 
         dialog.destroy()
 
+    def add_preview(self, dialog):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        box.set_size_request(180, -1)
+        self._preview_img = Gtk.Image()
+        self._preview_lbl = Gtk.Label()
+        self._preview_lbl.set_line_wrap(True)
+        self._preview_lbl.set_max_width_chars(24)
+        self._preview_lbl.set_justify(Gtk.Justification.CENTER)
+        box.pack_start(self._preview_img, False, False, 0)
+        box.pack_start(self._preview_lbl, False, False, 0)
+        box.show_all()
+        dialog.set_preview_widget(box)
+        dialog.set_use_preview_label(False)
+        self._preview_path = None
+        dialog.connect("update-preview", self.on_update_preview)
+
+    def on_update_preview(self, dialog):
+        # Reading the IPA can take a while on a slow or network drive, so it
+        # happens off the GTK thread; only the latest selection is shown.
+        path = dialog.get_preview_filename()
+        self._preview_path = path
+        dialog.set_preview_widget_active(False)
+        if not path or not path.lower().endswith(".ipa"):
+            return
+
+        def _work():
+            if self._preview_path != path:
+                return
+            info = get_ipa_info(path) if os.path.isfile(path) else None
+            GLib.idle_add(self._show_preview, dialog, path, info)
+
+        threading.Thread(target=_work, daemon=True).start()
+
+    def _show_preview(self, dialog, path, info):
+        if info is None or self._preview_path != path:
+            return False
+        pixbuf = _pixbuf_from_png(info.icon_png, ICON_SIZE) if info.icon_png else None
+        if pixbuf is not None:
+            self._preview_img.set_from_pixbuf(pixbuf)
+        else:
+            self._preview_img.set_from_icon_name("application-x-executable", Gtk.IconSize.DIALOG)
+        lines = [f"<b>{GLib.markup_escape_text(info.name)}</b>"]
+        if info.display_version:
+            lines.append(GLib.markup_escape_text(info.display_version))
+        if info.bundle_id:
+            lines.append(f"<small>{GLib.markup_escape_text(info.bundle_id)}</small>")
+        self._preview_lbl.set_markup("\n".join(lines))
+        dialog.set_preview_widget_active(True)
+        return False
+
     def add_filters(self, dialog):
         filter_ipa = Gtk.FileFilter()
         filter_ipa.set_name("IPA files")
@@ -2427,6 +3297,17 @@ class LogWindow(Handy.Window):
             return True
 
 
+def _anisette_pool_summary() -> str:
+    if anisette_pool is None:
+        return ""
+    parts = []
+    for inst in anisette_pool.stats():
+        state = "ok" if inst["healthy"] else "down"
+        latency = f" {inst['latency_ms']:.0f} ms" if inst["latency_ms"] is not None else ""
+        parts.append(f":{inst['port']} {state}{latency} ({inst['leases']} in use)")
+    return "Pool: " + ", ".join(parts)
+
+
 class SettingsWindow(Handy.Window):
     def __init__(self):
         super().__init__(title="Settings")
@@ -2493,6 +3374,74 @@ class SettingsWindow(Handy.Window):
         self.row_lockdownd.add(self.btn_lockdownd)
         self.vbox.pack_start(self.row_lockdownd, False, False, 0)
 
+        self.row_usage = Handy.ActionRow()
+        self.row_usage.set_title("Resource usage")
+        self.vbox.pack_start(self.row_usage, False, False, 0)
+        self._refresh_usage_row()
+        self._usage_source_id = GLib.timeout_add_seconds(5, self._refresh_usage_row)
+        self.connect("destroy", self._on_destroy_usage)
+
+        # Install queue
+        queue_lbl = Gtk.Label()
+        queue_lbl.set_markup("<b>Install queue</b>")
+        queue_lbl.set_halign(Gtk.Align.START)
+        queue_lbl.set_margin_top(10)
+        self.vbox.pack_start(queue_lbl, False, False, 0)
+
+        self.row_watch = Handy.ActionRow()
+        self.row_watch.set_title("Watch folders")
+        watch_add = Gtk.Button(label="Add…")
+        watch_add.set_valign(Gtk.Align.CENTER)
+        watch_add.connect("clicked", self.on_add_watch_folder)
+        self.row_watch.add(watch_add)
+        watch_clear = Gtk.Button(label="Clear")
+        watch_clear.set_valign(Gtk.Align.CENTER)
+        watch_clear.connect("clicked", self.on_clear_watch_folders)
+        self.row_watch.add(watch_clear)
+        self.vbox.pack_start(self.row_watch, False, False, 0)
+        self._refresh_watch_row()
+
+        self.row_accounts = Handy.ActionRow()
+        self.row_accounts.set_title("Apple ID pool")
+        accounts_add = Gtk.Button(label="Add…")
+        accounts_add.set_valign(Gtk.Align.CENTER)
+        accounts_add.connect("clicked", self.on_add_account)
+        self.row_accounts.add(accounts_add)
+        accounts_clear = Gtk.Button(label="Clear")
+        accounts_clear.set_valign(Gtk.Align.CENTER)
+        accounts_clear.connect("clicked", self.on_clear_accounts)
+        self.row_accounts.add(accounts_clear)
+        self.vbox.pack_start(self.row_accounts, False, False, 0)
+        self._refresh_accounts_row()
+
+        # Developer
+        dev_lbl = Gtk.Label()
+        dev_lbl.set_markup("<b>Developer</b>")
+        dev_lbl.set_halign(Gtk.Align.START)
+        dev_lbl.set_margin_top(10)
+        self.vbox.pack_start(dev_lbl, False, False, 0)
+
+        self.row_cpu_profile = Handy.ActionRow()
+        self.row_cpu_profile.set_title("CPU profile")
+        self.cpu_profile_switch = Gtk.Switch()
+        self.cpu_profile_switch.set_valign(Gtk.Align.CENTER)
+        self._cpu_profile_handler = self.cpu_profile_switch.connect("notify::active", self.on_cpu_profile_toggled)
+        self.row_cpu_profile.add(self.cpu_profile_switch)
+        self.vbox.pack_start(self.row_cpu_profile, False, False, 0)
+
+        self.row_memory_profile = Handy.ActionRow()
+        self.row_memory_profile.set_title("Memory snapshots")
+        memory_snap = Gtk.Button(label="Snapshot")
+        memory_snap.set_valign(Gtk.Align.CENTER)
+        memory_snap.connect("clicked", self.on_memory_snapshot)
+        self.row_memory_profile.add(memory_snap)
+        memory_stop = Gtk.Button(label="Stop")
+        memory_stop.set_valign(Gtk.Align.CENTER)
+        memory_stop.connect("clicked", self.on_memory_stop)
+        self.row_memory_profile.add(memory_stop)
+        self.vbox.pack_start(self.row_memory_profile, False, False, 0)
+        self._refresh_profile_rows()
+
         logs_row = Handy.ActionRow()
         logs_row.set_title("Logs")
         logs_row.set_subtitle("View timestamped application logs")
@@ -2511,18 +3460,172 @@ class SettingsWindow(Handy.Window):
         self.refresh_statuses()
         self.show_all()
 
+    def _refresh_usage_row(self):
+        # Reads the sampler's latest snapshot only; sampling runs on its own thread.
+        rows = process_sampler.snapshot() if process_sampler is not None else []
+        lines = []
+        for info in rows:
+            line = f"{info['name']}: CPU {info['cpu_percent']:.0f}% · {info['rss'] / (1024 * 1024):.0f} MB"
+            if info["fds"] is not None:
+                line += f" · {info['fds']} fds"
+            line += f" · {info['threads']} threads"
+            if info["leaking"]:
+                line += f" · ⚠ +{info['rss_growth'] / (1024 * 1024):.0f} MB, still growing"
+            lines.append(line)
+        self.row_usage.set_subtitle("\n".join(lines) if lines else "No helper processes started by althea")
+        self._refresh_profile_rows()
+        return True
+
+    def _refresh_profile_rows(self):
+        if not hasattr(self, "row_cpu_profile"):
+            return
+        status = profiler.status()
+        with self.cpu_profile_switch.handler_block(self._cpu_profile_handler):
+            self.cpu_profile_switch.set_active(status["cpu_running"])
+        if status["cpu_running"]:
+            remaining = max(0, int(status["cpu_until"] - time.time()))
+            self.row_cpu_profile.set_subtitle(f"Profiling {status['cpu_scope']}, {remaining}s left")
+        else:
+            self.row_cpu_profile.set_subtitle(
+                f"Profile {status['cpu_scope']} for {SETTINGS.get('profile_seconds', 30)}s into {status['dir']}"
+            )
+        if status["memory_tracing"]:
+            text = "Tracing allocations; each snapshot reports growth since the previous one"
+        else:
+            text = "Start tracemalloc and report top allocation sites"
+        if status["last_output"]:
+            text = f"{text}\nLast: {status['last_output']}"
+        self.row_memory_profile.set_subtitle(text)
+
+    def _profile_in_background(self, fn):
+        def _work():
+            try:
+                fn()
+            except Exception:
+                log_exception("Profiling action failed")
+            GLib.idle_add(self._refresh_profile_rows)
+
+        threading.Thread(target=_work, daemon=True).start()
+
+    def on_cpu_profile_toggled(self, switch, _param):
+        if switch.get_active():
+            try:
+                profiler.start_cpu(float(SETTINGS.get("profile_seconds", 30)))
+            except (TypeError, ValueError):
+                profiler.start_cpu()
+            self._refresh_profile_rows()
+        else:
+            self._profile_in_background(profiler.stop_cpu)
+
+    def on_memory_snapshot(self, _btn):
+        self._profile_in_background(profiler.snapshot_memory)
+
+    def on_memory_stop(self, _btn):
+        profiler.stop_memory()
+        self._refresh_profile_rows()
+
+    def _on_destroy_usage(self, *_args):
+        if self._usage_source_id:
+            GLib.source_remove(self._usage_source_id)
+            self._usage_source_id = None
+
     def on_tray_only_toggled(self, switch, _param):
         global SETTINGS
         tray_only = bool(switch.get_active())
         SETTINGS["startup_mode"] = "tray_only" if tray_only else "window_and_tray"
         save_settings(SETTINGS)
 
+    def _refresh_watch_row(self):
+        folders = [WatchFolder.from_setting(raw) for raw in SETTINGS.get("watch_folders") or []]
+        lines = [
+            f"{f.path} ({'all devices' if f.udids == 'all' else f'{len(f.udids)} device(s)'})"
+            for f in folders
+            if f is not None
+        ]
+        if lines:
+            self.row_watch.set_subtitle("\n".join(lines))
+        else:
+            self.row_watch.set_subtitle("Install new IPAs dropped into a folder automatically")
+
+    def _save_watch_folders(self, folders):
+        global SETTINGS
+        SETTINGS["watch_folders"] = folders
+        save_settings(SETTINGS)
+        apply_watch_folders()
+        self._refresh_watch_row()
+
+    def on_add_watch_folder(self, _btn):
+        dialog = Gtk.FileChooserDialog(
+            title="Choose a folder to watch",
+            parent=self,
+            action=Gtk.FileChooserAction.SELECT_FOLDER,
+        )
+        dialog.add_buttons(
+            Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_OPEN, Gtk.ResponseType.OK
+        )
+        response = dialog.run()
+        path = dialog.get_filename() if response == Gtk.ResponseType.OK else None
+        dialog.destroy()
+        if not path:
+            return
+        folders = list(SETTINGS.get("watch_folders") or [])
+        existing = {getattr(WatchFolder.from_setting(raw), "path", None) for raw in folders}
+        if os.path.abspath(path) not in existing:
+            folders.append(WatchFolder(path).to_setting())
+        self._save_watch_folders(folders)
+
+    def on_clear_watch_folders(self, _btn):
+        self._save_watch_folders([])
+
+    def _refresh_accounts_row(self):
+        if account_pool is None or not account_pool.accounts():
+            self.row_accounts.set_subtitle("Spread installs over several Apple IDs")
+            return
+        limit = account_pool.app_ids_per_week
+        self.row_accounts.set_subtitle(
+            "\n".join(
+                f"{apple_id}: {used}/{limit} app IDs this week" + (", installing" if running else "")
+                for apple_id, used, running in account_pool.summary()
+            )
+        )
+
+    def on_add_account(self, _btn):
+        dialog = Gtk.Dialog(title="Add Apple ID", transient_for=self, flags=0)
+        dialog.add_buttons(Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_OK, Gtk.ResponseType.OK)
+        box = dialog.get_content_area()
+        box.set_spacing(6)
+        id_entry = Gtk.Entry()
+        id_entry.set_placeholder_text("Apple ID")
+        pw_entry = Gtk.Entry()
+        pw_entry.set_placeholder_text("Password")
+        pw_entry.set_visibility(False)
+        box.pack_start(id_entry, False, False, 0)
+        box.pack_start(pw_entry, False, False, 0)
+        dialog.show_all()
+        response = dialog.run()
+        apple_id_value = id_entry.get_text().strip()
+        password_value = pw_entry.get_text()
+        dialog.destroy()
+        if response != Gtk.ResponseType.OK or not apple_id_value or not password_value:
+            return
+        add_pooled_account(apple_id_value, password_value)
+        self._refresh_accounts_row()
+
+    def on_clear_accounts(self, _btn):
+        if account_pool is not None:
+            for apple_id in account_pool.accounts():
+                remove_pooled_account(apple_id)
+        self._refresh_accounts_row()
+
     def refresh_statuses(self):
         try:
             if is_anisette_accessible(timeout=0.5):
                 self.row_anisette.set_subtitle("Accessible on http://127.0.0.1:6969")
             else:
                 self.row_anisette.set_subtitle("Not accessible")
+            pool_text = _anisette_pool_summary()
+            if pool_text:
+                self.row_anisette.set_subtitle(f"{self.row_anisette.get_subtitle()}\n{pool_text}")
 
             if is_netmuxd_ready(timeout=0.35):
                 self.row_netmuxd.set_subtitle("Ready (USBMUXD_SOCKET_ADDRESS=127.0.0.1:27015)")
@@ -2659,7 +3762,20 @@ class SettingsWindow(Handy.Window):
 
 
 # Main function
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="althea")
+    parser.add_argument(
+        "--manifest",
+        metavar="PATH",
+        help="queue the installs listed in a JSON/TOML manifest (forwarded to a running althea)",
+    )
+    # GTK may add its own options; ignore anything we don't know.
+    args, _unknown = parser.parse_known_args(argv)
+    return args
+
+
 def main():
+    args = parse_args()
     GLib.set_prgname("althea")
     global altheapath
     if not os.path.exists(altheapath):
@@ -2686,6 +3802,18 @@ def main():
     except Exception as e:
         logging.warning("Unable to check existing PID file: %s", e)
 
+    if other_instance_running and args.manifest:
+        try:
+            reply = send_command("load_manifest", path=os.path.abspath(args.manifest))
+        except (OSError, ValueError) as e:
+            print(f"Could not reach the running althea: {e}", file=sys.stderr)
+            sys.exit(1)
+        if not reply.get("ok"):
+            print(f"Manifest rejected: {reply.get('error')}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Queued {reply.get('queued', 0)} install(s).")
+        return
+
     if other_instance_running:
         # If already running, just show the main window instead of starting new processes
         print("althea is already running. Showing main window...")
@@ -2700,6 +3828,11 @@ def main():
     except Exception as e:
         logging.warning("Unable to write PID file: %s", e)
 
+    start_background_services()
+
+    if args.manifest:
+        _load_manifest_async(args.manifest)
+
     # Best-effort tray indicator.
     try:
         global indicator
@@ -2783,6 +3916,8 @@ class MainWindow(Handy.Window):
             ("View Logs", lambda x: openwindow(LogWindow)),
             ("Install AltStore", altstoreinstall),
             ("Install an IPA file", altserverfile),
+            ("Install on all devices", altserverfile_all),
+            ("Load manifest", load_manifest_dialog),
             ("Pair", lambda x: openwindow(PairWindow)),
         ]
 
@@ -0,0 +1,145 @@
+from althea_app.fanout import FanoutGroup
+from althea_app.install_queue import InstallQueue
+from althea_app.install_tasks import InstallTask, InstallTaskStatus, Priority
+from althea_app.scheduler import PriorityScheduler
+
+from .test_scheduler import FakeClock
+
+
+class FakeQueue(InstallQueue):
+    """Records launches instead of running AltServer; tests finish tasks."""
+
+    def __init__(self, **kwargs):
+        self.clock = FakeClock()
+        super().__init__(scheduler=PriorityScheduler(), clock=self.clock, **kwargs)
+        self.launched = []
+        self.timers = []
+
+    def _launch(self, task):
+        self.launched.append(task)
+
+    def _call_later(self, delay_s, fn):
+        self.timers.append((delay_s, fn))
+
+    def complete(self, task, status=InstallTaskStatus.SUCCEEDED):
+        task.status = status
+        self._finish(task)
+        self._maybe_start_next()
+
+
+class FakeMonitor:
+    def __init__(self, attached=()):
+        self.attached = set(attached)
+
+    def add_listener(self, _fn):
+        pass
+
+    def is_attached(self, udid):
+        return udid in self.attached
+
+    def snapshot(self):
+        return [{"udid": u} for u in self.attached]
+
+
+def task(udid, priority=Priority.NORMAL):
+    return InstallTask("/tmp/app.ipa", "a@example.com", "", udid=udid, priority=priority, created_at=0)
+
+
+def test_single_lane_runs_by_priority():
+    queue = FakeQueue()
+    low, high = task("d1", Priority.LOW), task("d2", Priority.HIGH)
+    queue.enqueue(low)
+    queue.enqueue(high)
+    assert queue.launched == [low]
+
+    queue.complete(low)
+    assert queue.launched == [low, high]
+    assert high.status == InstallTaskStatus.INSTALLING
+
+
+def test_lanes_never_share_a_device():
+    queue = FakeQueue(max_parallel=3)
+    tasks = [task("d1"), task("d1"), task("d2")]
+    queue.enqueue_many(tasks)
+    assert queue.launched == [tasks[0], tasks[2]]
+
+    queue.complete(tasks[0])
+    assert queue.launched[-1] is tasks[1]
+
+
+def test_fanout_group_opens_its_own_lanes():
+    queue = FakeQueue(max_parallel=1)
+    group = FanoutGroup("/tmp/app.ipa", concurrency=3)
+    for udid in ("d1", "d2", "d3", "d4"):
+        t = task(udid)
+        t.group = group
+        group.tasks.append(t)
+    queue.enqueue_group(group)
+    assert [t.udid for t in queue.launched] == ["d1", "d2", "d3"]
+
+    queue.complete(group.tasks[0])
+    assert [t.udid for t in queue.launched] == ["d1", "d2", "d3", "d4"]
+
+
+def test_parked_task_resumes_on_attach():
+    queue = FakeQueue()
+    queue.attach_device_monitor(FakeMonitor())
+    t = task("d1")
+    queue.enqueue(t)
+    queue._park(t)
+    queue._finish(t)
+    assert queue.parked("d1") == [t]
+    assert queue.timers == []  # device absent: wait for an attach event
+
+    queue._unpark("d1")
+    assert t.status == InstallTaskStatus.INSTALLING
+    assert queue.launched == [t, t]
+
+
+def test_cancel_pending_task():
+    queue = FakeQueue()
+    running, pending = task("d1"), task("d2")
+    queue.enqueue_many([running, pending])
+    queue.cancel(pending)
+    assert pending.status == InstallTaskStatus.CANCELED
+    queue.complete(running)
+    assert queue.launched == [running]
+
+
+def test_retry_backoff_frees_the_lane():
+    queue = FakeQueue()
+    failing, other = task("d1", Priority.HIGH), task("d2")
+    queue.enqueue_many([failing, other])
+    assert queue.launched == [failing]
+
+    queue._retry_later(failing, 30.0, "network error; retrying in 30s")
+    queue._finish(failing)
+    queue._maybe_start_next()
+    assert queue.launched == [failing, other]
+    assert queue.timers[-1][0] == 30.0
+
+    queue.complete(other)
+    assert queue.launched == [failing, other]  # still backing off
+    queue.clock.advance(30)
+    queue.timers[-1][1]()
+    assert queue.launched == [failing, other, failing]
+
+
+def test_park_retries_stop_while_device_stays_unreachable():
+    queue = FakeQueue()
+    queue.attach_device_monitor(FakeMonitor(attached={"d1"}))
+    t = task("d1")
+    queue.enqueue(t)
+    for _ in range(queue.max_park_retries + 2):
+        queue._park(t)
+        queue._finish(t)
+        if not queue.timers:
+            break
+        queue.timers.pop()[1]()
+    assert t.status == InstallTaskStatus.WAITING
+    assert t.park_retries == queue.max_park_retries
+    assert len(queue.launched) == queue.max_park_retries + 1
+
+    queue._unpark("d1")  # real attach event
+    assert t.status == InstallTaskStatus.INSTALLING
+    assert t.park_retries == 0
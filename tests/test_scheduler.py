@@ -0,0 +1,125 @@
+from althea_app.install_tasks import InstallTask, InstallTaskStatus, Priority
+from althea_app.scheduler import AccountAffinityScheduler, FifoScheduler, PriorityScheduler
+
+HOUR = 3600.0
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def task(udid, apple_id="a@example.com", priority=Priority.NORMAL, deadline=None):
+    return InstallTask("/tmp/app.ipa", apple_id, "", udid=udid, priority=priority, deadline=deadline, created_at=0)
+
+
+def udids(tasks):
+    return [t.udid for t in tasks]
+
+
+def test_fifo_keeps_queue_order():
+    tasks = [task("d1", priority=Priority.LOW), task("d2", priority=Priority.URGENT)]
+    assert udids(FifoScheduler().order(tasks, now=0)) == ["d1", "d2"]
+
+
+def test_priority_classes_then_queue_order():
+    tasks = [
+        task("d1", priority=Priority.LOW),
+        task("d2", priority=Priority.NORMAL),
+        task("d3", priority=Priority.HIGH),
+        task("d4", priority=Priority.NORMAL),
+    ]
+    assert udids(PriorityScheduler().order(tasks, now=0)) == ["d3", "d2", "d4", "d1"]
+
+
+def test_deadline_promotes_to_urgent_as_time_passes():
+    clock = FakeClock()
+    scheduler = PriorityScheduler(urgent_window_s=12 * HOUR)
+    expiring = task("d1", priority=Priority.LOW, deadline=clock() + 20 * HOUR)
+    tasks = [task("d2", priority=Priority.HIGH), expiring]
+
+    assert udids(scheduler.order(tasks, now=clock())) == ["d2", "d1"]
+    clock.advance(9 * HOUR)  # 11 h left: inside the urgent window
+    assert scheduler.effective_priority(expiring, clock()) == Priority.URGENT
+    assert udids(scheduler.order(tasks, now=clock())) == ["d1", "d2"]
+
+
+def test_earliest_deadline_first_within_a_class():
+    clock = FakeClock()
+    tasks = [
+        task("d1"),
+        task("d2", deadline=clock() + 100 * HOUR),
+        task("d3", deadline=clock() + 50 * HOUR),
+    ]
+    assert udids(PriorityScheduler().order(tasks, now=clock())) == ["d3", "d2", "d1"]
+
+
+def test_device_fairness_decays_over_simulated_time():
+    clock = FakeClock()
+    scheduler = PriorityScheduler(fairness_half_life_s=1800)
+    served = task("d1", apple_id="x@example.com")
+    scheduler.on_started(served, clock())
+    tasks = [task("d1", apple_id="y@example.com"), task("d2", apple_id="z@example.com")]
+
+    assert udids(scheduler.order(tasks, now=clock())) == ["d2", "d1"]
+    assert scheduler.fairness_score(tasks[0], clock() + 1800) == 0.5
+    clock.advance(10 * 24 * HOUR)  # fully decayed: back to queue order
+    assert udids(scheduler.order(tasks, now=clock())) == ["d1", "d2"]
+
+
+def test_apple_id_fairness():
+    clock = FakeClock()
+    scheduler = PriorityScheduler()
+    scheduler.on_started(task("d9", apple_id="busy@example.com"), clock())
+    tasks = [task("d1", apple_id="busy@example.com"), task("d2", apple_id="idle@example.com")]
+    assert udids(scheduler.order(tasks, now=clock())) == ["d2", "d1"]
+
+
+def test_fairness_never_beats_priority():
+    clock = FakeClock()
+    scheduler = PriorityScheduler()
+    for _ in range(5):
+        scheduler.on_started(task("d1"), clock())
+    tasks = [task("d2", priority=Priority.LOW), task("d1", priority=Priority.HIGH)]
+    assert udids(scheduler.order(tasks, now=clock())) == ["d1", "d2"]
+
+
+def test_one_install_per_device():
+    running = [task("d1")]
+    running[0].status = InstallTaskStatus.INSTALLING
+    tasks = [task("d1"), task("d2")]
+    assert udids(PriorityScheduler().order(tasks, now=0, running=running)) == ["d2"]
+
+
+def test_account_affinity_clusters_warm_account_within_a_class():
+    clock = FakeClock()
+    scheduler = AccountAffinityScheduler(session_warm_s=900)
+    first = task("d0", apple_id="warm@example.com")
+    scheduler.on_started(first, clock())
+    scheduler.on_finished(first, clock())
+    tasks = [
+        task("d1", apple_id="cold@example.com"),
+        task("d2", apple_id="warm@example.com"),
+        task("d3", apple_id="cold@example.com", priority=Priority.HIGH),
+    ]
+
+    assert udids(scheduler.order(tasks, now=clock())) == ["d3", "d2", "d1"]
+    clock.advance(901)  # session went cold
+    assert udids(scheduler.order(tasks, now=clock())) == ["d3", "d1", "d2"]
+
+
+def test_retry_backoff_holds_task_until_not_before():
+    clock = FakeClock()
+    retrying = task("d1", priority=Priority.HIGH)
+    retrying.not_before = clock() + 30
+    tasks = [retrying, task("d2")]
+
+    assert udids(PriorityScheduler().order(tasks, now=clock())) == ["d2"]
+    clock.advance(30)
+    assert udids(PriorityScheduler().order(tasks, now=clock())) == ["d1", "d2"]